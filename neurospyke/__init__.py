@@ -1,3 +1,3 @@
-from . import spikes, utils, visualization
+from . import io, live, parallel, preprocessing, spikes, utils, visualization
 
-__all__ = ['spikes', 'utils', 'visualization']
\ No newline at end of file
+__all__ = ['io', 'live', 'parallel', 'preprocessing', 'spikes', 'utils', 'visualization']
@@ -0,0 +1,355 @@
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import time
+import numpy as np
+
+from . import parallel, utils
+from .io import BinaryReader, HDF5Reader, SpikeStore
+from .preprocessing import FilteredReader, get_bandpass_sos, get_notch_sos
+from .spikes.detection import detect_spikes, detect_spikes_blocks
+from .spikes.detection.blocks import BLOCK_DETECTORS
+from .spikes.sorting import get_waveforms
+
+METHODS = {
+    'hard': 'hard_threshold',
+    'differential': 'differential_threshold',
+    'swtteo': 'SWTTEO',
+    'oswtteo': 'OSWTTEO'
+}
+
+HDF5_EXTENSIONS = ['.h5', '.hdf5']
+BINARY_EXTENSIONS = ['.bin', '.dat', '.raw']
+
+DONE_SUFFIX = '.done'
+REPORT = 'report.json'
+
+def main(argv:list = None):
+    '''
+    Run the neurospyke command line interface.
+
+    Parameters
+    ----------
+    argv : list of str, optional
+        The command line arguments. If not specified, sys.argv is employed.
+
+    Returns
+    -------
+    status : int
+        The exit status, i.e. 0 if all the recordings were processed and 1 otherwise.
+    '''
+    parser = _get_parser()
+    args = parser.parse_args(argv)
+
+    if args.method in ['hard', 'differential'] and args.threshold is None:
+        parser.error("'--threshold' is required by the '" + args.method + "' method")
+
+    if args.block_size is not None and METHODS[args.method] not in BLOCK_DETECTORS:
+        parser.error("'--block-size' is not supported by the '" + args.method + "' method")
+
+    return args.func(args)
+
+def detect(args:argparse.Namespace):
+    '''
+    Detect spikes in all the recordings of a directory, optionally extracting
+    their waveforms and computing summary statistics. For each recording, a
+    directory is created in the output directory, containing a spike store,
+    the summary statistics and the timing of each stage. A completion marker
+    is written last, so that recordings already processed are skipped when
+    the command is run again.
+
+    Recordings are processed one after the other, while the channels of
+    each recording are processed in parallel by the persistent pool of
+    worker processes, each of which reads only its channel from
+    memory-mapped recordings. Summary statistics are computed on chunks of
+    samples.
+    '''
+    filenames = _get_recordings(args.in_dir)
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    reports = []
+    start_time = time.perf_counter()
+
+    with parallel.config(n_jobs=args.jobs, chunk_size=args.chunk_size):
+        for (file_idx, filename) in enumerate(filenames):
+            name = os.path.splitext(os.path.basename(filename))[0]
+            out_path = os.path.join(args.out_dir, name)
+            progress = '[' + str(file_idx + 1) + '/' + str(len(filenames)) + '] ' + name
+
+            if os.path.exists(out_path + DONE_SUFFIX) and not args.force:
+                with open(os.path.join(out_path, REPORT), 'r') as f:
+                    reports.append(dict(json.load(f), skipped=True))
+                _print_progress(args, progress + ': already processed, skipped')
+                continue
+
+            # Outputs of an interrupted run are incomplete and replaced
+            if os.path.exists(out_path + DONE_SUFFIX):
+                os.remove(out_path + DONE_SUFFIX)
+            if os.path.exists(out_path):
+                shutil.rmtree(out_path)
+
+            try:
+                report = _process_recording(filename, out_path, args)
+            except Exception as error:
+                reports.append({'file': filename, 'error': type(error).__name__ + ': ' + str(error)})
+                _print_progress(args, progress + ': failed, ' + type(error).__name__ + ': ' + str(error))
+                continue
+
+            _write_json(os.path.join(out_path, REPORT), report)
+            with open(out_path + DONE_SUFFIX, 'w') as f:
+                pass
+
+            reports.append(report)
+            _print_progress(args, progress + ': ' + str(report['n_spikes']) + ' spikes in ' + format(report['timing']['total'], '.2f') + ' s')
+
+    total_time = time.perf_counter() - start_time
+    processed = [report for report in reports if 'error' not in report and not report.get('skipped', False)]
+
+    stages_time = {}
+    for report in processed:
+        for (stage, stage_time) in report['timing'].items():
+            stages_time[stage] = stages_time.get(stage, 0) + stage_time
+
+    # A run which only skipped recordings leaves the report of the run which processed them
+    n_failed = len([report for report in reports if 'error' in report])
+    if len(processed) > 0 or n_failed > 0 or not os.path.exists(os.path.join(args.out_dir, REPORT)):
+        _write_json(os.path.join(args.out_dir, REPORT), {
+            'method': METHODS[args.method],
+            'n_jobs': parallel.get_n_jobs(args.jobs),
+            'n_files': len(filenames),
+            'n_processed': len(processed),
+            'n_skipped': len([report for report in reports if report.get('skipped', False)]),
+            'n_failed': n_failed,
+            'timing': dict(stages_time, total=total_time),
+            'files': reports
+        })
+
+    _print_progress(args, str(len(processed)) + ' processed, ' + str(len(reports) - len(processed)) + ' skipped or failed, in ' + format(total_time, '.2f') + ' s')
+
+    return 1 if any(['error' in report for report in reports]) else 0
+
+def _process_recording(filename, out_path, args):
+    timing = {}
+    start_time = time.perf_counter()
+
+    with _timer(timing, 'open'):
+        reader = _open_reader(filename, args)
+        sampling_time = reader.sampling_time
+        if sampling_time is None:
+            raise ValueError("the sampling time of '" + filename + "' is unknown, '--sampling-time' must be specified")
+
+        if args.bandpass is not None or args.notch is not None:
+            reader = FilteredReader(reader, _get_filter_sos(args, sampling_time), zero_phase=args.zero_phase)
+
+    with _timer(timing, 'detection'):
+        (detector_args, detector_kwargs) = _get_detector_params(args, sampling_time)
+        spikes_idxs, spikes_values = _detect(reader, args, detector_args, detector_kwargs)
+
+    waveforms = None
+    if args.waveforms:
+        with _timer(timing, 'waveforms'):
+            waveforms = _get_waveforms(reader, spikes_idxs, args.window_length, sampling_time)
+
+    if args.summary:
+        with _timer(timing, 'summary'):
+            summary = _get_summary(reader, spikes_idxs, spikes_values, args.chunk_size)
+
+    with _timer(timing, 'write'):
+        os.makedirs(out_path)
+        store = SpikeStore(os.path.join(out_path, 'spikes'), sampling_time=sampling_time, compressed=args.compress)
+
+        channels = np.concatenate([np.full(channel_idxs.size, channel) for (channel, channel_idxs) in enumerate(spikes_idxs)])
+        store.append(np.concatenate(spikes_idxs), channels, np.concatenate(spikes_values), waveforms=None if waveforms is None else np.concatenate(waveforms))
+
+        if args.summary:
+            _write_json(os.path.join(out_path, 'summary.json'), summary)
+
+    if hasattr(reader, 'close'):
+        reader.close()
+
+    timing['total'] = time.perf_counter() - start_time
+
+    return {
+        'file': filename,
+        'n_channels': reader.n_channels,
+        'n_samples': reader.n_samples,
+        'sampling_time': sampling_time,
+        'n_spikes': int(sum([channel_idxs.size for channel_idxs in spikes_idxs])),
+        'timing': timing
+    }
+
+def _detect(reader, args, detector_args, detector_kwargs):
+    method = METHODS[args.method]
+
+    if args.block_size is None:
+        return detect_spikes(reader, method, *detector_args, **detector_kwargs)
+
+    # Long recordings with few channels are split in time blocks instead
+    spikes_idxs = []
+    spikes_values = []
+    for channel in range(reader.n_channels):
+        channel_idxs, channel_values = detect_spikes_blocks(reader, method, *detector_args, block_size=args.block_size, channel=channel, **detector_kwargs)
+        spikes_idxs.append(channel_idxs)
+        spikes_values.append(channel_values)
+
+    return spikes_idxs, spikes_values
+
+def _get_detector_params(args, sampling_time):
+    method = METHODS[args.method]
+    kwargs = {'polarity': args.polarity}
+
+    if method == 'hard_threshold':
+        return (args.threshold, args.refractory_period), dict(kwargs, sampling_time=sampling_time)
+    elif method == 'differential_threshold':
+        return (args.threshold, args.window_length, args.refractory_period), dict(kwargs, sampling_time=sampling_time)
+
+    if args.threshold is not None:
+        kwargs['threshold'] = args.threshold
+
+    if method == 'SWTTEO':
+        return (sampling_time,), dict(kwargs, refractory_period=args.refractory_period, peak_duration=args.peak_duration)
+
+    return (args.refractory_period, args.peak_duration), dict(kwargs, sampling_time=sampling_time)
+
+def _get_filter_sos(args, sampling_time):
+    sos = []
+    if args.bandpass is not None:
+        sos.append(get_bandpass_sos(args.bandpass[0], args.bandpass[1], sampling_time, order=args.filter_order))
+    for frequency in args.notch if args.notch is not None else []:
+        sos.append(get_notch_sos(frequency, sampling_time))
+
+    return np.concatenate(sos)
+
+def _get_waveforms(reader, spikes_idxs, window_length, sampling_time):
+    window_half_length = utils.get_in_samples(window_length / 2, sampling_time)
+
+    # Waveforms crossing the boundaries of the recording are left as NaN
+    is_inside = [(channel_idxs >= window_half_length) & (channel_idxs + window_half_length <= reader.n_samples) for channel_idxs in spikes_idxs]
+    inside_waveforms = get_waveforms(reader, [channel_idxs[channel_is_inside] for (channel_idxs, channel_is_inside) in zip(spikes_idxs, is_inside)], window_length=window_length, sampling_time=sampling_time)
+
+    waveforms = []
+    for (channel_is_inside, channel_waveforms) in zip(is_inside, inside_waveforms):
+        waveforms.append(np.full((channel_is_inside.size, 2 * window_half_length), np.nan))
+        waveforms[-1][channel_is_inside] = channel_waveforms
+
+    return waveforms
+
+def _get_summary(reader, spikes_idxs, spikes_values, chunk_size):
+    # Noise statistics are accumulated chunk by chunk, to bound memory
+    sums = np.zeros(reader.n_channels)
+    squares_sums = np.zeros(reader.n_channels)
+    for (_, _, _, block) in reader.iter_chunks(chunk_size if chunk_size is not None else parallel.get_config()['chunk_size']):
+        sums += np.sum(block, axis=1)
+        squares_sums += np.sum(np.square(block), axis=1)
+
+    means = sums / reader.n_samples
+    stds = np.sqrt(np.maximum(squares_sums / reader.n_samples - np.square(means), 0))
+    duration = reader.n_samples * reader.sampling_time
+
+    channels = []
+    for channel in range(reader.n_channels):
+        n_spikes = spikes_idxs[channel].size
+        channels.append({
+            'channel': channel,
+            'n_spikes': int(n_spikes),
+            'firing_rate': n_spikes / duration,
+            'mean_amplitude': float(np.mean(spikes_values[channel])) if n_spikes > 0 else None,
+            'mean': float(means[channel]),
+            'std': float(stds[channel])
+        })
+
+    n_spikes = sum([channel['n_spikes'] for channel in channels])
+
+    return {
+        'duration': duration,
+        'n_spikes': n_spikes,
+        'mean_firing_rate': n_spikes / duration / reader.n_channels,
+        'n_active_channels': len([channel for channel in channels if channel['n_spikes'] > 0]),
+        'channels': channels
+    }
+
+def _get_recordings(in_dir):
+    if not os.path.isdir(in_dir):
+        raise ValueError("'" + in_dir + "' is not a directory")
+
+    filenames = [os.path.join(in_dir, name) for name in sorted(os.listdir(in_dir))]
+
+    return [filename for filename in filenames if os.path.isfile(filename) and os.path.splitext(filename)[1].lower() in HDF5_EXTENSIONS + BINARY_EXTENSIONS]
+
+def _open_reader(filename, args):
+    if os.path.splitext(filename)[1].lower() in HDF5_EXTENSIONS:
+        return HDF5Reader(filename, dataset=args.dataset, stream=args.stream, gain=args.gain, offset=args.offset, sampling_time=args.sampling_time)
+
+    if args.n_channels is None:
+        raise ValueError("'--n-channels' must be specified to read the binary file '" + filename + "'")
+
+    return BinaryReader(filename, args.n_channels, dtype=args.dtype, gain=1 if args.gain is None else args.gain, offset=0 if args.offset is None else args.offset, sampling_time=args.sampling_time, interleaved=not args.channels_first, header_size=args.header_size)
+
+@contextlib.contextmanager
+def _timer(timing, stage):
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing[stage] = time.perf_counter() - start_time
+
+def _write_json(filename, data):
+    # Reports are replaced atomically, so that they are never found half-written
+    with open(filename + '.tmp', 'w') as f:
+        json.dump(data, f, indent=4)
+    os.replace(filename + '.tmp', filename)
+
+def _print_progress(args, message):
+    if not args.quiet:
+        print(message, file=sys.stderr, flush=True)
+
+def _get_parser():
+    parser = argparse.ArgumentParser(prog='neurospyke', description='Neural signal analysis from the command line.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    detect_parser = subparsers.add_parser('detect', help='detect spikes in all the recordings of a directory', description=detect.__doc__.strip().replace('\n    ', ' '))
+    detect_parser.add_argument('in_dir', help='the directory containing the recordings (.h5, .hdf5, .bin, .dat or .raw files)')
+    detect_parser.add_argument('out_dir', help='the directory where results are written')
+    detect_parser.set_defaults(func=detect)
+
+    group = detect_parser.add_argument_group('detection')
+    group.add_argument('--method', choices=list(METHODS), default='swtteo', help='the detection algorithm (default: swtteo)')
+    group.add_argument('--threshold', type=float, help='the detection threshold, required by the hard and differential methods')
+    group.add_argument('--polarity', type=int, choices=[-1, 0, 1], default=-1, help='the polarity of spikes (default: -1)')
+    group.add_argument('--refractory-period', type=float, default=0.001, help='the refractory period in seconds (default: 0.001)')
+    group.add_argument('--peak-duration', type=float, default=0.0025, help='the maximum duration of a spike in seconds, for the wavelet methods (default: 0.0025)')
+    group.add_argument('--window-length', type=float, default=0.002, help='the length in seconds of the detection window of the differential method and of waveforms (default: 0.002)')
+
+    group = detect_parser.add_argument_group('preprocessing')
+    group.add_argument('--bandpass', type=float, nargs=2, metavar=('LOW', 'HIGH'), help='band-pass filter the recordings between these frequencies in Hz')
+    group.add_argument('--filter-order', type=int, default=4, help='the order of the band-pass filter (default: 4)')
+    group.add_argument('--notch', type=float, action='append', metavar='FREQUENCY', help='remove this frequency in Hz, e.g. the power line one, may be repeated')
+    group.add_argument('--zero-phase', action='store_true', help='filter forward and backward, without phase distortion, instead of causally')
+
+    group = detect_parser.add_argument_group('outputs')
+    group.add_argument('--waveforms', action='store_true', help='extract the waveform of each spike')
+    group.add_argument('--no-summary', dest='summary', action='store_false', help='do not compute summary statistics')
+    group.add_argument('--compress', action='store_true', help='write compressed spike stores')
+    group.add_argument('--force', action='store_true', help='process again the recordings already processed')
+    group.add_argument('--quiet', action='store_true', help='do not report progress')
+
+    group = detect_parser.add_argument_group('execution')
+    group.add_argument('--jobs', type=int, help='the number of worker processes sharing the channels, or the time blocks, of each recording, as recordings are processed one after the other; negative values count back from the number of CPUs (default: 1)')
+    group.add_argument('--chunk-size', type=int, help='the number of samples read at once by chunked stages (default: ' + str(parallel.get_config()['chunk_size']) + ')')
+    group.add_argument('--block-size', type=int, help='detect each channel in time blocks of this number of samples, for long recordings with few channels (not supported by the oswtteo method)')
+
+    group = detect_parser.add_argument_group('recordings')
+    group.add_argument('--sampling-time', type=float, help='the sampling time in seconds, required for binary files')
+    group.add_argument('--gain', type=float, help='the factor converting raw samples to physical units')
+    group.add_argument('--offset', type=float, help='the raw value corresponding to zero')
+    group.add_argument('--n-channels', type=int, help='the number of channels of binary files')
+    group.add_argument('--dtype', default='int16', help='the data type of binary files (default: int16)')
+    group.add_argument('--channels-first', action='store_true', help='binary files store channels one after the other instead of interleaved')
+    group.add_argument('--header-size', type=int, default=0, help='the number of bytes preceding the samples in binary files (default: 0)')
+    group.add_argument('--dataset', help='the dataset containing the samples in HDF5 files, if they do not follow the MCS layout')
+    group.add_argument('--stream', type=int, default=0, help='the analog stream of MCS HDF5 files (default: 0)')
+
+    return parser
@@ -0,0 +1,14 @@
+from .binary import BinaryReader
+from .hdf5 import HDF5Reader
+from .pyramid import build_pyramid, MinMaxPyramid
+from .reader import Reader
+from .store import SpikeStore
+
+__all__ = [
+        'BinaryReader',
+        'build_pyramid',
+        'HDF5Reader',
+        'MinMaxPyramid',
+        'Reader',
+        'SpikeStore'
+    ]
\ No newline at end of file
@@ -0,0 +1,43 @@
+import os
+import numpy as np
+
+from .reader import Reader
+
+class BinaryReader(Reader):
+    '''
+    Read a recording stored as a flat binary file, such as the raw exports
+    of most acquisition systems, through a memory map.
+
+    Parameters
+    ----------
+    filename : str
+        The path of the binary file.
+    n_channels : int
+        The number of recorded channels.
+    dtype : data-type, default=np.int16
+        The data type of the raw samples.
+    gain : float or array_like, default=1
+        The factor converting raw samples to physical units, either shared
+        by all the channels or specified for each channel.
+    offset : float or array_like, default=0
+        The raw value corresponding to zero, either shared by all the
+        channels or specified for each channel.
+    sampling_time : float, optional
+        The sampling time for the recorded data.
+    interleaved : bool, default=True
+        If True, the samples of all the channels are interleaved, i.e. the file
+        is (n_samples x n_channels). Otherwise, the channels are stored one
+        after the other, i.e. the file is (n_channels x n_samples).
+    header_size : int, default=0
+        The number of bytes preceding the samples.
+    '''
+    def __init__(self, filename:str, n_channels:int, dtype = np.int16, gain = 1, offset = 0, sampling_time:float = None, interleaved:bool = True, header_size:int = 0):
+        self.filename = filename
+        self._init_args = (filename, n_channels, dtype, gain, offset, sampling_time, interleaved, header_size)
+        dtype = np.dtype(dtype)
+
+        n_samples = (os.path.getsize(filename) - header_size) // (dtype.itemsize * n_channels)
+        shape = (n_samples, n_channels) if interleaved else (n_channels, n_samples)
+        raw = np.memmap(filename, dtype=dtype, mode='r', offset=header_size, shape=shape)
+
+        super().__init__(raw, interleaved, gain, offset, sampling_time)
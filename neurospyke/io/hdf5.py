@@ -0,0 +1,101 @@
+import numpy as np
+
+from .reader import Reader
+
+MCS_STREAM = 'Data/Recording_0/AnalogStream/Stream_'
+
+class HDF5Reader(Reader):
+    '''
+    Read a recording stored in an HDF5 file. Datasets stored contiguously and
+    uncompressed are memory-mapped, otherwise they are read through h5py. If
+    no dataset is specified, the file is expected to follow the layout of the
+    Multi Channel Systems (MCS) HDF5 exports, from which gain, offset and
+    sampling time are also retrieved.
+
+    Parameters
+    ----------
+    filename : str
+        The path of the HDF5 file.
+    dataset : str, optional
+        The path of the dataset containing the raw samples, within the file.
+    stream : int, default=0
+        The analog stream to read from MCS files.
+    gain : float or array_like, optional
+        The factor converting raw samples to physical units, either shared
+        by all the channels or specified for each channel. It overrides the
+        one of MCS files. Otherwise, it defaults to 1.
+    offset : float or array_like, optional
+        The raw value corresponding to zero, either shared by all the
+        channels or specified for each channel. It overrides the one of MCS
+        files. Otherwise, it defaults to 0.
+    sampling_time : float, optional
+        The sampling time for the recorded data. It overrides the one of MCS files.
+    interleaved : bool, default=False
+        If True, the dataset is (n_samples x n_channels). Otherwise, it is
+        (n_channels x n_samples), as in MCS files.
+    '''
+    def __init__(self, filename:str, dataset:str = None, stream:int = 0, gain = None, offset = None, sampling_time:float = None, interleaved:bool = False):
+        try:
+            import h5py
+        except ImportError:
+            raise ImportError("HDF5Reader requires 'h5py', which can be installed with 'pip install h5py'")
+
+        self.filename = filename
+        self._init_args = (filename, dataset, stream, gain, offset, sampling_time, interleaved)
+        self._file = h5py.File(filename, 'r')
+
+        if dataset is None:
+            if (MCS_STREAM + str(stream)) not in self._file:
+                raise ValueError("'" + filename + "' does not follow the MCS layout, 'dataset' must be specified")
+
+            (raw, mcs_gain, mcs_offset, mcs_sampling_time) = _get_mcs_stream(self._file[MCS_STREAM + str(stream)])
+            interleaved = False
+
+            gain = mcs_gain if gain is None else gain
+            offset = mcs_offset if offset is None else offset
+            sampling_time = mcs_sampling_time if sampling_time is None else sampling_time
+        else:
+            raw = self._file[dataset]
+
+        # Contiguous datasets are stored as a flat array at a known position of the file
+        self.is_memmap = False
+        if raw.chunks is None and raw.compression is None and raw.id.get_offset() is not None:
+            raw = np.memmap(filename, dtype=raw.dtype, mode='r', offset=raw.id.get_offset(), shape=raw.shape)
+            self.is_memmap = True
+
+        super().__init__(raw, interleaved, 1 if gain is None else gain, 0 if offset is None else offset, sampling_time)
+
+    def close(self):
+        '''
+        Close the HDF5 file.
+        '''
+        self._file.close()
+
+    def _get_raw(self, channels_idxs, samples):
+        if self.is_memmap:
+            return super()._get_raw(channels_idxs, samples)
+
+        # h5py only supports a single list of increasing indices per selection
+        (unique_channels, inverse) = np.unique(channels_idxs, return_inverse=True)
+
+        if isinstance(samples, slice):
+            if self.interleaved:
+                raw = self._raw[samples, unique_channels].T
+            else:
+                raw = self._raw[unique_channels, samples]
+        else:
+            raw = np.stack([self._raw[samples, channel_idx] if self.interleaved else self._raw[channel_idx, samples] for channel_idx in unique_channels])
+
+        return raw[inverse.ravel()]
+
+def _get_mcs_stream(stream):
+    raw = stream['ChannelData']
+    info = stream['InfoChannel'][()]
+
+    # Rows of the channel data are ordered as the rows of the channel info
+    info = info[np.argsort(info['RowIndex'])]
+    gain = info['ConversionFactor'] * np.power(10.0, info['Exponent'])
+    offset = info['ADZero']
+    sampling_time = info['Tick'][0] * 1e-6
+
+    return raw, gain, offset, sampling_time
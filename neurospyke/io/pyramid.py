@@ -0,0 +1,185 @@
+import json
+import math
+import os
+import shutil
+import numpy as np
+
+from .. import parallel, utils
+
+PYRAMID_MANIFEST = 'pyramid.json'
+
+def build_pyramid(data, path:str, min_factor:int = 16, min_bins:int = 1024, sampling_time:float = None, n_jobs:int = None):
+    '''
+    Build a multi-resolution min/max pyramid of a recording, i.e. the minimum
+    and maximum of consecutive bins of samples, at power-of-two decimation
+    levels, stored on disk as memory-mappable arrays. Each channel is read
+    once, in chunks, and channels are processed in parallel.
+
+    Parameters
+    ----------
+    data : ndarray or Reader
+        A (n_channels x n_samples) matrix of recorded data, or a reader.
+    path : str
+        The path of the pyramid directory. An existing pyramid is replaced.
+    min_factor : int, default=16
+        The number of samples in each bin of the finest level. It must be a
+        power of two.
+    min_bins : int, default=1024
+        Levels are added, halving the number of bins each time, until they
+        contain at most this number of bins.
+    sampling_time : float, optional
+        The sampling time for the recorded data, saved along with the
+        pyramid. If not specified, the one of the reader is employed.
+    n_jobs : int, optional
+        The number of processes. If not specified, the value set by
+        parallel.config is employed.
+
+    Returns
+    -------
+    pyramid : MinMaxPyramid
+        The pyramid.
+    '''
+    if min_factor < 1 or (min_factor & (min_factor - 1)) != 0:
+        raise ValueError("'min_factor' expected to be a power of two, received " + str(min_factor))
+
+    if utils.is_reader(data):
+        (n_channels, n_samples) = (data.n_channels, data.n_samples)
+        sampling_time = data.sampling_time if sampling_time is None else sampling_time
+    else:
+        data = np.atleast_2d(data)
+        (n_channels, n_samples) = data.shape
+
+    levels = []
+    factor = min_factor
+    while True:
+        levels.append({'factor': factor, 'n_bins': math.ceil(n_samples / factor), 'file': 'level_' + str(len(levels)) + '.npy'})
+        if levels[-1]['n_bins'] <= min_bins:
+            break
+        factor *= 2
+
+    # The manifest is written last, so that an interrupted build is not mistaken for a pyramid
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+
+    for level in levels:
+        np.lib.format.open_memmap(os.path.join(path, level['file']), mode='w+', dtype=np.float32, shape=(n_channels, level['n_bins'], 2)).flush()
+
+    parallel.map_channels(_build_channel, data, channels_args=[(row,) for row in range(n_channels)], n_jobs=n_jobs, read=False, path=path, levels=levels, n_samples=n_samples)
+
+    manifest = {'n_channels': n_channels, 'n_samples': n_samples, 'sampling_time': sampling_time, 'levels': levels}
+    with open(os.path.join(path, PYRAMID_MANIFEST + '.tmp'), 'w') as f:
+        json.dump(manifest, f)
+    os.replace(os.path.join(path, PYRAMID_MANIFEST + '.tmp'), os.path.join(path, PYRAMID_MANIFEST))
+
+    return MinMaxPyramid(path)
+
+class MinMaxPyramid:
+    '''
+    Read a min/max pyramid built by build_pyramid. Each time window is
+    decimated by reading only the level with the coarsest bins still giving
+    the requested resolution, so that the cost does not depend on the length
+    of the window.
+
+    Parameters
+    ----------
+    path : str
+        The path of the pyramid directory.
+    '''
+    def __init__(self, path:str):
+        if not os.path.exists(os.path.join(path, PYRAMID_MANIFEST)):
+            raise ValueError("'" + path + "' does not contain a complete pyramid")
+
+        with open(os.path.join(path, PYRAMID_MANIFEST), 'r') as f:
+            manifest = json.load(f)
+
+        self.path = path
+        self.n_channels = manifest['n_channels']
+        self.n_samples = manifest['n_samples']
+        self.sampling_time = manifest['sampling_time']
+        self.factors = [level['factor'] for level in manifest['levels']]
+        self.levels = [np.load(os.path.join(path, level['file']), mmap_mode='r') for level in manifest['levels']]
+
+    def get_envelope(self, start:int = 0, stop:int = None, n_bins:int = 1000, channel:int = None):
+        '''
+        Decimate a time window of a channel to at least n_bins bins, each
+        giving a minimum and a maximum.
+
+        Parameters
+        ----------
+        start : int, default=0
+            The index of the first sample of the window.
+        stop : int, optional
+            The index following the last sample of the window. If not
+            specified, the window extends to the end of the recording.
+        n_bins : int, default=1000
+            The minimum number of bins.
+        channel : int, optional
+            The channel to read. It is required if the pyramid has multiple channels.
+
+        Returns
+        -------
+        samples_idxs : ndarray
+            The indices of the decimated samples, or None if the window is
+            too short for the finest level, and must be read from the recording.
+        values : ndarray
+            The values of the decimated samples, or None if the window is
+            too short for the finest level.
+        '''
+        if channel is None:
+            if self.n_channels > 1:
+                raise ValueError("'channel' must be specified for a pyramid with " + str(self.n_channels) + " channels")
+            channel = 0
+
+        (start, stop, _) = slice(start, stop).indices(self.n_samples)
+
+        levels_idxs = [level_idx for (level_idx, factor) in enumerate(self.factors) if (stop - start) / factor >= n_bins]
+        if len(levels_idxs) == 0:
+            return None, None
+
+        factor = self.factors[levels_idxs[-1]]
+        level = self.levels[levels_idxs[-1]]
+
+        (first_bin, last_bin) = (start // factor, min(math.ceil(stop / factor), level.shape[1]))
+        samples_idxs = (np.arange(first_bin, last_bin)[:, np.newaxis] * factor + [0, factor // 2]).ravel()
+        values = np.asarray(level[channel, first_bin:last_bin], dtype=np.float64).ravel()
+
+        return np.minimum(samples_idxs, self.n_samples - 1), values
+
+def _build_channel(data, row, path, levels, n_samples, channel = None):
+    chunk_size = max(parallel.get_config()['chunk_size'] // levels[0]['factor'], 1) * levels[0]['factor']
+
+    # The finest level is computed from the samples
+    factor = levels[0]['factor']
+    level = np.load(os.path.join(path, levels[0]['file']), mmap_mode='r+')
+    for chunk_start in range(0, n_samples, chunk_size):
+        chunk_stop = min(chunk_start + chunk_size, n_samples)
+        if utils.is_reader(data):
+            chunk = data.read(channels=channel, start=chunk_start, stop=chunk_stop)
+        else:
+            chunk = np.asarray(data[chunk_start:chunk_stop])
+
+        level[row, chunk_start // factor:math.ceil(chunk_stop / factor)] = _get_minmax(chunk, factor)
+    level.flush()
+
+    # Each following level halves the previous one, read in chunks of pairs of bins
+    chunk_size = 2 * max(chunk_size // 2, 1)
+    for (previous, current) in zip(levels[:-1], levels[1:]):
+        previous_level = np.load(os.path.join(path, previous['file']), mmap_mode='r')
+        level = np.load(os.path.join(path, current['file']), mmap_mode='r+')
+
+        for bin_start in range(0, previous['n_bins'], chunk_size):
+            bins = np.asarray(previous_level[row, bin_start:bin_start + chunk_size])
+            if bins.shape[0] % 2 == 1:
+                bins = np.concatenate([bins, bins[-1:]])
+
+            level[row, bin_start // 2:bin_start // 2 + bins.shape[0] // 2, 0] = np.minimum(bins[0::2, 0], bins[1::2, 0])
+            level[row, bin_start // 2:bin_start // 2 + bins.shape[0] // 2, 1] = np.maximum(bins[0::2, 1], bins[1::2, 1])
+        level.flush()
+
+def _get_minmax(chunk, factor):
+    # The last bin of the recording may be shorter
+    n_bins = math.ceil(chunk.size / factor)
+    chunk = np.concatenate([chunk, np.repeat(chunk[-1:], n_bins * factor - chunk.size)]).reshape(n_bins, factor)
+
+    return np.stack([np.amin(chunk, axis=1), np.amax(chunk, axis=1)], axis=1)
@@ -0,0 +1,173 @@
+import numpy as np
+
+class Reader:
+    '''
+    Base class of the recording readers. Raw samples are accessed lazily,
+    usually through a memory map, and converted to physical units as
+    (raw - offset) * gain only for the requested channels and samples.
+
+    Subclasses set the raw array, which is (n_samples x n_channels) when
+    samples are interleaved, (n_channels x n_samples) otherwise, together
+    with the per-channel gain and offset. They also save the arguments of
+    their constructor, so that pickling a reader only sends its arguments.
+    '''
+    def __init__(self, raw, interleaved:bool, gain = 1, offset = 0, sampling_time:float = None):
+        self._raw = raw
+        self.interleaved = interleaved
+        self.sampling_time = sampling_time
+
+        if interleaved:
+            (self.n_samples, self.n_channels) = raw.shape
+        else:
+            (self.n_channels, self.n_samples) = raw.shape
+
+        self.gain = np.broadcast_to(np.asarray(gain, dtype=np.float64), (self.n_channels,))
+        self.offset = np.broadcast_to(np.asarray(offset, dtype=np.float64), (self.n_channels,))
+
+    def __reduce__(self):
+        # Memory maps and files are opened again, e.g. by worker processes, instead of being copied
+        return type(self), self._init_args
+
+    @property
+    def shape(self):
+        return (self.n_channels, self.n_samples)
+
+    def __len__(self):
+        return self.n_samples
+
+    def read(self, channels = None, start:int = 0, stop:int = None, dtype = np.float64):
+        '''
+        Read a time window of a subset of channels.
+
+        Parameters
+        ----------
+        channels : int or array_like, optional
+            The channel, or the channels, to read. If not specified, all the
+            channels are read.
+        start : int, default=0
+            The index of the first sample to read.
+        stop : int, optional
+            The index following the last sample to read. If not specified, the
+            recording is read up to its end.
+        dtype : data-type, default=np.float64
+            The data type of the returned data.
+
+        Returns
+        -------
+        data : ndarray
+            A (n_channels x n_samples) matrix of data, or an array if a single
+            channel is specified.
+        '''
+        (channels_idxs, is_single) = self._get_channels_idxs(channels)
+        samples = slice(*slice(start, stop).indices(self.n_samples)[:2])
+
+        data = self._convert(self._get_raw(channels_idxs, samples), channels_idxs, dtype)
+
+        return data[0] if is_single else data
+
+    def gather(self, samples_idxs:np.ndarray, channels = None, dtype = np.float64):
+        '''
+        Read the samples at arbitrary indices, such as the windows surrounding
+        a set of events, without reading the rest of the recording.
+
+        Parameters
+        ----------
+        samples_idxs : ndarray
+            An array, of any shape, containing the indices of the samples to read.
+        channels : int or array_like, optional
+            The channel, or the channels, to read. If not specified, all the
+            channels are read.
+        dtype : data-type, default=np.float64
+            The data type of the returned data.
+
+        Returns
+        -------
+        data : ndarray
+            An array with shape (n_channels,) + samples_idxs.shape, where the
+            channels axis is dropped if a single channel is specified.
+        '''
+        (channels_idxs, is_single) = self._get_channels_idxs(channels)
+        samples_idxs = np.asarray(samples_idxs, dtype=np.int64)
+
+        # Read each sample once, in increasing order, then scatter them back
+        (unique_idxs, inverse) = np.unique(samples_idxs, return_inverse=True)
+        data = self._convert(self._get_raw(channels_idxs, unique_idxs), channels_idxs, dtype)
+        data = data[:, inverse.ravel()].reshape((channels_idxs.size,) + samples_idxs.shape)
+
+        return data[0] if is_single else data
+
+    def iter_chunks(self, chunk_size:int, halo:int = 0, channels = None, start:int = 0, stop:int = None, dtype = np.float64):
+        '''
+        Iterate over consecutive time chunks of a subset of channels. Each
+        chunk is extended by a halo on both sides, so that algorithms working
+        on a neighbourhood of each sample give the same result as on the whole
+        recording.
+
+        Parameters
+        ----------
+        chunk_size : int
+            The number of samples of each chunk, halo excluded.
+        halo : int, default=0
+            The number of samples added before and after each chunk. The halo
+            is clipped at the boundaries of the recording.
+        channels : int or array_like, optional
+            The channel, or the channels, to read. If not specified, all the
+            channels are read.
+        start : int, default=0
+            The index of the first sample of the first chunk.
+        stop : int, optional
+            The index following the last sample of the last chunk. If not
+            specified, the recording is read up to its end.
+        dtype : data-type, default=np.float64
+            The data type of the returned data.
+
+        Yields
+        ------
+        chunk_start : int
+            The index of the first sample of the chunk, halo excluded.
+        chunk_stop : int
+            The index following the last sample of the chunk, halo excluded.
+        block_start : int
+            The index of the first sample of block, i.e. of the chunk with its halo.
+        block : ndarray
+            The data of the chunk with its halo, as returned by read.
+        '''
+        (start, stop, _) = slice(start, stop).indices(self.n_samples)
+        chunk_size = max(int(chunk_size), 1)
+
+        for chunk_start in range(start, stop, chunk_size):
+            chunk_stop = min(chunk_start + chunk_size, stop)
+            block_start = max(chunk_start - halo, 0)
+            block_stop = min(chunk_stop + halo, self.n_samples)
+
+            yield chunk_start, chunk_stop, block_start, self.read(channels, block_start, block_stop, dtype)
+
+    def _get_channels_idxs(self, channels):
+        if channels is None:
+            return np.arange(self.n_channels), False
+
+        is_single = np.ndim(channels) == 0
+        channels_idxs = np.atleast_1d(np.asarray(channels, dtype=np.int64))
+
+        if np.any((channels_idxs < 0) | (channels_idxs >= self.n_channels)):
+            raise ValueError("'channels' must be in the range [0, " + str(self.n_channels) + ")")
+
+        return channels_idxs, is_single
+
+    def _get_raw(self, channels_idxs, samples):
+        # Index channels and samples at once, so that a memory map only reads the requested ones
+        if isinstance(samples, slice):
+            if self.interleaved:
+                return self._raw[samples, channels_idxs].T
+            return self._raw[channels_idxs, samples]
+
+        if self.interleaved:
+            return self._raw[np.ix_(samples, channels_idxs)].T
+        return self._raw[np.ix_(channels_idxs, samples)]
+
+    def _convert(self, raw, channels_idxs, dtype):
+        data = np.ascontiguousarray(raw, dtype=dtype)
+        data -= self.offset[channels_idxs, np.newaxis].astype(dtype)
+        data *= self.gain[channels_idxs, np.newaxis].astype(dtype)
+
+        return data
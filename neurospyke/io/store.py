@@ -0,0 +1,256 @@
+import json
+import os
+import shutil
+import numpy as np
+
+COLUMNS = ['channel', 'unit', 'time', 'amplitude', 'waveforms']
+DTYPES = {'channel': np.int32, 'unit': np.int32, 'time': np.int64, 'amplitude': np.float64}
+MANIFEST = 'manifest.json'
+
+class SpikeStore:
+    '''
+    Store detected spikes on disk, as a directory of columnar chunks: the
+    channel, the unit, the time (in samples), the amplitude and, optionally,
+    the waveform of each spike. Each append writes a new chunk, whose rows are
+    sorted by channel and time, and a manifest indexing the rows and the time
+    span of each channel in each chunk. Reading a time window of a channel
+    then only touches the corresponding rows, through memory maps.
+
+    Chunks are written in a temporary location and moved in place before the
+    manifest is atomically replaced, so that a crash during an append leaves
+    the store as it was before the append. A single writer is assumed.
+
+    Parameters
+    ----------
+    path : str
+        The path of the store directory. It is created if it does not exist.
+    sampling_time : float, optional
+        The sampling time for the recorded data, saved along with the spikes.
+        It is ignored when opening an existing store.
+    compressed : bool, default=False
+        If True, chunks are written as compressed npz files, which are smaller
+        but cannot be memory-mapped. Otherwise, each column is an npy file.
+    '''
+    def __init__(self, path:str, sampling_time:float = None, compressed:bool = False):
+        self.path = path
+        self.compressed = compressed
+
+        if os.path.exists(os.path.join(path, MANIFEST)):
+            with open(os.path.join(path, MANIFEST), 'r') as f:
+                self._manifest = json.load(f)
+        else:
+            os.makedirs(path, exist_ok=True)
+            self._manifest = {'sampling_time': sampling_time, 'chunks': []}
+            self._write_manifest()
+
+    @property
+    def sampling_time(self):
+        return self._manifest['sampling_time']
+
+    @property
+    def n_spikes(self):
+        return sum([chunk['n_spikes'] for chunk in self._manifest['chunks']])
+
+    @property
+    def channels(self):
+        return sorted(set([int(channel) for chunk in self._manifest['chunks'] for channel in chunk['channels']]))
+
+    def append(self, times:np.ndarray, channels = 0, amplitudes:np.ndarray = None, units = -1, waveforms:np.ndarray = None):
+        '''
+        Append a set of spikes, such as the output of a detector, as a new chunk.
+
+        Parameters
+        ----------
+        times : ndarray
+            An array containing the indices at which spikes occur. It can also
+            be expressed as a spike train.
+        channels : int or ndarray, default=0
+            The channel of all the spikes, or of each spike.
+        amplitudes : ndarray, optional
+            The amplitude of each spike. If not specified, it is set to NaN.
+        units : int or ndarray, default=-1
+            The unit of all the spikes, or of each spike. -1 means unsorted.
+        waveforms : ndarray, optional
+            A (n_spikes x n_window_samples) matrix containing the waveform of
+            each spike, as returned by get_waveforms.
+        '''
+        times = np.asarray(times).squeeze()
+        if times.dtype == 'bool':
+            times = np.flatnonzero(times)
+        times = np.atleast_1d(times).astype(np.int64)
+        n_spikes = times.size
+
+        columns = {
+            'channel': np.broadcast_to(np.asarray(channels, dtype=np.int32), (n_spikes,)),
+            'unit': np.broadcast_to(np.asarray(units, dtype=np.int32), (n_spikes,)),
+            'time': times,
+            'amplitude': np.broadcast_to(np.asarray(amplitudes if amplitudes is not None else np.nan, dtype=np.float64), (n_spikes,))
+        }
+        if waveforms is not None:
+            waveforms = np.asarray(waveforms)
+            if waveforms.shape[0] != n_spikes:
+                raise ValueError("'waveforms' expected to have " + str(n_spikes) + " rows, received " + str(waveforms.shape[0]))
+            columns['waveforms'] = waveforms
+
+        # Rows sorted by channel and time, so that each channel is a contiguous range of rows
+        order = np.lexsort((columns['time'], columns['channel']))
+        columns = {key: np.ascontiguousarray(column[order]) for key, column in columns.items()}
+
+        channels_idxs, channels_start = np.unique(columns['channel'], return_index=True)
+        channels_stop = np.append(channels_start[1:], n_spikes)
+        index = {}
+        for channel, start, stop in zip(channels_idxs, channels_start, channels_stop):
+            index[str(channel)] = [int(start), int(stop), int(columns['time'][start]), int(columns['time'][stop - 1])]
+
+        name = 'chunk_' + str(len(self._manifest['chunks'])).zfill(6) + ('.npz' if self.compressed else '')
+        self._write_chunk(name, columns)
+
+        self._manifest['chunks'].append({'name': name, 'n_spikes': int(n_spikes), 'compressed': self.compressed, 'has_waveforms': waveforms is not None, 'channels': index})
+        self._write_manifest()
+
+    def read(self, channels = None, start:int = None, stop:int = None, columns:list = None):
+        '''
+        Read the spikes of a subset of channels within a time window.
+
+        Parameters
+        ----------
+        channels : int or array_like, optional
+            The channel, or the channels, to read. If not specified, all the
+            channels are read.
+        start : int, optional
+            The first sample of the time window.
+        stop : int, optional
+            The sample following the time window.
+        columns : list of str, optional
+            The columns to read, among 'channel', 'unit', 'time', 'amplitude'
+            and 'waveforms'. If not specified, all the columns but the
+            waveforms are read.
+
+        Returns
+        -------
+        spikes : dict of ndarray
+            The requested columns, with rows sorted by channel and time.
+        '''
+        if columns is None:
+            columns = COLUMNS[:-1]
+        for column in columns:
+            if column not in COLUMNS:
+                raise ValueError("'" + str(column) + "' is not a valid column, expected one of " + str(COLUMNS))
+
+        channels = self.channels if channels is None else [int(channel) for channel in np.atleast_1d(channels)]
+        start = np.iinfo(np.int64).min if start is None else int(start)
+        stop = np.iinfo(np.int64).max if stop is None else int(stop)
+
+        read_columns = sorted(set(columns) | {'channel', 'time'}, key=COLUMNS.index)
+        out = {column: [] for column in read_columns}
+
+        for chunk in self._manifest['chunks']:
+            # Skip the channels, and the chunks, whose time span does not overlap the window
+            ranges = [chunk['channels'][str(channel)] for channel in channels if str(channel) in chunk['channels']]
+            ranges = [(first, last) for first, last, t_min, t_max in ranges if t_max >= start and t_min < stop]
+            if len(ranges) == 0:
+                continue
+
+            if 'waveforms' in read_columns and not chunk['has_waveforms']:
+                raise ValueError("'" + chunk['name'] + "' does not contain waveforms")
+
+            data = self._load_chunk(chunk, read_columns)
+            for first, last in ranges:
+                times = data['time'][first:last]
+                (lo, hi) = np.searchsorted(times, [start, stop], side='left')
+                for column in read_columns:
+                    out[column].append(np.asarray(data[column][first + lo:first + hi]))
+
+        for column in read_columns:
+            if len(out[column]) == 0:
+                shape = (0,) if column != 'waveforms' else (0, 0)
+                out[column] = np.zeros(shape, dtype=DTYPES.get(column, np.float64))
+            else:
+                out[column] = np.concatenate(out[column], axis=0)
+
+        # Chunks may interleave in time, so merge them by channel and time
+        order = np.lexsort((out['time'], out['channel']))
+
+        return {column: out[column][order] for column in columns}
+
+    def spikes(self, channels = None, start:int = None, stop:int = None, unit:int = None):
+        '''
+        Read the spike times of a subset of channels within a time window, in
+        the format expected by the analysis functions.
+
+        Parameters
+        ----------
+        channels : int or array_like, optional
+            The channel, or the channels, to read. If not specified, all the
+            channels are read.
+        start : int, optional
+            The first sample of the time window.
+        stop : int, optional
+            The sample following the time window.
+        unit : int, optional
+            If specified, only the spikes of this unit are read.
+
+        Returns
+        -------
+        spikes : ndarray or list of ndarray
+            The indices at which spikes occur, for each channel, or a single
+            array if a single channel is specified.
+        '''
+        is_single = channels is not None and np.ndim(channels) == 0
+        channels = self.channels if channels is None else [int(channel) for channel in np.atleast_1d(channels)]
+
+        out = self.read(channels, start, stop, columns=['channel', 'unit', 'time'])
+        if unit is not None:
+            out = {column: values[out['unit'] == unit] for column, values in out.items()}
+
+        # Rows are sorted by channel, so each channel is a contiguous range of rows
+        firsts = np.searchsorted(out['channel'], channels, side='left')
+        lasts = np.searchsorted(out['channel'], channels, side='right')
+        spikes = [out['time'][first:last] for first, last in zip(firsts, lasts)]
+
+        return spikes[0] if is_single else spikes
+
+    def _write_chunk(self, name, columns):
+        final_path = os.path.join(self.path, name)
+        temp_path = os.path.join(self.path, '.' + name + '.tmp')
+
+        # Leftovers of an interrupted append are not referenced by the manifest
+        for path in [final_path, temp_path]:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+
+        if self.compressed:
+            with open(temp_path, 'wb') as f:
+                np.savez_compressed(f, **columns)
+                f.flush()
+                os.fsync(f.fileno())
+        else:
+            os.makedirs(temp_path)
+            for column, values in columns.items():
+                with open(os.path.join(temp_path, column + '.npy'), 'wb') as f:
+                    np.save(f, values)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+        os.replace(temp_path, final_path)
+
+    def _load_chunk(self, chunk, columns):
+        path = os.path.join(self.path, chunk['name'])
+
+        if chunk['compressed']:
+            with np.load(path) as f:
+                return {column: f[column] for column in columns}
+
+        return {column: np.load(os.path.join(path, column + '.npy'), mmap_mode='r') for column in columns}
+
+    def _write_manifest(self):
+        temp_path = os.path.join(self.path, '.' + MANIFEST + '.tmp')
+
+        with open(temp_path, 'w') as f:
+            json.dump(self._manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temp_path, os.path.join(self.path, MANIFEST))
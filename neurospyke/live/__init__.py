@@ -0,0 +1,9 @@
+from .frames import encode_frame, read_frame, serve_recording
+from .pipeline import LivePipeline
+
+__all__ = [
+        'encode_frame',
+        'LivePipeline',
+        'read_frame',
+        'serve_recording'
+    ]
@@ -0,0 +1,122 @@
+import asyncio
+import struct
+import numpy as np
+
+from .. import utils
+
+# Magic, index of the first sample, number of samples and number of channels
+FRAME_HEADER = struct.Struct('<4sQII')
+FRAME_MAGIC = b'NSPK'
+
+def encode_frame(samples:np.ndarray, first_sample:int, dtype = np.int16):
+    '''
+    Encode a block of samples as a frame, made of a header followed by the
+    samples of all the channels, interleaved.
+
+    Parameters
+    ----------
+    samples : ndarray
+        A (n_channels x n_samples) matrix of raw samples.
+    first_sample : int
+        The index of the first sample of the block in the recording.
+    dtype : data-type, default=np.int16
+        The data type of the samples in the frame.
+
+    Returns
+    -------
+    frame : bytes
+        The encoded frame.
+    '''
+    samples = np.atleast_2d(samples)
+    payload = np.ascontiguousarray(samples.T, dtype=np.dtype(dtype).newbyteorder('<')).tobytes()
+
+    return FRAME_HEADER.pack(FRAME_MAGIC, int(first_sample), samples.shape[1], samples.shape[0]) + payload
+
+async def read_frame(reader:asyncio.StreamReader, dtype = np.int16):
+    '''
+    Read a frame from a stream.
+
+    Parameters
+    ----------
+    reader : asyncio.StreamReader
+        The stream, e.g. a TCP connection or a pipe.
+    dtype : data-type, default=np.int16
+        The data type of the samples in the frame.
+
+    Returns
+    -------
+    first_sample : int
+        The index of the first sample of the frame in the recording, or None
+        if the stream ended.
+    samples : ndarray
+        A (n_channels x n_samples) matrix of raw samples, or None if the
+        stream ended.
+    '''
+    try:
+        header = await reader.readexactly(FRAME_HEADER.size)
+    except asyncio.IncompleteReadError as error:
+        if len(error.partial) == 0:
+            return None, None
+        raise
+
+    (magic, first_sample, n_samples, n_channels) = FRAME_HEADER.unpack(header)
+    if magic != FRAME_MAGIC:
+        raise ValueError("invalid frame, expected magic " + str(FRAME_MAGIC) + ", received " + str(magic))
+
+    dtype = np.dtype(dtype).newbyteorder('<')
+    payload = await reader.readexactly(n_samples * n_channels * dtype.itemsize)
+    samples = np.frombuffer(payload, dtype=dtype).reshape(n_samples, n_channels).T
+
+    return first_sample, samples
+
+async def serve_recording(data, host:str = '127.0.0.1', port:int = 0, frame_length:int = 256, sampling_time:float = None, dtype = np.int16):
+    '''
+    Stream a recording as frames to each client connecting to a TCP server,
+    as a stand-in for an acquisition system.
+
+    Parameters
+    ----------
+    data : ndarray or Reader
+        A (n_channels x n_samples) matrix of raw samples, or a reader.
+    host : str, default='127.0.0.1'
+        The address to listen on.
+    port : int, default=0
+        The port to listen on. 0 means any free port.
+    frame_length : int, default=256
+        The number of samples of each frame.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, frames are
+        sent in real time. Otherwise, they are sent as fast as clients read them.
+    dtype : data-type, default=np.int16
+        The data type of the samples in the frames.
+
+    Returns
+    -------
+    server : asyncio.Server
+        The server, whose address is given by server.sockets[0].getsockname().
+    '''
+    n_samples = data.n_samples if utils.is_reader(data) else np.shape(data)[-1]
+
+    async def stream(reader, writer):
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+
+        try:
+            for first_sample in range(0, n_samples, frame_length):
+                if utils.is_reader(data):
+                    samples = data.read(start=first_sample, stop=first_sample + frame_length)
+                else:
+                    samples = np.atleast_2d(data)[:, first_sample:first_sample + frame_length]
+
+                if sampling_time is not None:
+                    await asyncio.sleep(max(start_time + first_sample * sampling_time - loop.time(), 0))
+
+                writer.write(encode_frame(samples, first_sample, dtype))
+                # Wait for the client to read, as an acquisition system would fill its buffers
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(stream, host, port)
@@ -0,0 +1,322 @@
+import asyncio
+import collections
+import time
+import numpy as np
+
+from .. import parallel
+from ..spikes.detection.multichannel import DETECTORS
+from .frames import read_frame
+
+# Number of most recent spikes whose latency is kept
+LATENCY_HISTORY = 10000
+
+_NO_FRAME = object()
+
+class LivePipeline:
+    '''
+    Detect spikes on a live stream of sample frames, such as the one of an
+    acquisition system. Frames are read from the stream, coalesced into
+    batches and fanned out to a detector per channel, running in an executor
+    so that the event loop keeps reading. Each batch is extended by the last
+    samples of the previous one, and spikes are only emitted once they are
+    at least halo samples from the end of the data received, so that
+    detectors always see the context surrounding each spike.
+
+    The stages are connected by bounded queues: when detection or a
+    subscriber falls behind, the queues fill up and reading from the stream
+    is suspended, leaving the backpressure to the sender.
+
+    Parameters
+    ----------
+    n_channels : int
+        The number of channels in the frames.
+    sampling_time : float
+        The sampling time for the recorded data. It is passed to the
+        detector as well, so that its parameters are expressed in seconds.
+    method : str or callable
+        The detection algorithm, either the name of one of the detectors of
+        neurospyke or a function defined at module level with the same signature.
+    *args
+        The positional parameters of the detector, e.g. threshold and
+        refractory_period for hard_threshold.
+    dtype : data-type, default=np.int16
+        The data type of the samples in the frames.
+    gain : float or array_like, default=1
+        The factor converting raw samples to physical units, either shared
+        by all the channels or specified for each channel.
+    offset : float or array_like, default=0
+        The raw value corresponding to zero, either shared by all the
+        channels or specified for each channel.
+    batch_length : int, default=4096
+        The number of samples after which a batch is processed.
+    max_delay : float, default=0.05
+        The maximum time, in seconds, waited for frames to fill a batch.
+    halo : int, default=1024
+        The number of samples of context required on each side of a spike.
+    queue_size : int, default=64
+        The maximum number of items held by the queues between stages and by
+        the queue of each subscriber.
+    n_jobs : int, optional
+        The number of processes detecting the channels of a batch. With a
+        single job, detection runs in a thread of the event loop.
+    **kwargs
+        The optional parameters of the detector.
+    '''
+    def __init__(self, n_channels:int, sampling_time:float, method, *args, dtype = np.int16, gain = 1, offset = 0, batch_length:int = 4096, max_delay:float = 0.05, halo:int = 1024, queue_size:int = 64, n_jobs:int = None, **kwargs):
+        if isinstance(method, str):
+            if method not in DETECTORS:
+                raise ValueError("'method' expected to be one of " + ", ".join(["'" + name + "'" for name in DETECTORS]) + ", received '" + method + "'")
+            method = DETECTORS[method]
+
+        self.n_channels = n_channels
+        self.sampling_time = sampling_time
+        self.method = method
+        self.args = args
+        self.kwargs = dict(kwargs, sampling_time=sampling_time)
+        self.dtype = dtype
+        self.gain = np.reshape(np.asarray(gain, dtype=np.float64), (-1, 1))
+        self.offset = np.reshape(np.asarray(offset, dtype=np.float64), (-1, 1))
+        self.batch_length = batch_length
+        self.max_delay = max_delay
+        self.halo = halo
+        self.queue_size = queue_size
+        self.n_jobs = n_jobs
+
+        self._subscribers = []
+        self._latencies = collections.deque(maxlen=LATENCY_HISTORY)
+        self._n_samples = 0
+        self._sums = np.zeros(n_channels)
+        self._squares_sums = np.zeros(n_channels)
+        self._spikes_counts = np.zeros(n_channels, dtype=np.int64)
+
+    def subscribe(self, maxsize:int = None):
+        '''
+        Get a queue receiving an event for each processed batch, and None
+        when the stream ends. Each event is a dict containing the range of
+        samples covered ('start' and 'stop'), the indices and values of the
+        spikes detected on each channel ('spikes_idxs' and 'spikes_values'),
+        the latency of each of these spikes ('latencies') and the running
+        statistics ('stats', see get_stats).
+
+        Parameters
+        ----------
+        maxsize : int, optional
+            The maximum number of events held by the queue. If not specified,
+            queue_size is employed.
+
+        Returns
+        -------
+        queue : asyncio.Queue
+            The queue of events.
+        '''
+        queue = asyncio.Queue(self.queue_size if maxsize is None else maxsize)
+        self._subscribers.append(queue)
+
+        return queue
+
+    async def run(self, reader:asyncio.StreamReader):
+        '''
+        Process a stream of frames until it ends.
+
+        Parameters
+        ----------
+        reader : asyncio.StreamReader
+            The stream, e.g. a TCP connection or a pipe.
+        '''
+        frames = asyncio.Queue(self.queue_size)
+        batches = asyncio.Queue(self.queue_size)
+
+        tasks = [
+            asyncio.create_task(self._ingest(reader, frames)),
+            asyncio.create_task(self._coalesce(frames, batches)),
+            asyncio.create_task(self._detect(batches))
+        ]
+
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def run_tcp(self, host:str, port:int):
+        '''
+        Connect to a TCP server streaming frames and process them until the
+        connection is closed.
+
+        Parameters
+        ----------
+        host : str
+            The address of the server.
+        port : int
+            The port of the server.
+        '''
+        (reader, writer) = await asyncio.open_connection(host, port)
+
+        try:
+            await self.run(reader)
+        finally:
+            writer.close()
+
+    def get_stats(self):
+        '''
+        Get the running statistics of the samples processed so far, i.e. the
+        number of samples, the number of spikes and the firing rate of each
+        channel, and the mean and standard deviation of each channel.
+        '''
+        n_samples = max(self._n_samples, 1)
+        means = self._sums / n_samples
+        duration = self._n_samples * self.sampling_time
+
+        return {
+            'n_samples': self._n_samples,
+            'spikes_counts': self._spikes_counts.copy(),
+            'firing_rates': self._spikes_counts / duration if duration > 0 else np.zeros(self.n_channels),
+            'means': means,
+            'stds': np.sqrt(np.maximum(self._squares_sums / n_samples - np.square(means), 0))
+        }
+
+    def get_latency_stats(self):
+        '''
+        Get statistics of the latency, in seconds, from the arrival of the
+        frame containing a spike to the emission of the spike, over the most
+        recent spikes.
+        '''
+        latencies = np.array(self._latencies)
+
+        if latencies.size == 0:
+            return {'count': 0, 'mean': None, 'median': None, 'p95': None, 'p99': None, 'max': None}
+
+        return {
+            'count': latencies.size,
+            'mean': float(np.mean(latencies)),
+            'median': float(np.median(latencies)),
+            'p95': float(np.percentile(latencies, 95)),
+            'p99': float(np.percentile(latencies, 99)),
+            'max': float(np.max(latencies))
+        }
+
+    async def _ingest(self, reader, frames):
+        while True:
+            (first_sample, samples) = await read_frame(reader, self.dtype)
+            if first_sample is None:
+                await frames.put(None)
+                return
+
+            await frames.put((first_sample, samples, time.perf_counter()))
+
+    async def _coalesce(self, frames, batches):
+        loop = asyncio.get_running_loop()
+        frame = await frames.get()
+
+        while frame is not None:
+            batch = [frame]
+            batch_length = frame[1].shape[1]
+            deadline = loop.time() + self.max_delay
+
+            # Gather contiguous frames until the batch is full or the delay expires
+            frame = _NO_FRAME
+            while batch_length < self.batch_length:
+                if not frames.empty():
+                    next_frame = frames.get_nowait()
+                else:
+                    try:
+                        next_frame = await asyncio.wait_for(frames.get(), deadline - loop.time())
+                    except asyncio.TimeoutError:
+                        break
+
+                if next_frame is None or next_frame[0] != batch[-1][0] + batch[-1][1].shape[1]:
+                    frame = next_frame
+                    break
+                batch.append(next_frame)
+                batch_length += next_frame[1].shape[1]
+
+            await batches.put(batch)
+
+            if frame is _NO_FRAME:
+                frame = await frames.get()
+
+        await batches.put(None)
+
+    async def _detect(self, batches):
+        loop = asyncio.get_running_loop()
+        executor = parallel.get_executor(self.n_jobs) if parallel.get_n_jobs(self.n_jobs) > 1 else None
+
+        buffer = np.zeros((self.n_channels, 0))
+        buffer_start = 0
+        emitted_until = 0
+        frames_starts = np.zeros(0, dtype=np.int64)
+        arrivals = np.zeros(0)
+
+        while True:
+            batch = await batches.get()
+
+            if batch is None:
+                # No more context will arrive, so the remaining spikes are emitted
+                stop = buffer_start + buffer.shape[1]
+            else:
+                first_sample = batch[0][0]
+                data = (np.concatenate([frame[1] for frame in batch], axis=1) - self.offset) * self.gain
+
+                # After a gap in the stream, the context of the previous samples is lost
+                if first_sample != buffer_start + buffer.shape[1]:
+                    buffer = np.zeros((self.n_channels, 0))
+                    buffer_start = first_sample
+                    emitted_until = first_sample
+
+                context_start = max(emitted_until - self.halo, buffer_start)
+                buffer = np.concatenate([buffer[:, context_start - buffer_start:], data], axis=1)
+                buffer_start = context_start
+
+                frames_starts = np.concatenate([frames_starts, [frame[0] for frame in batch]])
+                arrivals = np.concatenate([arrivals, [frame[2] for frame in batch]])
+                first_frame = max(np.searchsorted(frames_starts, buffer_start, side='right') - 1, 0)
+                frames_starts = frames_starts[first_frame:]
+                arrivals = arrivals[first_frame:]
+
+                stop = buffer_start + buffer.shape[1] - self.halo
+
+            if stop > emitted_until:
+                out = await asyncio.gather(*[loop.run_in_executor(executor, _detect_channel, self.method, buffer[channel], self.args, self.kwargs) for channel in range(self.n_channels)])
+                await self._emit(out, buffer, buffer_start, emitted_until, stop, frames_starts, arrivals)
+                emitted_until = stop
+
+            if batch is None:
+                for subscriber in self._subscribers:
+                    await subscriber.put(None)
+                return
+
+    async def _emit(self, out, buffer, buffer_start, start, stop, frames_starts, arrivals):
+        spikes_idxs = []
+        spikes_values = []
+        for (channel_idxs, channel_values) in out:
+            channel_idxs = np.asarray(channel_idxs, dtype=np.int64) + buffer_start
+            is_new = (channel_idxs >= start) & (channel_idxs < stop)
+            spikes_idxs.append(channel_idxs[is_new])
+            spikes_values.append(np.asarray(channel_values)[is_new])
+
+        new_data = buffer[:, start - buffer_start:stop - buffer_start]
+        self._n_samples += new_data.shape[1]
+        self._sums += np.sum(new_data, axis=1)
+        self._squares_sums += np.sum(np.square(new_data), axis=1)
+        self._spikes_counts += [channel_idxs.size for channel_idxs in spikes_idxs]
+
+        # Latency from the arrival of the frame containing each spike
+        now = time.perf_counter()
+        latencies = [now - arrivals[np.searchsorted(frames_starts, channel_idxs, side='right') - 1] for channel_idxs in spikes_idxs]
+        for channel_latencies in latencies:
+            self._latencies.extend(channel_latencies)
+
+        event = {
+            'start': start,
+            'stop': stop,
+            'spikes_idxs': spikes_idxs,
+            'spikes_values': spikes_values,
+            'latencies': latencies,
+            'stats': self.get_stats()
+        }
+
+        for subscriber in self._subscribers:
+            await subscriber.put(event)
+
+def _detect_channel(method, data, args, kwargs):
+    return method(data, *args, **kwargs)
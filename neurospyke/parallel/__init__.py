@@ -0,0 +1,17 @@
+from .config import config, get_config, get_n_jobs
+from .pool import get_executor, map_channels, map_tasks, shutdown
+from .shared import is_mapped, MappedArray, SharedArray, SharedArrays
+
+__all__ = [
+        'config',
+        'get_config',
+        'get_executor',
+        'get_n_jobs',
+        'is_mapped',
+        'map_channels',
+        'map_tasks',
+        'MappedArray',
+        'SharedArray',
+        'SharedArrays',
+        'shutdown'
+    ]
\ No newline at end of file
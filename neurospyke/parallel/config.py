@@ -0,0 +1,72 @@
+import contextlib
+import os
+
+try:
+    from threadpoolctl import threadpool_limits
+except ImportError:
+    threadpool_limits = None
+
+DEFAULT_CONFIG = {'n_jobs': 1, 'chunk_size': 2**20, 'blas_threads': None}
+
+_configs = [dict(DEFAULT_CONFIG)]
+
+def get_config():
+    '''
+    Get the current parallel execution settings, i.e. the default number of
+    jobs, the default chunk size and the BLAS threads limit.
+    '''
+    return dict(_configs[-1])
+
+@contextlib.contextmanager
+def config(n_jobs:int = None, chunk_size:int = None, blas_threads:int = None):
+    '''
+    Set the parallel execution settings within a with statement.
+
+    Parameters
+    ----------
+    n_jobs : int, optional
+        The number of processes employed by the functions whose n_jobs is
+        not specified. Negative values count back from the number of CPUs,
+        i.e. -1 means all of them.
+    chunk_size : int, optional
+        The number of samples processed at once by chunked algorithms.
+    blas_threads : int, optional
+        The maximum number of threads of the BLAS libraries, both in this
+        process and in the workers, preventing oversubscription when many
+        processes run linear algebra at once. It requires threadpoolctl.
+    '''
+    settings = get_config()
+    for key, value in [('n_jobs', n_jobs), ('chunk_size', chunk_size), ('blas_threads', blas_threads)]:
+        if value is not None:
+            settings[key] = value
+
+    _configs.append(settings)
+    limits = _limit_blas_threads(settings['blas_threads'])
+
+    try:
+        yield settings
+    finally:
+        if limits is not None:
+            limits.restore_original_limits()
+        _configs.pop()
+
+def get_n_jobs(n_jobs:int = None):
+    '''
+    Get the actual number of processes, given n_jobs or the current settings.
+    '''
+    if n_jobs is None:
+        n_jobs = get_config()['n_jobs']
+
+    if n_jobs < 0:
+        n_jobs = max(os.cpu_count() + 1 + n_jobs, 1)
+
+    return max(n_jobs, 1)
+
+def _limit_blas_threads(blas_threads):
+    if blas_threads is None:
+        return None
+
+    if threadpool_limits is None:
+        raise ImportError("Limiting the BLAS threads requires 'threadpoolctl', which can be installed with 'pip install threadpoolctl'")
+
+    return threadpool_limits(limits=blas_threads, user_api='blas')
@@ -0,0 +1,182 @@
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+
+from .. import utils
+from .config import get_config, get_n_jobs, _limit_blas_threads
+from .shared import is_mapped, MappedArray, SharedArray, _release_attached, _release_inherited
+
+# The seconds a worker waits for the others to release their shared memory
+RELEASE_TIMEOUT = 60
+
+_executor = None
+_executor_settings = None
+
+def get_executor(n_jobs:int = None):
+    '''
+    Get the persistent pool of worker processes, which is created on first
+    use and recreated only when the number of jobs or the BLAS threads
+    limit change.
+    '''
+    global _executor, _executor_settings
+
+    settings = (get_n_jobs(n_jobs), get_config()['blas_threads'])
+    if _executor is None or settings != _executor_settings:
+        shutdown()
+        context = multiprocessing.get_context()
+        _executor = ProcessPoolExecutor(max_workers=settings[0], mp_context=context, initializer=_init_worker, initargs=(settings[1], context.Barrier(settings[0])))
+        _executor_settings = settings
+
+    return _executor
+
+def shutdown():
+    '''
+    Stop the persistent pool of worker processes.
+    '''
+    global _executor, _executor_settings
+
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+    _executor = None
+    _executor_settings = None
+
+atexit.register(shutdown)
+
+def map_tasks(func, shared, tasks:list, n_jobs:int = None, **kwargs):
+    '''
+    Run func(shared, task, **kwargs) for each task, in the persistent pool of
+    worker processes. Shared data, such as a SharedArray or a recording
+    reader, are sent once per batch of tasks and not copied. The shared
+    memory attached by the workers is released when all the tasks are done.
+
+    Parameters
+    ----------
+    func : callable
+        A function defined at module level.
+    shared : object
+        The data shared by all the tasks.
+    tasks : list
+        The description of each task, e.g. a channel or a block of pairs.
+    n_jobs : int, optional
+        The number of processes. If not specified, the current settings
+        are employed. With a single job, tasks run in this process.
+
+    Returns
+    -------
+    out : list
+        The result of each task.
+    '''
+    n_jobs = get_n_jobs(n_jobs)
+
+    if n_jobs == 1 or len(tasks) <= 1:
+        return [func(shared, task, **kwargs) for task in tasks]
+
+    executor = get_executor(n_jobs)
+    n_tasks = len(tasks)
+    chunksize = max(n_tasks // (4 * n_jobs), 1)
+
+    try:
+        return list(executor.map(_run_task, [func] * n_tasks, [shared] * n_tasks, tasks, [kwargs] * n_tasks, chunksize=chunksize))
+    except BrokenProcessPool:
+        shutdown()
+        raise
+    finally:
+        _release_workers()
+
+def map_channels(func, data, channels = None, args:tuple = (), channels_args:list = None, n_jobs:int = None, read:bool = True, **kwargs):
+    '''
+    Run func on each channel of a recording, in the persistent pool of worker
+    processes. In-memory recordings are placed in shared memory once, while
+    memory-mapped recordings are mapped again, and recording readers are
+    opened again, by each worker.
+
+    Parameters
+    ----------
+    func : callable
+        A function defined at module level, called as func(channel_data,
+        *channel_args, *args, **kwargs).
+    data : ndarray or Reader
+        A (n_channels x n_samples) matrix of recorded data, or a reader.
+    channels : array_like, optional
+        The channels to process. If not specified, all the channels are processed.
+    args : tuple, default=()
+        Additional positional arguments of func, shared by all the channels.
+    channels_args : list of tuple, optional
+        Additional positional arguments of func, specific to each channel.
+    n_jobs : int, optional
+        The number of processes. If not specified, the current settings
+        are employed.
+    read : bool, default=True
+        If False, readers are passed to func as they are, along with
+        channel=channel, so that func reads only the samples it needs.
+
+    Returns
+    -------
+    out : list
+        The result for each channel.
+    '''
+    n_channels = data.n_channels if utils.is_reader(data) else data.shape[0]
+    channels = list(range(n_channels)) if channels is None else [int(channel) for channel in channels]
+    channels_args = [()] * len(channels) if channels_args is None else [tuple(channel_args) for channel_args in channels_args]
+    channels_args = [channel_args + tuple(args) for channel_args in channels_args]
+    tasks = list(zip(channels, channels_args))
+
+    if utils.is_reader(data) or get_n_jobs(n_jobs) == 1 or len(tasks) <= 1:
+        return map_tasks(_run_channel, data, tasks, n_jobs, channel_func=func, read=read, kwargs=kwargs)
+
+    # Memory maps are mapped again by each worker, as recordings may not fit in memory
+    with (MappedArray(data) if is_mapped(data) else SharedArray(data)) as shared:
+        return map_tasks(_run_channel, shared, tasks, n_jobs, channel_func=func, read=read, kwargs=kwargs)
+
+def _release_workers():
+    if _executor is None:
+        return
+
+    # Each worker runs exactly one release, as it waits for all the others before returning
+    futures = [_executor.submit(_release_worker) for _ in range(_executor_settings[0])]
+    try:
+        is_released = all([future.result() for future in futures])
+    except BrokenProcessPool:
+        is_released = False
+
+    # Workers which could not be reached may still hold shared memory, so they are stopped
+    if not is_released:
+        shutdown()
+
+def _release_worker():
+    _release_attached()
+
+    try:
+        _worker_barrier.wait(timeout=RELEASE_TIMEOUT)
+    except threading.BrokenBarrierError:
+        return False
+
+    return True
+
+def _run_task(func, shared, task, kwargs):
+    return func(shared, task, **kwargs)
+
+def _run_channel(data, task, channel_func, read, kwargs):
+    (channel, channel_args) = task
+
+    if utils.is_reader(data):
+        if not read:
+            return channel_func(data, *channel_args, channel=channel, **kwargs)
+        return channel_func(data.read(channels=channel), *channel_args, **kwargs)
+
+    return channel_func(np.asarray(data[channel]), *channel_args, **kwargs)
+
+def _init_worker(blas_threads, barrier):
+    global _worker_limits, _worker_barrier
+
+    _worker_barrier = barrier
+    _release_inherited()
+
+    # Forked workers inherit the caches active in the parent, but results are only stored by the parent
+    utils.cache._active_caches.clear()
+
+    # Keep a reference, the limits hold as long as the worker lives
+    _worker_limits = _limit_blas_threads(blas_threads)
@@ -0,0 +1,251 @@
+import collections
+import sys
+import weakref
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+
+# Blocks attached by a worker, reused by its following tasks of the same call and released at its end
+MAX_ATTACHED = 8
+_attached = collections.OrderedDict()
+
+# Blocks created by this process, which forked workers inherit
+_created = weakref.WeakSet()
+
+class SharedArray:
+    '''
+    An array placed once in shared memory, so that tasks running in other
+    processes access it without copying, and may also write their results
+    to it. Pickling a SharedArray only sends the name, shape and data type
+    of the shared memory block, which is attached again on unpickling.
+
+    Parameters
+    ----------
+    array : ndarray
+        The array to copy in shared memory.
+    '''
+    def __init__(self, array:np.ndarray):
+        array = np.asarray(array)
+
+        self._shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self._is_owner = True
+        self.shape = array.shape
+        self.dtype = array.dtype
+        self.array = np.ndarray(self.shape, dtype=self.dtype, buffer=self._shm.buf)
+        self.array[...] = array
+        _created.add(self)
+
+    @classmethod
+    def zeros(cls, shape, dtype = np.float64):
+        '''
+        Create a SharedArray filled with zeros, e.g. to be filled by parts,
+        without allocating the array in the memory of the process first.
+
+        Parameters
+        ----------
+        shape : int or tuple of int
+            The shape of the array.
+        dtype : data-type, default=np.float64
+            The data type of the array.
+
+        Returns
+        -------
+        shared : SharedArray
+            The shared array.
+        '''
+        shared = cls.__new__(cls)
+        shared.shape = tuple([int(size) for size in np.atleast_1d(shape)])
+        shared.dtype = np.dtype(dtype)
+
+        # New shared memory blocks are zero-filled
+        shared._shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shared.shape)) * shared.dtype.itemsize, 1))
+        shared._is_owner = True
+        shared.array = np.ndarray(shared.shape, dtype=shared.dtype, buffer=shared._shm.buf)
+        _created.add(shared)
+
+        return shared
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        self.unlink()
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        return self.array[key]
+
+    def __setitem__(self, key, value):
+        self.array[key] = value
+
+    def __reduce__(self):
+        return _attach_shared_array, (self.name, self.shape, self.dtype.str)
+
+    def close(self):
+        '''
+        Release the access to the shared memory of this process.
+        '''
+        self.array = None
+
+        # Views of the array may still be referenced, e.g. by a result
+        try:
+            self._shm.close()
+        except BufferError:
+            pass
+
+    def unlink(self):
+        '''
+        Free the shared memory. Only the process which created it may do so.
+        '''
+        if self._is_owner:
+            self._shm.unlink()
+            self._is_owner = False
+
+class SharedArrays:
+    '''
+    A list of 1-D arrays, such as the spike trains of multiple channels,
+    concatenated in a single SharedArray.
+
+    Parameters
+    ----------
+    arrays : list of ndarray
+        The arrays to copy in shared memory. They are converted to a common
+        data type.
+    '''
+    def __init__(self, arrays:list):
+        arrays = [np.ravel(array) for array in arrays]
+        bounds = np.cumsum([0] + [array.size for array in arrays])
+
+        self.values = SharedArray(np.concatenate(arrays) if len(arrays) > 0 else np.zeros(0))
+        self.bounds = bounds
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        self.unlink()
+
+    def __len__(self):
+        return self.bounds.size - 1
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self[idx] for idx in range(len(self))[key]]
+
+        return self.values.array[self.bounds[key]:self.bounds[key + 1]]
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def close(self):
+        self.values.close()
+
+    def unlink(self):
+        self.values.unlink()
+
+class MappedArray:
+    '''
+    A memory-mapped array, or a view of it, passed to tasks running in other
+    processes by its file, which each process maps again, instead of being
+    copied in shared memory. Pickling a MappedArray only sends the filename,
+    the byte offset, the shape, the strides and the data type of the view.
+
+    Parameters
+    ----------
+    array : np.memmap
+        The memory-mapped array, or a view of it, e.g. a channel.
+    '''
+    def __init__(self, array:np.memmap):
+        if not is_mapped(array):
+            raise ValueError("'array' expected to be a view of a memory map backed by a file")
+
+        # The first element of the view is located from the start of the root memory map
+        root = array
+        while isinstance(root.base, np.ndarray):
+            root = root.base
+
+        self.array = array
+        self.filename = array.filename
+        self.offset = root.offset + array.__array_interface__['data'][0] - root.__array_interface__['data'][0]
+        self.shape = array.shape
+        self.strides = array.strides
+        self.dtype = array.dtype
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, key):
+        return self.array[key]
+
+    def __reduce__(self):
+        return _attach_mapped_array, (self.filename, self.offset, self.shape, self.strides, self.dtype.str)
+
+def is_mapped(array):
+    '''
+    Check whether an array is a memory map backed by a file, or a view of it.
+    '''
+    return isinstance(array, np.memmap) and getattr(array, 'filename', None) is not None
+
+def _attach_mapped_array(filename, offset, shape, strides, dtype):
+    mapped = MappedArray.__new__(MappedArray)
+    (mapped.filename, mapped.offset, mapped.shape, mapped.strides, mapped.dtype) = (filename, offset, shape, strides, np.dtype(dtype))
+
+    # The whole file is mapped, read-only, and the view is rebuilt on it
+    mapped.array = np.ndarray(shape, dtype=mapped.dtype, buffer=np.memmap(filename, dtype=np.uint8, mode='r'), offset=offset, strides=strides)
+
+    return mapped
+
+def _release_attached():
+    # Blocks freed by their owner are only returned to the system once every process closed them
+    while len(_attached) > 0:
+        _attached.popitem(last=False)[1].close()
+
+def _release_inherited():
+    # Forked workers are not the owners of the blocks of their parent, and must not keep them mapped
+    for shared in list(_created):
+        shared._is_owner = False
+        shared.close()
+    _created.clear()
+
+def _attach_shared_array(name, shape, dtype):
+    if name in _attached:
+        _attached.move_to_end(name)
+        return _attached[name]
+
+    shared = SharedArray.__new__(SharedArray)
+
+    # The block is owned by the process which created it, so it must not be tracked here
+    if sys.version_info >= (3, 13):
+        shared._shm = shared_memory.SharedMemory(name=name, track=False)
+    else:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: register(name, rtype) if rtype != 'shared_memory' else None
+        try:
+            shared._shm = shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+    shared._is_owner = False
+    shared.shape = shape
+    shared.dtype = np.dtype(dtype)
+    shared.array = np.ndarray(shape, dtype=shared.dtype, buffer=shared._shm.buf)
+
+    # Blocks of previous calls are released, as they may have been freed by their owner
+    _attached[name] = shared
+    while len(_attached) > MAX_ATTACHED:
+        _attached.popitem(last=False)[1].close()
+
+    return shared
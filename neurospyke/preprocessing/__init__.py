@@ -0,0 +1,13 @@
+from .filters import get_bandpass_sos, get_initial_state, get_notch_sos, get_padding, filter_block, SOSFilter
+from .reader import filter_data, FilteredReader
+
+__all__ = [
+        'filter_block',
+        'filter_data',
+        'FilteredReader',
+        'get_bandpass_sos',
+        'get_initial_state',
+        'get_notch_sos',
+        'get_padding',
+        'SOSFilter'
+    ]
@@ -0,0 +1,194 @@
+import math
+import numpy as np
+from scipy import signal
+
+def get_bandpass_sos(low:float, high:float, sampling_time:float, order:int = 4):
+    '''
+    Design a Butterworth band-pass filter, as second-order sections.
+
+    Parameters
+    ----------
+    low : float
+        The lower cutoff frequency, in Hz.
+    high : float
+        The upper cutoff frequency, in Hz.
+    sampling_time : float
+        The sampling time for the recorded data.
+    order : int, default=4
+        The order of the filter.
+
+    Returns
+    -------
+    sos : ndarray
+        The (n_sections x 6) matrix of second-order sections. Filters are
+        cascaded by concatenating their sections.
+    '''
+    if not 0 < low < high < 1 / (2 * sampling_time):
+        raise ValueError("'low' and 'high' expected to satisfy 0 < low < high < " + str(1 / (2 * sampling_time)) + ", received " + str(low) + " and " + str(high))
+
+    return signal.butter(order, [low, high], btype='bandpass', output='sos', fs=1 / sampling_time)
+
+def get_notch_sos(frequency:float, sampling_time:float, quality:float = 30):
+    '''
+    Design a notch filter, e.g. removing the power line interference, as
+    second-order sections.
+
+    Parameters
+    ----------
+    frequency : float
+        The frequency to remove, in Hz.
+    sampling_time : float
+        The sampling time for the recorded data.
+    quality : float, default=30
+        The quality factor, i.e. the frequency divided by the -3 dB bandwidth.
+
+    Returns
+    -------
+    sos : ndarray
+        The (1 x 6) matrix of the second-order section.
+    '''
+    if not 0 < frequency < 1 / (2 * sampling_time):
+        raise ValueError("'frequency' expected to be in the range (0, " + str(1 / (2 * sampling_time)) + "), received " + str(frequency))
+
+    (b, a) = signal.iirnotch(frequency, quality, fs=1 / sampling_time)
+
+    return signal.tf2sos(b, a)
+
+def get_padding(sos:np.ndarray, tolerance:float = 1e-6):
+    '''
+    Get the number of samples after which the impulse response of a filter
+    decays below a tolerance, relative to its peak, i.e. the padding needed
+    for a filtered window to match the filtered recording.
+
+    Parameters
+    ----------
+    sos : ndarray
+        The second-order sections of the filter.
+    tolerance : float, default=1e-6
+        The relative amplitude of the impulse response at the end of the padding.
+
+    Returns
+    -------
+    padding : int
+        The number of samples.
+    '''
+    sos = np.atleast_2d(sos)
+
+    # The slowest pole, i.e. the closest to the unit circle, sets the decay
+    poles = np.concatenate([np.roots(section[3:]) for section in sos])
+    radius = np.amax(np.abs(poles)) if poles.size > 0 else 0
+    if radius <= 0:
+        return 3 * sos.shape[0]
+    if radius >= 1:
+        raise ValueError("'sos' expected to be a stable filter")
+
+    return int(math.ceil(np.log(tolerance) / np.log(radius))) + 3 * sos.shape[0]
+
+class SOSFilter:
+    '''
+    Apply a filter, given as second-order sections, to a multi-channel
+    recording arriving in consecutive blocks. The state of each section is
+    carried from each block to the next, so that the result is the same as
+    filtering the whole recording at once. The state is initialized to the
+    steady state of the first samples, which avoids the transient of their
+    offset.
+
+    Parameters
+    ----------
+    sos : ndarray
+        The second-order sections of the filter.
+    dtype : data-type, default=np.float64
+        The data type of the computation and of the filtered blocks, e.g.
+        np.float32 to halve memory and bandwidth.
+    '''
+    def __init__(self, sos:np.ndarray, dtype = np.float64):
+        self.dtype = dtype
+        self.sos = np.atleast_2d(np.asarray(sos, dtype=dtype))
+        self.zi = None
+
+    def process(self, block:np.ndarray):
+        '''
+        Filter the next block.
+
+        Parameters
+        ----------
+        block : ndarray
+            A (n_channels x n_samples) matrix, or a single-channel array, of
+            recorded data.
+
+        Returns
+        -------
+        filtered : ndarray
+            The filtered block, with the same shape.
+        '''
+        block = np.asarray(block, dtype=self.dtype)
+        is_single = block.ndim == 1
+        block = np.atleast_2d(block)
+
+        if block.shape[1] == 0:
+            return block[0] if is_single else block
+
+        if self.zi is None:
+            self.zi = get_initial_state(self.sos, block[:, 0])
+        (filtered, self.zi) = signal.sosfilt(self.sos, block, axis=-1, zi=self.zi)
+
+        return filtered[0] if is_single else filtered
+
+    def reset(self):
+        '''
+        Forget the state, e.g. before a new recording.
+        '''
+        self.zi = None
+
+def get_initial_state(sos:np.ndarray, first_samples:np.ndarray):
+    '''
+    Get the steady state of a filter, as second-order sections, for a
+    constant input equal to the first sample of each channel.
+
+    Parameters
+    ----------
+    sos : ndarray
+        The second-order sections of the filter.
+    first_samples : ndarray
+        The first sample of each channel.
+
+    Returns
+    -------
+    zi : ndarray
+        The (n_sections x n_channels x 2) initial state, as expected by
+        scipy.signal.sosfilt.
+    '''
+    sos = np.atleast_2d(sos)
+
+    return (signal.sosfilt_zi(sos)[:, np.newaxis, :] * np.asarray(first_samples)[np.newaxis, :, np.newaxis]).astype(sos.dtype)
+
+def filter_block(sos:np.ndarray, block:np.ndarray, zero_phase:bool = False):
+    '''
+    Filter a (n_channels x n_samples) block at once, causally from the
+    steady state of its first samples, or forward and backward.
+
+    Parameters
+    ----------
+    sos : ndarray
+        The second-order sections of the filter, whose data type sets the
+        one of the computation.
+    block : ndarray
+        A (n_channels x n_samples) matrix of recorded data.
+    zero_phase : bool, default=False
+        If True, the block is filtered forward and backward, without phase
+        distortion. Otherwise, it is filtered causally.
+
+    Returns
+    -------
+    filtered : ndarray
+        The filtered block.
+    '''
+    if block.shape[-1] == 0:
+        return block
+
+    if zero_phase:
+        # Short blocks are padded as much as their length allows
+        padlen = None if block.shape[-1] > 3 * (2 * sos.shape[0] + 1) else block.shape[-1] - 1
+        return signal.sosfiltfilt(sos, block, axis=-1, padlen=padlen)
+
+    return signal.sosfilt(sos, block, axis=-1, zi=get_initial_state(sos, block[:, 0]))[0]
@@ -0,0 +1,273 @@
+import numpy as np
+
+from .. import parallel, utils
+from .filters import SOSFilter, filter_block, get_padding
+
+class FilteredReader:
+    '''
+    Read a recording through a filter, given as second-order sections,
+    without filtering it as a whole in memory. It can be passed in place of a
+    reader, or of the matrix of recorded data, to the detectors and to
+    get_waveforms, and wraps memory-mapped arrays as well as readers.
+
+    Each window is read together with a padding as long as the impulse
+    response of the filter, which is discarded, so that it matches the
+    filtered recording. Causal filtering starts from the beginning of the
+    recording whenever the padding reaches it, which makes reading whole
+    channels exact, and iter_chunks carries the state of the filter from
+    each chunk to the next, so that it is exact as well.
+
+    Parameters
+    ----------
+    data : ndarray or Reader
+        A (n_channels x n_samples) matrix of recorded data, possibly
+        memory-mapped, or a reader. Pickling the FilteredReader, e.g. to send
+        it to worker processes, maps memory-mapped data again instead of
+        copying them.
+    sos : ndarray
+        The second-order sections of the filter, e.g. as returned by
+        get_bandpass_sos, or several filters concatenated.
+    zero_phase : bool, default=False
+        If True, windows are filtered forward and backward, without phase
+        distortion. Otherwise, they are filtered causally, as in streaming.
+    padding : int, optional
+        The number of samples read before, and for zero-phase filtering
+        after, each window. If not specified, it is computed from the filter
+        by get_padding.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If not specified, the one of
+        the reader is employed.
+    '''
+    def __init__(self, data, sos:np.ndarray, zero_phase:bool = False, padding:int = None, sampling_time:float = None):
+        if isinstance(data, parallel.MappedArray):
+            data = data.array
+
+        self.data = data if utils.is_reader(data) else np.atleast_2d(data)
+        self.sos = np.atleast_2d(np.asarray(sos, dtype=np.float64))
+        self.zero_phase = zero_phase
+        self.padding = get_padding(self.sos) if padding is None else int(padding)
+
+        (self.n_channels, self.n_samples) = (self.data.n_channels, self.data.n_samples) if utils.is_reader(self.data) else self.data.shape
+        self.sampling_time = sampling_time if sampling_time is not None or not utils.is_reader(self.data) else self.data.sampling_time
+
+    def __reduce__(self):
+        # Memory maps are mapped again, e.g. by worker processes, instead of being copied with the reader
+        data = parallel.MappedArray(self.data) if parallel.is_mapped(self.data) else self.data
+
+        return type(self), (data, self.sos, self.zero_phase, self.padding, self.sampling_time)
+
+    @property
+    def shape(self):
+        return (self.n_channels, self.n_samples)
+
+    def __len__(self):
+        return self.n_samples
+
+    def close(self):
+        if hasattr(self.data, 'close'):
+            self.data.close()
+
+    def get_cache_identity(self):
+        '''
+        Get what identifies the filtered recording in the keys of utils.Cache,
+        i.e. the wrapped source together with the parameters of the filter.
+        '''
+        return [self.data, self.sos, self.zero_phase, self.padding, self.sampling_time]
+
+    def read(self, channels = None, start:int = 0, stop:int = None, dtype = np.float64):
+        '''
+        Read a filtered time window of a subset of channels.
+
+        Parameters
+        ----------
+        channels : int or array_like, optional
+            The channel, or the channels, to read. If not specified, all the
+            channels are read.
+        start : int, default=0
+            The index of the first sample to read.
+        stop : int, optional
+            The index following the last sample to read. If not specified, the
+            recording is read up to its end.
+        dtype : data-type, default=np.float64
+            The data type of the filtering and of the returned data.
+
+        Returns
+        -------
+        data : ndarray
+            A (n_channels x n_samples) matrix of data, or an array if a single
+            channel is specified.
+        '''
+        (channels_idxs, is_single) = self._get_channels_idxs(channels)
+        (start, stop, _) = slice(start, stop).indices(self.n_samples)
+        stop = max(start, stop)
+
+        block_start = max(start - self.padding, 0)
+        block_stop = min(stop + self.padding, self.n_samples) if self.zero_phase else stop
+
+        block = filter_block(self.sos.astype(dtype), self._read_source(channels_idxs, block_start, block_stop, dtype), self.zero_phase)
+        data = block[:, start - block_start:stop - block_start]
+
+        return data[0] if is_single else data
+
+    def gather(self, samples_idxs:np.ndarray, channels = None, dtype = np.float64):
+        '''
+        Read the filtered samples at arbitrary indices, such as the windows
+        surrounding a set of events. Close samples are filtered together, in
+        windows of at most the chunk size set by parallel.config.
+
+        Parameters
+        ----------
+        samples_idxs : ndarray
+            An array, of any shape, containing the indices of the samples to read.
+        channels : int or array_like, optional
+            The channel, or the channels, to read. If not specified, all the
+            channels are read.
+        dtype : data-type, default=np.float64
+            The data type of the filtering and of the returned data.
+
+        Returns
+        -------
+        data : ndarray
+            An array with shape (n_channels,) + samples_idxs.shape, where the
+            channels axis is dropped if a single channel is specified.
+        '''
+        (channels_idxs, is_single) = self._get_channels_idxs(channels)
+        samples_idxs = np.asarray(samples_idxs, dtype=np.int64)
+        (unique_idxs, inverse) = np.unique(samples_idxs, return_inverse=True)
+
+        # Samples closer than the padding of two windows share a window
+        chunk_size = parallel.get_config()['chunk_size']
+        splits = np.flatnonzero((np.diff(unique_idxs) > 2 * self.padding) | (np.diff(unique_idxs // chunk_size) != 0)) + 1
+
+        values = np.empty((channels_idxs.size, unique_idxs.size), dtype=dtype)
+        for group in np.split(np.arange(unique_idxs.size), splits):
+            if group.size == 0:
+                continue
+            (first, last) = (unique_idxs[group[0]], unique_idxs[group[-1]])
+            values[:, group] = self.read(channels_idxs, first, last + 1, dtype)[:, unique_idxs[group] - first]
+
+        data = values[:, inverse.ravel()].reshape((channels_idxs.size,) + samples_idxs.shape)
+
+        return data[0] if is_single else data
+
+    def iter_chunks(self, chunk_size:int, halo:int = 0, channels = None, start:int = 0, stop:int = None, dtype = np.float64):
+        '''
+        Iterate over consecutive filtered time chunks of a subset of channels,
+        extended by a halo on both sides, as Reader.iter_chunks. Causal
+        filtering runs once through the samples, carrying its state from each
+        chunk to the next.
+
+        Parameters
+        ----------
+        chunk_size : int
+            The number of samples of each chunk, halo excluded.
+        halo : int, default=0
+            The number of samples added before and after each chunk. The halo
+            is clipped at the boundaries of the recording.
+        channels : int or array_like, optional
+            The channel, or the channels, to read. If not specified, all the
+            channels are read.
+        start : int, default=0
+            The index of the first sample of the first chunk.
+        stop : int, optional
+            The index following the last sample of the last chunk. If not
+            specified, the recording is read up to its end.
+        dtype : data-type, default=np.float64
+            The data type of the filtering and of the returned data.
+
+        Yields
+        ------
+        chunk_start : int
+            The index of the first sample of the chunk, halo excluded.
+        chunk_stop : int
+            The index following the last sample of the chunk, halo excluded.
+        block_start : int
+            The index of the first sample of block, i.e. of the chunk with its halo.
+        block : ndarray
+            The data of the chunk with its halo, as returned by read.
+        '''
+        (start, stop, _) = slice(start, stop).indices(self.n_samples)
+        chunk_size = max(int(chunk_size), 1)
+
+        if self.zero_phase:
+            for chunk_start in range(start, stop, chunk_size):
+                chunk_stop = min(chunk_start + chunk_size, stop)
+                block_start = max(chunk_start - halo, 0)
+                yield chunk_start, chunk_stop, block_start, self.read(channels, block_start, min(chunk_stop + halo, self.n_samples), dtype)
+            return
+
+        (channels_idxs, is_single) = self._get_channels_idxs(channels)
+        sos_filter = SOSFilter(self.sos, dtype=dtype)
+
+        # Filtered samples are kept from the start of the current block, the filter runs from the padding of the first one
+        position = max(start - halo - self.padding, 0)
+        (filtered, filtered_start) = (np.zeros((channels_idxs.size, 0), dtype=dtype), position)
+
+        for chunk_start in range(start, stop, chunk_size):
+            chunk_stop = min(chunk_start + chunk_size, stop)
+            block_start = max(chunk_start - halo, 0)
+            block_stop = min(chunk_stop + halo, self.n_samples)
+
+            filtered = np.concatenate([filtered, sos_filter.process(self._read_source(channels_idxs, position, block_stop, dtype))], axis=1)
+            position = block_stop
+
+            filtered = filtered[:, block_start - filtered_start:]
+            filtered_start = block_start
+
+            yield chunk_start, chunk_stop, block_start, filtered[0] if is_single else filtered
+
+    def _get_channels_idxs(self, channels):
+        if channels is None:
+            return np.arange(self.n_channels), False
+
+        is_single = np.ndim(channels) == 0
+        channels_idxs = np.atleast_1d(np.asarray(channels, dtype=np.int64))
+
+        if np.any((channels_idxs < 0) | (channels_idxs >= self.n_channels)):
+            raise ValueError("'channels' must be in the range [0, " + str(self.n_channels) + ")")
+
+        return channels_idxs, is_single
+
+    def _read_source(self, channels_idxs, start, stop, dtype):
+        if utils.is_reader(self.data):
+            return self.data.read(channels=channels_idxs, start=start, stop=stop, dtype=dtype)
+
+        # Memory maps only read the requested channels and samples
+        return np.asarray(self.data[channels_idxs, start:stop], dtype=dtype)
+
+def filter_data(data, sos:np.ndarray, zero_phase:bool = False, padding:int = None, dtype = np.float64):
+    '''
+    Filter a recording, given as second-order sections. Causal filtering
+    carries the state of the filter through chunks of the size set by
+    parallel.config, and gives the same result as filtering the whole
+    recording at once, while zero-phase filtering pads each chunk.
+
+    Parameters
+    ----------
+    data : ndarray or Reader
+        A (n_channels x n_samples) matrix, or an array, of recorded data,
+        possibly memory-mapped, or a reader.
+    sos : ndarray
+        The second-order sections of the filter.
+    zero_phase : bool, default=False
+        If True, the data are filtered forward and backward, without phase
+        distortion. Otherwise, they are filtered causally.
+    padding : int, optional
+        The number of samples padding each chunk. If not specified, it is
+        computed from the filter by get_padding.
+    dtype : data-type, default=np.float64
+        The data type of the filtering and of the returned data.
+
+    Returns
+    -------
+    filtered : ndarray
+        The filtered data, with the same shape.
+    '''
+    is_single = not utils.is_reader(data) and np.ndim(data) == 1
+    reader = FilteredReader(data, sos, zero_phase=zero_phase, padding=padding)
+
+    filtered = np.empty(reader.shape, dtype=dtype)
+    for (chunk_start, chunk_stop, block_start, block) in reader.iter_chunks(parallel.get_config()['chunk_size'], dtype=dtype):
+        filtered[:, chunk_start:chunk_stop] = block[:, chunk_start - block_start:chunk_stop - block_start]
+
+    return filtered[0] if is_single else filtered
@@ -1,9 +1,34 @@
+from .accumulators import PSTHAccumulator, CorrelogramAccumulator, IEIHistogramAccumulator
+from .bursts import detect_bursts, detect_network_bursts
+from .connectivity import lagged_coincidences
 from .crosscorr import cross_correlation
 from .leaderfollower import leader_follower
 from .psth import PSTH
+from .rate import firing_rate
+from .sta import spike_triggered_average
+from .surrogates import generate_surrogates, surrogate_test, batch_cross_correlation, batch_PSTH
+from .synchrony import STTC, coincidence_matrix
+from .variability import trials_spikes_count, fano_factor, noise_correlation
 
 __all__ = [
+        'CorrelogramAccumulator',
+        'IEIHistogramAccumulator',
+        'PSTHAccumulator',
+        'batch_cross_correlation',
+        'batch_PSTH',
+        'coincidence_matrix',
         'cross_correlation',
+        'detect_bursts',
+        'detect_network_bursts',
+        'fano_factor',
+        'firing_rate',
+        'generate_surrogates',
+        'lagged_coincidences',
         'leader_follower',
-        'PSTH'
+        'noise_correlation',
+        'PSTH',
+        'spike_triggered_average',
+        'STTC',
+        'surrogate_test',
+        'trials_spikes_count'
     ]
\ No newline at end of file
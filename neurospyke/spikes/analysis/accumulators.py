@@ -0,0 +1,323 @@
+import math
+import numpy as np
+
+from ... import utils
+from .surrogates import batch_cross_correlation
+
+def _get_segment_idxs(spikes, offset):
+    if spikes is None:
+        return np.zeros(0, dtype=np.int64)
+
+    return np.sort(utils.get_spikes_idxs(spikes)) + utils.get_in_samples(offset)
+
+class PSTHAccumulator:
+    '''
+    Accumulate the Post-Stimulus Time Histogram of a recording arriving in
+    consecutive segments, giving the same result as PSTH on the whole recording.
+    Each update only processes the new spikes and stimuli.
+
+    Parameters
+    ----------
+    duration : float
+        The duration of a trial, either in samples or in seconds.
+    bin_size : float, optional
+        The size of a single bin, either in samples or in seconds.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, the other
+        parameters should be specified in seconds.
+    '''
+    def __init__(self, duration:float, bin_size:float = None, sampling_time:float = None):
+        if bin_size is None:
+            bin_size = 1e-3 if sampling_time is not None else 20
+
+        self.duration = utils.get_in_samples(duration, sampling_time)
+        self.bin_size = utils.get_in_samples(bin_size, sampling_time)
+        self.n_bins = math.floor(self.duration / self.bin_size)
+
+        self._counts = []
+        self._last_event = None
+        self._start = None
+        # Spikes preceding the first stimulus, which may belong to the last trial of a previous accumulator
+        self._orphans = np.zeros(0, dtype=np.int64)
+
+    @property
+    def n_trials(self):
+        return sum([block.shape[0] for block in self._counts])
+
+    def update(self, spikes:np.ndarray = None, stimuli:np.ndarray = None, offset:int = 0):
+        '''
+        Add a new segment of data. Segments must be added in temporal order.
+
+        Parameters
+        ----------
+        spikes : ndarray, optional
+            An array containing the new spikes. It can be expressed both as a
+            spike train or the indices at which spikes occur.
+        stimuli : ndarray, optional
+            An array containing the new stimuli. It can be expressed both as a
+            train of stimuli or the indices at which stimuli occur.
+        offset : int, default=0
+            The index of the first sample of the segment, added to the indices
+            of spikes and stimuli.
+        '''
+        spikes_idxs = _get_segment_idxs(spikes, offset)
+        stimuli_idxs = _get_segment_idxs(stimuli, offset)
+
+        if self._start is None and (spikes_idxs.size > 0 or stimuli_idxs.size > 0):
+            self._start = min(np.concatenate((spikes_idxs[:1], stimuli_idxs[:1])))
+
+        self._add(spikes_idxs, stimuli_idxs)
+
+        return self
+
+    def merge(self, other):
+        '''
+        Merge the accumulator of the following part of the recording, for
+        instance processed by another worker.
+        '''
+        if other._start is None:
+            return self
+
+        if self._start is None:
+            self._start = other._start
+
+        self._add(other._orphans, np.zeros(0, dtype=np.int64))
+        self._counts.extend([block.copy() for block in other._counts])
+
+        if other._last_event is not None:
+            self._last_event = other._last_event
+
+        return self
+
+    def result(self):
+        '''
+        Get the (n_trials x n_bins) matrix containing the number of spikes in
+        each bin and for each trial, as returned by PSTH.
+        '''
+        if len(self._counts) == 0:
+            return np.zeros((0, self.n_bins), dtype=np.int64)
+
+        return np.concatenate(self._counts, axis=0)
+
+    def _add(self, spikes_idxs, stimuli_idxs):
+        # Quiet segments change nothing, and may precede the first spike or stimulus
+        if spikes_idxs.size == 0 and stimuli_idxs.size == 0:
+            return
+
+        has_last = self._last_event is not None
+        events_idxs = np.concatenate(([self._last_event] if has_last else [], stimuli_idxs)).astype(np.int64)
+
+        # Each spike belongs to the trial of the preceding stimulus, as in get_trials
+        trials = np.searchsorted(events_idxs, spikes_idxs, side='right') - 1
+        orphans = spikes_idxs[trials < 0]
+        self._orphans = np.concatenate((self._orphans, orphans[orphans < self._start + self.duration]))
+
+        delays = spikes_idxs - events_idxs[np.maximum(trials, 0)] if events_idxs.size > 0 else spikes_idxs
+        bins = delays // self.bin_size
+        is_counted = (trials >= 0) & (delays < self.duration) & (bins < self.n_bins)
+
+        counts = np.bincount(trials[is_counted] * self.n_bins + bins[is_counted], minlength=events_idxs.size * self.n_bins)
+        counts = counts.reshape(events_idxs.size, self.n_bins).astype(np.int64)
+
+        if has_last:
+            self._counts[-1][-1] += counts[0]
+            counts = counts[1:]
+
+        if counts.shape[0] > 0:
+            self._counts.append(counts)
+            self._last_event = events_idxs[-1]
+
+class CorrelogramAccumulator:
+    '''
+    Accumulate the cross-correlation between a reference and a target spike
+    train arriving in consecutive segments, giving the same result as
+    cross_correlation on the whole recording. Each update only processes
+    the new spikes and the spikes closer than window_length to the end of
+    the previous segments.
+
+    Parameters
+    ----------
+    tau : float
+        The lag step, either in samples or in seconds.
+    window_length : float
+        The maximum lag, either in samples or in seconds.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, the other
+        parameters should be specified in seconds.
+    '''
+    def __init__(self, tau:float, window_length:float, sampling_time:float = None):
+        self.n_max = math.floor(window_length / tau)
+        self.tau = utils.get_in_samples(tau, sampling_time)
+        self.max_lag = self.n_max * self.tau
+
+        self.cross_correlation = np.zeros(2 * self.n_max + 1, dtype=np.int64)
+
+        self._first = None
+        self._last = None
+        empty = np.zeros(0, dtype=np.int64)
+        self._head = (empty, empty)
+        self._tail = (empty, empty)
+
+    def update(self, reference:np.ndarray = None, target:np.ndarray = None, offset:int = 0):
+        '''
+        Add a new segment of data. Segments must be added in temporal order.
+
+        Parameters
+        ----------
+        reference : ndarray, optional
+            An array containing the new spikes of the reference train. It can be
+            expressed both as a spike train or the indices at which spikes occur.
+        target : ndarray, optional
+            An array containing the new spikes of the target train. It can be
+            expressed both as a spike train or the indices at which spikes occur.
+        offset : int, default=0
+            The index of the first sample of the segment, added to the indices
+            of the spikes.
+        '''
+        reference_idxs = _get_segment_idxs(reference, offset)
+        target_idxs = _get_segment_idxs(target, offset)
+
+        self._add((reference_idxs, target_idxs), (reference_idxs, target_idxs))
+
+        return self
+
+    def merge(self, other):
+        '''
+        Merge the accumulator of the following part of the recording, for
+        instance processed by another worker.
+        '''
+        self.cross_correlation += other.cross_correlation
+        self._add(other._head, other._tail, is_counted=False)
+
+        return self
+
+    def result(self):
+        '''
+        Get the cross-correlation, as returned by cross_correlation.
+        '''
+        return self.cross_correlation.copy()
+
+    def _count(self, reference_idxs, target_idxs):
+        if reference_idxs.size == 0 or target_idxs.size == 0:
+            return 0
+
+        return batch_cross_correlation(reference_idxs, target_idxs[np.newaxis, :], self.tau, self.max_lag)[0]
+
+    def _add(self, head, tail, is_counted=True):
+        # Pairs between the new spikes and the tail of the previous ones
+        (reference_idxs, target_idxs) = head
+        (tail_reference, tail_target) = self._tail
+
+        if is_counted:
+            self.cross_correlation += self._count(reference_idxs, target_idxs)
+        self.cross_correlation += self._count(reference_idxs, tail_target)
+        self.cross_correlation += self._count(tail_reference, target_idxs)
+
+        new_idxs = np.concatenate(head + tail)
+        if new_idxs.size == 0:
+            return
+
+        if self._first is None:
+            self._first = np.amin(new_idxs)
+        self._last = max(np.amax(new_idxs), self._last) if self._last is not None else np.amax(new_idxs)
+
+        # Keep only the spikes which may pair with the spikes of the previous or following segments
+        self._head = tuple([np.union1d(previous, idxs[idxs <= self._first + self.max_lag]) for previous, idxs in zip(self._head, head)])
+        self._tail = tuple([np.union1d(previous[previous >= self._last - self.max_lag], idxs[idxs >= self._last - self.max_lag]) for previous, idxs in zip(self._tail, tail)])
+
+class IEIHistogramAccumulator:
+    '''
+    Accumulate the histogram of the Inter-Event-Intervals of events arriving
+    in consecutive segments, giving the same result as np.histogram applied
+    to get_IEI on the whole recording. Each update only processes the new events.
+
+    Parameters
+    ----------
+    bins : int or ndarray
+        The number of bins, or the edges of the bins.
+    range : tuple, optional
+        The lower and upper range of the bins. It is required when bins is an int.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, the intervals
+        are expressed in seconds. Otherwise, they are expressed in samples.
+    log : bool, default=False
+        If True, the bins are spaced evenly on a log scale, so that both
+        short and long intervals are resolved.
+    '''
+    def __init__(self, bins, range:tuple = None, sampling_time:float = None, log:bool = False):
+        if np.ndim(bins) == 0 and range is None:
+            raise ValueError("'range' must be specified when 'bins' is an int")
+
+        self.edges = utils.get_IEI_edges(bins, range, log)
+        self.counts = np.zeros(self.edges.size - 1, dtype=np.int64)
+        self.sampling_time = sampling_time
+
+        self._first = None
+        self._last = None
+
+    def update(self, events:np.ndarray, offset:int = 0):
+        '''
+        Add a new segment of events. Segments must be added in temporal order.
+
+        Parameters
+        ----------
+        events : ndarray
+            An array containing the new events. It can be expressed both as an
+            event train or the indices at which events occur.
+        offset : int, default=0
+            The index of the first sample of the segment, added to the indices
+            of the events.
+        '''
+        events_idxs = _get_segment_idxs(events, offset)
+        if events_idxs.size == 0:
+            return self
+
+        if self._last is not None:
+            events_idxs = np.concatenate(([self._last], events_idxs))
+        else:
+            self._first = events_idxs[0]
+
+        self._add(utils.get_IEI(events_idxs, self.sampling_time))
+        self._last = events_idxs[-1]
+
+        return self
+
+    def merge(self, other, is_consecutive:bool = True):
+        '''
+        Merge the accumulator of the following part of the recording, for
+        instance processed by another worker, or of another channel.
+
+        Parameters
+        ----------
+        other : IEIHistogramAccumulator
+            The accumulator to merge, with the same bins.
+        is_consecutive : bool, default=True
+            If True, other follows this accumulator in the same recording, and
+            the interval between their events is counted. Otherwise, e.g. for
+            another channel, only the counts are summed.
+        '''
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Cannot merge histograms with different bins")
+
+        self.counts += other.counts
+
+        if other._first is None or not is_consecutive:
+            return self
+
+        if self._last is not None:
+            self._add(utils.get_IEI(np.array([self._last, other._first]), self.sampling_time))
+        else:
+            self._first = other._first
+
+        self._last = other._last
+
+        return self
+
+    def result(self):
+        '''
+        Get the counts and the edges of the histogram, as returned by np.histogram.
+        '''
+        return self.counts.copy(), self.edges.copy()
+
+    def _add(self, IEI):
+        self.counts += utils.get_IEI_histogram(IEI, bins=self.edges)[0]
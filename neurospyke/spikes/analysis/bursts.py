@@ -0,0 +1,280 @@
+import numpy as np
+
+from ... import parallel, utils
+
+def _parse_kwargs(**kwargs):
+    in_seconds = kwargs.get('sampling_time', None) is not None
+    kwargs_list = [
+        {'key': 'isi_cutoff', 'default': 0.1 if in_seconds else 2000, 'type': float},
+        {'key': 'max_begin_ISI', 'default': 0.17 if in_seconds else 3400, 'type': float},
+        {'key': 'max_end_ISI', 'default': 0.3 if in_seconds else 6000, 'type': float},
+        {'key': 'min_burst_duration', 'default': 0.01 if in_seconds else 200, 'type': float},
+        {'key': 'min_interburst_interval', 'default': 0.2 if in_seconds else 4000, 'type': float},
+        {'key': 'min_spikes', 'default': 3, 'type': int},
+        {'key': 'min_void', 'default': 0.7, 'type': float},
+        {'key': 'n_bins', 'default': 100, 'type': int},
+        {'key': 'sampling_time', 'default': None, 'type': float}
+    ]
+    kwargs = utils.check_kwargs_list(kwargs_list, **kwargs)
+
+    return kwargs
+
+def _parse_network_kwargs(**kwargs):
+    in_seconds = kwargs.get('sampling_time', None) is not None
+    kwargs_list = [
+        {'key': 'min_channels', 'default': 2, 'type': int},
+        {'key': 'min_spikes', 'default': 10, 'type': int},
+        {'key': 'sampling_time', 'default': None, 'type': float},
+        {'key': 'window_length', 'default': 0.025 if in_seconds else 500, 'type': float}
+    ]
+    kwargs = utils.check_kwargs_list(kwargs_list, **kwargs)
+
+    return kwargs
+
+@utils.cacheable(_parse_kwargs)
+def detect_bursts(spikes, method:str = 'max_interval', n_jobs:int = None, **kwargs):
+    '''
+    Detect bursts of spikes on one or more channels, using either the
+    Max Interval or the logISI method, with parameters specified either
+    in the time domain or in samples.
+
+    Parameters
+    ----------
+    spikes : ndarray or list of ndarray
+        An array containing the detected spikes. It can be expressed both
+        as a spike train or the indices at which spikes occur. Multiple
+        channels may be passed as a list of ndarray.
+    method : {'max_interval', 'log_isi'}, default='max_interval'
+        The burst detection method. 'max_interval' starts a burst at an
+        Inter-Spike-Interval shorter than max_begin_ISI and extends it while
+        intervals are shorter than max_end_ISI. 'log_isi' derives the maximum
+        interval from the valley of the logarithmic ISI histogram of the channel.
+    n_jobs : int, optional
+        The number of parallel jobs employed when multiple channels are passed.
+        If not specified, the value set by parallel.config is employed.
+    max_begin_ISI : float, optional
+        The maximum interval starting a burst, expressed in seconds or samples.
+    max_end_ISI : float, optional
+        The maximum interval within a burst, expressed in seconds or samples.
+    min_interburst_interval : float, optional
+        Bursts closer than this interval are merged together, expressed in
+        seconds or samples.
+    min_burst_duration : float, optional
+        The minimum duration of a burst, expressed in seconds or samples.
+    min_spikes : int, default=3
+        The minimum number of spikes in a burst.
+    isi_cutoff : float, optional
+        The largest threshold the logISI method may select, expressed in
+        seconds or samples.
+    min_void : float, default=0.7
+        The minimum void parameter required by the logISI method to accept the
+        valley between the intra-burst and inter-burst peaks of the histogram.
+    n_bins : int, default=100
+        The number of bins of the logarithmic ISI histogram.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, the algorithm
+        will work in the time domain (the other parameters should then be
+        specified in seconds). Otherwise, it will work with samples.
+
+    Returns
+    -------
+    bursts_start : ndarray or list of ndarray
+        The indices of the first spike of each burst.
+    bursts_end : ndarray or list of ndarray
+        The indices of the last spike of each burst.
+    bursts_spikes_count : ndarray or list of ndarray
+        The number of spikes in each burst.
+
+    References
+    ----------
+    [1] Cotterill, E., Charlesworth, P., Thomas, C. W., Paulsen, O., & Eglen, S. J. (2016). A comparison of computational methods for detecting bursts in neuronal spike trains and their application to human stem cell-derived neuronal networks. Journal of Neurophysiology, 116(2), 306–321. https://doi.org/10.1152/jn.00093.2016
+    [2] Pasquale, V., Martinoia, S., & Chiappalone, M. (2010). A self-adapting approach for the detection of bursts and network bursts in neuronal cultures. Journal of Computational Neuroscience, 29(1-2), 213–229. https://doi.org/10.1007/s10827-009-0175-1
+    '''
+    kwargs = _parse_kwargs(**kwargs)
+
+    if method not in ['max_interval', 'log_isi']:
+        raise ValueError("'method' expected to be one of 'max_interval', 'log_isi', received '" + str(method) + "'")
+
+    if isinstance(spikes, np.ndarray) and (len(spikes.squeeze().shape) <= 1):
+        return _detect_channel_bursts(spikes, method, **kwargs)
+
+    spikes_idxs = [utils.get_spikes_idxs(channel_spikes) for channel_spikes in spikes]
+    channels = list(range(len(spikes_idxs)))
+
+    if parallel.get_n_jobs(n_jobs) == 1:
+        out = parallel.map_tasks(_detect_task, spikes_idxs, channels, n_jobs, method=method, kwargs=kwargs)
+    else:
+        with parallel.SharedArrays(spikes_idxs) as shared_spikes:
+            out = parallel.map_tasks(_detect_task, shared_spikes, channels, n_jobs, method=method, kwargs=kwargs)
+
+    bursts_start = [channel_out[0] for channel_out in out]
+    bursts_end = [channel_out[1] for channel_out in out]
+    bursts_spikes_count = [channel_out[2] for channel_out in out]
+
+    return bursts_start, bursts_end, bursts_spikes_count
+
+@utils.cacheable(_parse_network_kwargs)
+def detect_network_bursts(spikes:list, **kwargs):
+    '''
+    Detect network bursts, i.e. periods of synchronous activity spanning
+    multiple channels, by sweeping a sliding window over the merged spikes
+    of all the channels.
+
+    Parameters
+    ----------
+    spikes : list of ndarray
+        A list of arrays containing the detected spikes of each channel. They
+        can be expressed both as spike trains or the indices at which spikes occur.
+    window_length : float, optional
+        The length of the sliding window, expressed in seconds or samples.
+    min_spikes : int, default=10
+        The minimum number of spikes, across all channels, inside a window
+        for it to take part in a network burst.
+    min_channels : int, default=2
+        The minimum number of channels participating in a network burst.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, the algorithm
+        will work in the time domain (the other parameters should then be
+        specified in seconds). Otherwise, it will work with samples.
+
+    Returns
+    -------
+    bursts_start : ndarray
+        The indices of the first spike of each network burst.
+    bursts_end : ndarray
+        The indices of the last spike of each network burst.
+    bursts_spikes_count : ndarray
+        The number of spikes in each network burst.
+    bursts_channels_count : ndarray
+        The number of channels participating in each network burst.
+    '''
+    kwargs = _parse_network_kwargs(**kwargs)
+
+    window_length = utils.get_in_samples(kwargs.get('window_length'), kwargs.get('sampling_time'))
+
+    spikes_idxs = [utils.get_spikes_idxs(channel_spikes) for channel_spikes in spikes]
+    n_channels = len(spikes_idxs)
+
+    # Merge all the channels into a single sorted stream of spikes
+    times = np.concatenate([np.zeros(0, dtype=np.int64)] + spikes_idxs)
+    channels = np.repeat(np.arange(n_channels), [channel_idxs.size for channel_idxs in spikes_idxs])
+    order = np.argsort(times, kind='stable')
+    times = times[order]
+    channels = channels[order]
+
+    # Count the spikes inside the window starting at each spike
+    windows_end = np.searchsorted(times, times + window_length, side='left')
+    active = (windows_end - np.arange(times.size)) >= kwargs.get('min_spikes')
+
+    if not np.any(active):
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty.copy(), empty.copy(), empty.copy()
+
+    # Merge overlapping active windows into network bursts
+    active_start = times[active]
+    active_end = times[windows_end[active] - 1]
+    reach = np.maximum.accumulate(active_end)
+    is_new = np.concatenate(([True], active_start[1:] > reach[:-1]))
+    group = np.cumsum(is_new) - 1
+
+    bursts_start = active_start[is_new]
+    bursts_end = np.zeros(bursts_start.size, dtype=np.int64)
+    np.maximum.at(bursts_end, group, active_end)
+
+    first = np.searchsorted(times, bursts_start, side='left')
+    last = np.searchsorted(times, bursts_end, side='right')
+    bursts_spikes_count = last - first
+
+    # Count the distinct channels taking part in each network burst
+    spikes_group = np.searchsorted(bursts_start, times, side='right') - 1
+    inside = (spikes_group >= 0) & (times <= bursts_end[np.maximum(spikes_group, 0)])
+    pairs = np.unique(spikes_group[inside] * n_channels + channels[inside])
+    bursts_channels_count = np.bincount(pairs // n_channels, minlength=bursts_start.size)
+
+    keep = bursts_channels_count >= kwargs.get('min_channels')
+
+    return bursts_start[keep].astype(np.int64), bursts_end[keep], bursts_spikes_count[keep].astype(np.int64), bursts_channels_count[keep].astype(np.int64)
+
+def _find_runs(mask:np.ndarray):
+    # Return the [start, stop) bounds of the runs of True values in mask
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    runs_start = np.flatnonzero(edges == 1)
+    runs_stop = np.flatnonzero(edges == -1)
+
+    return runs_start, runs_stop
+
+def _detect_task(spikes_idxs, channel, method, kwargs):
+    return _detect_channel_bursts(spikes_idxs[channel], method, **kwargs)
+
+def _detect_channel_bursts(spikes, method, **kwargs):
+    spikes_idxs = utils.get_spikes_idxs(spikes)
+    IEI = utils.get_IEI(spikes_idxs)
+
+    min_burst_duration = utils.get_in_samples(kwargs.get('min_burst_duration'), kwargs.get('sampling_time'))
+    min_interburst_interval = utils.get_in_samples(kwargs.get('min_interburst_interval'), kwargs.get('sampling_time'))
+
+    if method == 'log_isi':
+        max_begin_ISI = _get_log_isi_threshold(IEI, **kwargs)
+        max_end_ISI = max_begin_ISI
+    else:
+        max_begin_ISI = utils.get_in_samples(kwargs.get('max_begin_ISI'), kwargs.get('sampling_time'))
+        max_end_ISI = utils.get_in_samples(kwargs.get('max_end_ISI'), kwargs.get('sampling_time'))
+
+    # A burst is a run of intervals shorter than max_end_ISI, starting at the first interval shorter than max_begin_ISI
+    runs_start, runs_stop = _find_runs(IEI <= max_end_ISI)
+    begin_idxs = np.append(np.flatnonzero(IEI <= max_begin_ISI), IEI.size)
+    runs_start = begin_idxs[np.searchsorted(begin_idxs, runs_start)]
+    keep = runs_start < runs_stop
+
+    # Bursts are expressed as indices of their first and last spike
+    first_spikes = runs_start[keep]
+    last_spikes = runs_stop[keep]
+
+    # Merge bursts separated by less than the minimum inter-burst interval
+    if first_spikes.size > 1:
+        gaps = spikes_idxs[first_spikes[1:]] - spikes_idxs[last_spikes[:-1]]
+        is_new = np.concatenate(([True], gaps >= min_interburst_interval))
+        last_spikes = last_spikes[np.concatenate((is_new[1:], [True]))]
+        first_spikes = first_spikes[is_new]
+
+    bursts_spikes_count = last_spikes - first_spikes + 1
+    bursts_start = spikes_idxs[first_spikes]
+    bursts_end = spikes_idxs[last_spikes]
+
+    keep = (bursts_spikes_count >= kwargs.get('min_spikes')) & ((bursts_end - bursts_start) >= min_burst_duration)
+
+    return bursts_start[keep], bursts_end[keep], bursts_spikes_count[keep].astype(np.int64)
+
+def _get_log_isi_threshold(IEI, **kwargs):
+    isi_cutoff = utils.get_in_samples(kwargs.get('isi_cutoff'), kwargs.get('sampling_time'))
+    IEI = IEI[IEI > 0]
+
+    if IEI.size < 2:
+        return isi_cutoff
+
+    # Smoothed histogram of the logarithm of the intervals
+    counts, edges = np.histogram(np.log10(IEI), bins=kwargs.get('n_bins'))
+    counts = np.convolve(counts, np.ones(3) / 3, mode='same')
+    centers = 10 ** ((edges[:-1] + edges[1:]) / 2)
+
+    peaks = np.flatnonzero((counts[1:-1] > counts[:-2]) & (counts[1:-1] >= counts[2:])) + 1
+    intra_peaks = peaks[centers[peaks] <= isi_cutoff]
+
+    if intra_peaks.size == 0:
+        return isi_cutoff
+
+    intra_peak = intra_peaks[np.argmax(counts[intra_peaks])]
+    inter_peaks = peaks[peaks > intra_peak]
+
+    if inter_peaks.size == 0:
+        return isi_cutoff
+
+    # Pick the following peak with the deepest valley, measured by the void parameter
+    valleys = np.array([intra_peak + np.argmin(counts[intra_peak:peak + 1]) for peak in inter_peaks])
+    void = 1 - counts[valleys] / np.sqrt(counts[intra_peak] * counts[inter_peaks])
+    best = np.argmax(void)
+
+    if void[best] < kwargs.get('min_void'):
+        return isi_cutoff
+
+    return min(centers[valleys[best]], isi_cutoff)
@@ -0,0 +1,108 @@
+import math
+import numpy as np
+from joblib import Parallel, delayed
+from scipy.sparse import csc_matrix
+
+from ... import parallel, utils
+
+def _parse_kwargs(**kwargs):
+    kwargs_list = [
+        {'key': 'bin_size', 'default': 1e-3 if kwargs.get('sampling_time', None) is not None else 20, 'type': float},
+        {'key': 'block_size', 'default': 2**16, 'type': int},
+        {'key': 'duration', 'default': None, 'type': float},
+        {'key': 'sampling_time', 'default': None, 'type': float}
+    ]
+    kwargs = utils.check_kwargs_list(kwargs_list, **kwargs)
+
+    return kwargs
+
+@utils.cacheable(_parse_kwargs)
+def lagged_coincidences(spikes:list, max_lag:float, n_jobs:int = None, **kwargs):
+    '''
+    Count the coincidences between the binned spikes of all the pairs of
+    channels, at each lag, by means of sparse matrix products, with parameters
+    specified either in the time domain or in samples.
+
+    Parameters
+    ----------
+    spikes : list of ndarray
+        A list of arrays containing the detected spikes of each channel. They
+        can be expressed both as spike trains or the indices at which spikes occur.
+    max_lag : float
+        The maximum lag, either in samples or in seconds. It is rounded down
+        to a whole number of bins.
+    n_jobs : int, optional
+        The number of threads. Time blocks are assigned to them in turn, so
+        that each thread processes blocks spread over the whole recording,
+        balancing periods of high and low activity. If not specified, the
+        value set by parallel.config is employed.
+    bin_size : float, optional
+        The size of a single bin, either in samples or in seconds.
+    duration : float, optional
+        The duration of the recording, either in samples or in seconds. If not
+        specified, the recording is assumed to end at the last spike.
+    block_size : int, default=65536
+        The number of bins processed at once.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, the algorithm
+        will work in the time domain (the other parameters should then be
+        specified in seconds). Otherwise, it will work with samples.
+
+    Returns
+    -------
+    coincidences : ndarray
+        A (n_lags x n_channels x n_channels) tensor, where the element [k, i, j]
+        is the sum over all bins t of the product between the spike counts of
+        channel i in bin t and of channel j in bin t + lags[k].
+    lags : ndarray
+        The lags, expressed in bins, from -max_lag to max_lag.
+    '''
+    kwargs = _parse_kwargs(**kwargs)
+
+    bin_size = utils.get_in_samples(kwargs.get('bin_size'), kwargs.get('sampling_time'))
+    n_max = math.floor(max_lag / kwargs.get('bin_size'))
+
+    spikes_bins = [utils.get_spikes_idxs(channel_spikes) // bin_size for channel_spikes in spikes]
+    n_channels = len(spikes_bins)
+
+    if kwargs.get('duration') is not None:
+        n_bins = utils.get_in_samples(kwargs.get('duration'), kwargs.get('sampling_time')) // bin_size
+    else:
+        n_bins = max([np.amax(channel_bins) + 1 for channel_bins in spikes_bins if channel_bins.size > 0], default=0)
+
+    # Binned spike counts as a sparse (n_channels x n_bins) matrix, sliced by columns
+    rows = np.repeat(np.arange(n_channels), [channel_bins.size for channel_bins in spikes_bins])
+    cols = np.concatenate([np.zeros(0, dtype=np.int64)] + spikes_bins)
+    is_inside = (cols >= 0) & (cols < n_bins)
+    counts = csc_matrix((np.ones(np.sum(is_inside), dtype=np.int64), (rows[is_inside], cols[is_inside])), shape=(n_channels, n_bins + n_max))
+    counts.sum_duplicates()
+
+    block_size = max(kwargs.get('block_size'), 1)
+    blocks = [(start, min(start + block_size, n_bins)) for start in range(0, n_bins, block_size)]
+    n_workers = max(min(parallel.get_n_jobs(n_jobs), len(blocks)), 1)
+    workers_blocks = [blocks[worker_idx::n_workers] for worker_idx in range(n_workers)]
+
+    if n_workers == 1:
+        out = [_compute_blocks(counts, workers_blocks[0], n_max)]
+    else:
+        out = Parallel(n_jobs=n_workers, prefer='threads')(delayed(_compute_blocks)(counts, worker_blocks, n_max) for worker_blocks in workers_blocks)
+
+    positive = np.sum(out, axis=0)
+
+    # Negative lags are the transposed counts of the corresponding positive lags
+    coincidences = np.concatenate((np.flip(np.transpose(positive[1:], (0, 2, 1)), axis=0), positive), axis=0)
+    lags = np.arange(-n_max, n_max + 1)
+
+    return coincidences, lags
+
+def _compute_blocks(counts, blocks, n_max):
+    n_channels = counts.shape[0]
+    coincidences = np.zeros((n_max + 1, n_channels, n_channels), dtype=np.int64)
+
+    for start, stop in blocks:
+        reference = counts[:, start:stop]
+        for lag in range(n_max + 1):
+            target = counts[:, start + lag:stop + lag]
+            coincidences[lag] += (reference @ target.T).toarray()
+
+    return coincidences
@@ -2,7 +2,12 @@ import math
 import numpy as np
 from ... import utils
 
+@utils.cacheable()
 def cross_correlation(reference_spike_train, target_spike_train, tau, window_length, sampling_time):    
+    # A packed train is compared with a boolean one by packing the latter
+    if isinstance(reference_spike_train, utils.PackedTrain) or isinstance(target_spike_train, utils.PackedTrain):
+        return _packed_cross_correlation(utils.as_packed_train(reference_spike_train), utils.as_packed_train(target_spike_train), tau, window_length, sampling_time)
+
     reference_length = np.size(reference_spike_train, 0)
     target_length = np.size(target_spike_train, 0)
     
@@ -32,3 +37,12 @@ def cross_correlation(reference_spike_train, target_spike_train, tau, window_len
     cross_correlation = cross_correlation.astype(np.int64)
 
     return cross_correlation
+
+def _packed_cross_correlation(reference_spike_train, target_spike_train, tau, window_length, sampling_time):
+    n_max = math.floor(window_length/tau)
+    tau = utils.get_in_samples(tau, sampling_time)
+
+    shifts = np.arange(-n_max, n_max+1) * tau
+    cross_correlation = reference_spike_train.coincidences(target_spike_train, shifts)
+
+    return cross_correlation
@@ -1,22 +1,31 @@
 import numpy as np
-from joblib import Parallel, delayed
 from scipy.interpolate import interp1d
 
+from ... import parallel, utils
+
+@utils.cacheable()
 def leader_follower(spikes, n_jobs=-1):
     n_trains = len(spikes)
-    pairs = [(n,m) for n in np.arange(n_trains) for m in np.arange(n_trains)]
 
     D = np.empty((n_trains, n_trains))
     D.fill(np.nan)
 
-    out = Parallel(n_jobs=n_jobs)(delayed(_compute_D_n_m)(spikes[n], spikes[m]) for n, m in pairs)
-    out = np.reshape(out, newshape=(n_trains, n_trains))
+    # Spike trains are shared once, each task computing a row of D
+    if parallel.get_n_jobs(n_jobs) == 1:
+        out = parallel.map_tasks(_compute_D_n, spikes, list(range(n_trains)), n_jobs)
+    else:
+        with parallel.SharedArrays(spikes) as shared_spikes:
+            out = parallel.map_tasks(_compute_D_n, shared_spikes, list(range(n_trains)), n_jobs)
+    out = np.reshape(out, (n_trains, n_trains))
 
     D[~np.isnan(out)] = out[~np.isnan(out)]
     np.fill_diagonal(D, np.nan)
 
     return D
 
+def _compute_D_n(spikes, n):
+    return [_compute_D_n_m(spikes[n], spikes[m]) for m in range(len(spikes))]
+
 def _compute_D_n_m(reference_spike_train, target_spike_train):
     if reference_spike_train.size > 1 and target_spike_train.size > 1:
         interp_func = interp1d(target_spike_train, target_spike_train, kind='nearest', fill_value='extrapolate', assume_sorted=True)
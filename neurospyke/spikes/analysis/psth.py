@@ -12,6 +12,7 @@ def _parse_kwargs(**kwargs):
 
     return kwargs
 
+@utils.cacheable(_parse_kwargs)
 def PSTH(data, duration:float, **kwargs):
     '''
     Count the number of spikes in bins over different trials according to the
@@ -61,6 +62,6 @@ def PSTH(data, duration:float, **kwargs):
 
     for bin_idx in range(n_bins): 
         idxs = np.arange(bin_idx*kwargs.get('bin_size'), bin_idx*kwargs.get('bin_size') + kwargs.get('bin_size'), dtype=np.int64)
-        spikes_count[:, bin_idx] = np.sum(trials[:, idxs])
+        spikes_count[:, bin_idx] = np.sum(trials[:, idxs], axis=1)
 
     return spikes_count
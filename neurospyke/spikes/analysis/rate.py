@@ -0,0 +1,168 @@
+import math
+import numpy as np
+from scipy.signal import fftconvolve, lfilter
+
+from ... import utils
+
+def _parse_kwargs(**kwargs):
+    in_seconds = kwargs.get('sampling_time', None) is not None
+    kwargs_list = [
+        {'key': 'bin_size', 'default': 1e-3 if in_seconds else 20, 'type': float},
+        {'key': 'chunk_size', 'default': None, 'type': int},
+        {'key': 'decimation', 'default': 1, 'type': int},
+        {'key': 'filename', 'default': None, 'type': str},
+        {'key': 'kernel', 'default': 'gaussian', 'type': str},
+        {'key': 'kernel_width', 'default': 0.02 if in_seconds else 400, 'type': float},
+        {'key': 'method', 'default': 'fft', 'type': str},
+        {'key': 'sampling_time', 'default': None, 'type': float}
+    ]
+    kwargs = utils.check_kwargs_list(kwargs_list, **kwargs)
+
+    # Additional checks
+    if kwargs.get('kernel') not in ['gaussian', 'exponential', 'boxcar']:
+        raise ValueError("'kernel' expected to be one of 'gaussian', 'exponential', 'boxcar', received '" + kwargs.get('kernel') + "'")
+    if kwargs.get('method') not in ['fft', 'iir']:
+        raise ValueError("'method' expected to be one of 'fft', 'iir', received '" + kwargs.get('method') + "'")
+    if (kwargs.get('method') == 'iir') and (kwargs.get('kernel') == 'gaussian'):
+        raise ValueError("'iir' method is available only for 'exponential' and 'boxcar' kernels")
+    if kwargs.get('decimation') < 1:
+        raise ValueError("'decimation' expected to be at least 1, received " + str(kwargs.get('decimation')))
+
+    return kwargs
+
+def firing_rate(spikes, duration:float, **kwargs):
+    '''
+    Estimate the instantaneous firing rate of one or more channels, by binning
+    the spikes and smoothing the counts with a kernel, either by FFT convolution
+    or by recursive filtering.
+
+    Parameters
+    ----------
+    spikes : ndarray or list of ndarray
+        An array containing the detected spikes. It can be expressed both
+        as a spike train or the indices at which spikes occur. Multiple
+        channels may be passed as a list of ndarray.
+    duration : float
+        The duration of the recording, either in samples or in seconds.
+    bin_size : float, optional
+        The size of a single bin, either in samples or in seconds.
+    kernel : {'gaussian', 'exponential', 'boxcar'}, default='gaussian'
+        The smoothing kernel. The gaussian and boxcar kernels are centered
+        on each bin, while the exponential kernel is causal.
+    kernel_width : float, optional
+        The standard deviation of the gaussian kernel, the time constant of the
+        exponential kernel or the width of the boxcar kernel, either in samples
+        or in seconds.
+    method : {'fft', 'iir'}, default='fft'
+        Smooth the counts by FFT convolution or by recursive filtering. The
+        latter is available only for the exponential and boxcar kernels.
+    decimation : int, default=1
+        Keep only one every decimation bins of the smoothed rate.
+    chunk_size : int, optional
+        The number of bins processed at once. If not specified, the whole
+        recording is processed at once, unless filename is specified.
+    filename : str, optional
+        A .npy file where the rate is written chunk by chunk. The returned
+        array is then memory-mapped from such file.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, the algorithm
+        will work in the time domain (the other parameters should then be
+        specified in seconds) and the rate is expressed in spikes per second.
+        Otherwise, it will work with samples and the rate is expressed in spikes
+        per sample.
+
+    Returns
+    -------
+    rate : ndarray
+        A (n_channels x n_bins) float32 matrix containing the firing rate of each
+        channel. If a single array of spikes is passed, a 1-D array is returned.
+    '''
+    kwargs = _parse_kwargs(**kwargs)
+
+    is_single = isinstance(spikes, np.ndarray) and (len(spikes.squeeze().shape) <= 1)
+    if is_single:
+        spikes = [spikes]
+
+    duration = utils.get_in_samples(duration, kwargs.get('sampling_time'))
+    bin_size = utils.get_in_samples(kwargs.get('bin_size'), kwargs.get('sampling_time'))
+    kernel_width = kwargs.get('kernel_width') / kwargs.get('bin_size')
+    decimation = kwargs.get('decimation')
+
+    n_channels = len(spikes)
+    n_bins = duration // bin_size
+    n_out = math.ceil(n_bins / decimation)
+
+    # Each channel is reduced to the sorted indices of the bins its spikes fall into
+    spikes_bins = [np.sort(utils.get_spikes_idxs(channel_spikes)) // bin_size for channel_spikes in spikes]
+
+    kernel, origin = _get_kernel(kwargs.get('kernel'), kernel_width)
+    scale = 1 / (bin_size * kwargs.get('sampling_time')) if kwargs.get('sampling_time') is not None else 1 / bin_size
+
+    chunk_size = kwargs.get('chunk_size')
+    if chunk_size is None:
+        chunk_size = 2**18 if kwargs.get('filename') is not None else max(n_bins, 1)
+    chunk_size = decimation * max(math.ceil(chunk_size / decimation), 1)
+
+    if kwargs.get('filename') is not None:
+        rate = np.lib.format.open_memmap(kwargs.get('filename'), mode='w+', dtype=np.float32, shape=(n_channels, n_out))
+    else:
+        rate = np.zeros((n_channels, n_out), dtype=np.float32)
+
+    zi = np.zeros((n_channels, 1))
+
+    for chunk_start in range(0, n_bins, chunk_size):
+        chunk_stop = min(chunk_start + chunk_size, n_bins)
+
+        if (kwargs.get('method') == 'iir') and (kwargs.get('kernel') == 'exponential'):
+            # Causal recursive filter carrying its state from one chunk to the next
+            decay = math.exp(-1 / kernel_width)
+            counts = _bin_spikes(spikes_bins, chunk_start, chunk_stop, n_bins)
+            chunk_rate, zi = lfilter([1 - decay], [1, -decay], counts, axis=1, zi=zi)
+        else:
+            # Extend the chunk by the kernel support, so that consecutive chunks join seamlessly
+            counts = _bin_spikes(spikes_bins, chunk_start - (kernel.size - 1 - origin), chunk_stop + origin, n_bins)
+            if kwargs.get('method') == 'iir':
+                cumulative = np.concatenate((np.zeros((n_channels, 1)), np.cumsum(counts, axis=1, dtype=np.float64)), axis=1)
+                chunk_rate = (cumulative[:, kernel.size:] - cumulative[:, :-kernel.size]) / kernel.size
+            else:
+                chunk_rate = fftconvolve(counts, kernel[np.newaxis, :].astype(np.float32), mode='valid', axes=1)
+
+        rate[:, chunk_start // decimation:math.ceil(chunk_stop / decimation)] = scale * chunk_rate[:, ::decimation]
+
+    if isinstance(rate, np.memmap):
+        rate.flush()
+
+    if is_single:
+        rate = rate[0]
+
+    return rate
+
+def _get_kernel(name, width):
+    # Return the normalized kernel, expressed in bins, along with the index of its origin
+    if name == 'gaussian':
+        half_length = max(math.ceil(4 * width), 1)
+        times = np.arange(-half_length, half_length + 1)
+        kernel = np.exp(-0.5 * (times / width)**2)
+        origin = half_length
+    elif name == 'exponential':
+        times = np.arange(0, max(math.ceil(8 * width), 1) + 1)
+        kernel = np.exp(-times / width)
+        origin = 0
+    else:
+        length = max(int(round(width)), 1)
+        kernel = np.ones(length)
+        origin = (length - 1) // 2
+
+    kernel = kernel / np.sum(kernel)
+
+    return kernel, origin
+
+def _bin_spikes(spikes_bins, start, stop, n_bins):
+    # Count the spikes in the bins [start, stop), which are empty outside of [0, n_bins)
+    counts = np.zeros((len(spikes_bins), stop - start), dtype=np.float32)
+
+    for channel_idx, channel_bins in enumerate(spikes_bins):
+        first, last = np.searchsorted(channel_bins, [max(start, 0), min(stop, n_bins)])
+        counts[channel_idx] = np.bincount(channel_bins[first:last] - start, minlength=stop - start)
+
+    return counts
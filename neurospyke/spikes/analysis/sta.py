@@ -0,0 +1,119 @@
+import numpy as np
+
+from ... import utils
+
+def _parse_kwargs(**kwargs):
+    kwargs_list = [
+        {'key': 'chunk_size', 'default': 2**20, 'type': int},
+        {'key': 'sampling_time', 'default': None, 'type': float},
+        {'key': 'window_length', 'default': 0.001 if kwargs.get('sampling_time', None) is not None else 20, 'type': float}
+    ]
+    kwargs = utils.check_kwargs_list(kwargs_list, **kwargs)
+
+    return kwargs
+
+@utils.cacheable(_parse_kwargs)
+def spike_triggered_average(data:np.ndarray, spikes, **kwargs):
+    '''
+    Compute the average, and the standard deviation, of the data surrounding
+    the spikes of one or more sources, for each of the channels of the data.
+    The data are streamed in chunks, accumulating sums and sums of squares,
+    so that the windows surrounding each spike are never stored at once.
+    This is useful for instance with memory-mapped recordings.
+
+    Parameters
+    ----------
+    data : ndarray
+        A (n_channels x n_samples) matrix of recorded data, such as LFP or
+        stimulus channels. Otherwise, an array containing a single channel.
+    spikes : ndarray or list of ndarray
+        An array containing the detected spikes. It can be expressed both
+        as a spike train or the indices at which spikes occur. Multiple
+        sources may be passed as a list of ndarray.
+    window_length : float, optional
+        The length of the window surrounding each spike, expressed in seconds
+        or samples.
+    chunk_size : int, default=1048576
+        The number of samples of data processed at once.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, the algorithm
+        will work in the time domain (the other parameters should then be
+        specified in seconds). Otherwise, it will work with samples.
+
+    Returns
+    -------
+    average : ndarray
+        A (n_sources x n_channels x n_window_samples) matrix containing the spike-triggered
+        average of each source on each channel. The source and channel axes are
+        dropped when a single array of spikes or a single channel is passed.
+    std : ndarray
+        The standard deviation, with the same shape of average.
+    spikes_count : ndarray
+        The number of spikes averaged for each source. Spikes whose window
+        falls partially outside of the data are ignored.
+    '''
+    kwargs = _parse_kwargs(**kwargs)
+
+    is_single_channel = len(data.shape) == 1
+    if is_single_channel:
+        data = data[np.newaxis, :]
+
+    is_single_source = isinstance(spikes, np.ndarray) and (len(spikes.squeeze().shape) <= 1)
+    if is_single_source:
+        spikes = [spikes]
+
+    (n_channels, n_samples) = data.shape
+    n_sources = len(spikes)
+    window_half_length = utils.get_in_samples(kwargs.get('window_length') / 2, kwargs.get('sampling_time'))
+    windows_samples = np.arange(-window_half_length, window_half_length)
+    chunk_size = max(kwargs.get('chunk_size'), 1)
+
+    # Merge all the sources into a single stream of spikes sorted by time
+    spikes_idxs = [utils.get_spikes_idxs(source_spikes) for source_spikes in spikes]
+    sources = np.repeat(np.arange(n_sources), [source_idxs.size for source_idxs in spikes_idxs])
+    spikes_idxs = np.concatenate([np.zeros(0, dtype=np.int64)] + spikes_idxs)
+    is_inside = (spikes_idxs - window_half_length >= 0) & (spikes_idxs + window_half_length <= n_samples)
+    order = np.argsort(spikes_idxs[is_inside], kind='stable')
+    spikes_idxs = spikes_idxs[is_inside][order]
+    sources = sources[is_inside][order]
+
+    sums = np.zeros((n_sources, n_channels, windows_samples.size))
+    squares = np.zeros((n_sources, n_channels, windows_samples.size))
+    spikes_count = np.bincount(sources, minlength=n_sources).astype(np.int64)
+
+    for chunk_start in range(0, n_samples, chunk_size):
+        first, last = np.searchsorted(spikes_idxs, [chunk_start, chunk_start + chunk_size])
+        if first == last:
+            continue
+
+        # Read the chunk along with the halo required by the windows of its spikes
+        block_start = max(chunk_start - window_half_length, 0)
+        block_stop = min(chunk_start + chunk_size + window_half_length, n_samples)
+        block = np.asarray(data[:, block_start:block_stop], dtype=np.float64)
+
+        # Group the spikes of the chunk by source, so that each group is reduced at once
+        order = np.argsort(sources[first:last], kind='stable')
+        chunk_idxs = spikes_idxs[first:last][order] - block_start
+        chunk_sources = sources[first:last][order]
+        groups_start = np.flatnonzero(np.diff(chunk_sources, prepend=-1))
+        groups_source = chunk_sources[groups_start]
+
+        for sample_idx, window_sample in enumerate(windows_samples):
+            values = block[:, chunk_idxs + window_sample]
+            sums[groups_source, :, sample_idx] += np.add.reduceat(values, groups_start, axis=1).T
+            squares[groups_source, :, sample_idx] += np.add.reduceat(values**2, groups_start, axis=1).T
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        average = sums / spikes_count[:, np.newaxis, np.newaxis]
+        std = np.sqrt(np.maximum(squares / spikes_count[:, np.newaxis, np.newaxis] - average**2, 0))
+
+    if is_single_channel:
+        average = average[:, 0, :]
+        std = std[:, 0, :]
+
+    if is_single_source:
+        average = average[0]
+        std = std[0]
+        spikes_count = spikes_count[0]
+
+    return average, std, spikes_count
@@ -0,0 +1,262 @@
+import math
+import numpy as np
+from joblib import Parallel, delayed
+
+from ... import utils
+
+def _parse_kwargs(**kwargs):
+    kwargs_list = [
+        {'key': 'duration', 'default': None, 'type': float},
+        {'key': 'jitter_window', 'default': 0.01 if kwargs.get('sampling_time', None) is not None else 200, 'type': float},
+        {'key': 'sampling_time', 'default': None, 'type': float}
+    ]
+    kwargs = utils.check_kwargs_list(kwargs_list, **kwargs)
+
+    return kwargs
+
+def generate_surrogates(spikes:np.ndarray, n_surrogates:int, method:str = 'jitter', random_state:int = None, **kwargs):
+    '''
+    Generate a batch of surrogate spike trains from the detected spikes,
+    with parameters specified either in the time domain or in samples.
+
+    Parameters
+    ----------
+    spikes : ndarray
+        An array containing the detected spikes. It can be expressed both
+        as a spike train or the indices at which spikes occur.
+    n_surrogates : int
+        The number of surrogate spike trains to generate.
+    method : {'jitter', 'dither', 'isi_shuffle'}, default='jitter'
+        The surrogate generation method. 'jitter' moves each spike at random
+        inside its window of jitter_window length, preserving the spike count
+        of each window. 'dither' moves each spike at random by at most
+        jitter_window in both directions. 'isi_shuffle' shuffles the
+        Inter-Spike-Intervals, preserving the first spike.
+    random_state : int, optional
+        Random seed used to initialize the pseudo-random number generator to allow
+        reproducibility.
+    jitter_window : float, optional
+        The jitter window or the maximum dither, expressed in seconds or samples.
+    duration : float, optional
+        The duration of the recording, either in samples or in seconds. If
+        specified, dithered spikes are kept inside the recording.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, the algorithm
+        will work in the time domain (the other parameters should then be
+        specified in seconds). Otherwise, it will work with samples.
+
+    Returns
+    -------
+    surrogates : ndarray
+        A (n_surrogates x n_spikes) matrix where each row contains the sorted
+        indices of the spikes of a surrogate spike train.
+    '''
+    kwargs = _parse_kwargs(**kwargs)
+    rng = np.random.RandomState(random_state)
+
+    spikes_idxs = utils.get_spikes_idxs(spikes)
+    jitter_window = max(utils.get_in_samples(kwargs.get('jitter_window'), kwargs.get('sampling_time')), 1)
+    n_spikes = spikes_idxs.size
+
+    if method == 'jitter':
+        windows_start = (spikes_idxs // jitter_window) * jitter_window
+        surrogates = windows_start + rng.randint(0, jitter_window, size=(n_surrogates, n_spikes))
+    elif method == 'dither':
+        surrogates = spikes_idxs + rng.randint(-jitter_window, jitter_window + 1, size=(n_surrogates, n_spikes))
+        surrogates = np.maximum(surrogates, 0)
+        if kwargs.get('duration') is not None:
+            duration = utils.get_in_samples(kwargs.get('duration'), kwargs.get('sampling_time'))
+            surrogates = np.minimum(surrogates, duration - 1)
+    elif method == 'isi_shuffle':
+        IEI = utils.get_IEI(spikes_idxs)
+        permutations = np.argsort(rng.random_sample((n_surrogates, IEI.size)), axis=1)
+        surrogates = spikes_idxs[:1] + np.concatenate((np.zeros((n_surrogates, min(n_spikes, 1)), dtype=np.int64), np.cumsum(IEI[permutations], axis=1)), axis=1)
+    else:
+        raise ValueError("'method' expected to be one of 'jitter', 'dither', 'isi_shuffle', received '" + str(method) + "'")
+
+    surrogates = np.sort(surrogates, axis=1).astype(np.int64)
+
+    return surrogates
+
+def surrogate_test(statistic, spikes:np.ndarray, n_surrogates:int = 1000, method:str = 'jitter', alpha:float = 0.05, batch_size:int = 100, n_jobs:int = 1, random_state:int = None, **kwargs):
+    '''
+    Evaluate a statistic over surrogate spike trains, to obtain the
+    pointwise confidence bands of the statistic under the null hypothesis
+    destroyed by the surrogates.
+
+    Parameters
+    ----------
+    statistic : callable
+        A function receiving a (n_batch x n_spikes) matrix of spike indices,
+        as returned by generate_surrogates, and returning a (n_batch x ...)
+        array with the statistic of each row. batch_cross_correlation and
+        batch_PSTH can be used through functools.partial. When n_jobs is
+        not 1, the function must be picklable.
+    spikes : ndarray
+        An array containing the detected spikes. It can be expressed both
+        as a spike train or the indices at which spikes occur.
+    n_surrogates : int, default=1000
+        The overall number of surrogate spike trains.
+    method : {'jitter', 'dither', 'isi_shuffle'}, default='jitter'
+        The surrogate generation method. Refer to generate_surrogates.
+    alpha : float, default=0.05
+        The significance level of the confidence bands.
+    batch_size : int, default=100
+        The number of surrogates generated and evaluated at once.
+    n_jobs : int, default=1
+        The number of parallel processes evaluating the batches.
+    random_state : int, optional
+        Random seed used to initialize the pseudo-random number generator to allow
+        reproducibility.
+    jitter_window : float, optional
+        The jitter window or the maximum dither, expressed in seconds or samples.
+    duration : float, optional
+        The duration of the recording, either in samples or in seconds.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, the algorithm
+        will work in the time domain (the other parameters should then be
+        specified in seconds). Otherwise, it will work with samples.
+
+    Returns
+    -------
+    observed : ndarray
+        The statistic evaluated on the input spikes.
+    lower : ndarray
+        The lower bound of the confidence band.
+    upper : ndarray
+        The upper bound of the confidence band.
+    '''
+    rng = np.random.RandomState(random_state)
+
+    spikes_idxs = utils.get_spikes_idxs(spikes)
+    n_batches = math.ceil(n_surrogates / batch_size)
+    batches_size = [min(batch_size, n_surrogates - batch_idx * batch_size) for batch_idx in range(n_batches)]
+    seeds = rng.randint(0, np.iinfo(np.int32).max, size=n_batches)
+
+    if n_jobs == 1:
+        out = [_evaluate_batch(statistic, spikes_idxs, size, method, seed, **kwargs) for size, seed in zip(batches_size, seeds)]
+    else:
+        out = Parallel(n_jobs=n_jobs)(delayed(_evaluate_batch)(statistic, spikes_idxs, size, method, seed, **kwargs) for size, seed in zip(batches_size, seeds))
+
+    values = np.concatenate(out, axis=0)
+    observed = np.asarray(statistic(spikes_idxs[np.newaxis, :]))[0]
+    lower = np.percentile(values, 100 * alpha / 2, axis=0)
+    upper = np.percentile(values, 100 * (1 - alpha / 2), axis=0)
+
+    return observed, lower, upper
+
+def batch_cross_correlation(reference_spikes:np.ndarray, surrogates:np.ndarray, tau:float, window_length:float, sampling_time:float = None):
+    '''
+    Compute the cross-correlation between a reference spike train and each
+    row of a batch of spike trains, at once. The result of each row is the same
+    as the one of cross_correlation.
+
+    Parameters
+    ----------
+    reference_spikes : ndarray
+        An array containing the spikes of the reference train. It can be expressed
+        both as a spike train or the indices at which spikes occur.
+    surrogates : ndarray
+        A (n_batch x n_spikes) matrix where each row contains the sorted indices
+        of the spikes of a target train.
+    tau : float
+        The lag step, either in samples or in seconds.
+    window_length : float
+        The maximum lag, either in samples or in seconds.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, the algorithm
+        will work in the time domain (the other parameters should then be
+        specified in seconds). Otherwise, it will work with samples.
+
+    Returns
+    -------
+    cross_correlation : ndarray
+        A (n_batch x n_lags) matrix containing the cross-correlation of each row.
+    '''
+    reference_idxs = utils.get_spikes_idxs(reference_spikes)
+    surrogates = np.atleast_2d(surrogates).astype(np.int64)
+    n_batch = surrogates.shape[0]
+
+    n_max = math.floor(window_length/tau)
+    tau = utils.get_in_samples(tau, sampling_time)
+    n_lags = 2 * n_max + 1
+    max_lag = n_max * tau
+
+    # Place the rows one after the other, far enough apart not to interact
+    span = max(np.amax(surrogates, initial=0), np.amax(reference_idxs, initial=0)) + 2 * max_lag + 1
+    offsets = np.arange(n_batch, dtype=np.int64)[:, np.newaxis] * span
+    targets = (surrogates + offsets).ravel()
+    queries = (reference_idxs[np.newaxis, :] + offsets).ravel()
+
+    # Enumerate all the (reference, target) pairs closer than the maximum lag
+    first = np.searchsorted(targets, queries - max_lag, side='left')
+    last = np.searchsorted(targets, queries + max_lag, side='right')
+    n_pairs = last - first
+    pairs_query = np.repeat(np.arange(queries.size), n_pairs)
+    pairs_target = np.arange(np.sum(n_pairs)) - np.repeat(np.cumsum(n_pairs) - n_pairs, n_pairs) + np.repeat(first, n_pairs)
+
+    # A target spike at reference - k*tau contributes to the lag k
+    distances = queries[pairs_query] - targets[pairs_target]
+    is_lag = (distances % tau) == 0
+    lags = distances[is_lag] // tau + n_max
+    rows = pairs_query[is_lag] // reference_idxs.size
+
+    cross_correlation = np.bincount(rows * n_lags + lags, minlength=n_batch * n_lags).reshape(n_batch, n_lags).astype(np.int64)
+
+    return cross_correlation
+
+def batch_PSTH(surrogates:np.ndarray, stimuli:np.ndarray, duration:float, bin_size:float = None, sampling_time:float = None):
+    '''
+    Count the number of spikes in the bins following each stimulus, summed
+    over all trials, for each row of a batch of spike trains at once. Spikes
+    belong to the trial of the preceding stimulus, as in get_trials.
+
+    Parameters
+    ----------
+    surrogates : ndarray
+        A (n_batch x n_spikes) matrix where each row contains the sorted indices
+        of the spikes of a spike train.
+    stimuli : ndarray
+        An array containing the stimuli determining the start of a new trial.
+        It can be expressed both as a train of stimuli or the indices at which
+        stimuli occur.
+    duration : float
+        The duration of a trial, either in samples or in seconds.
+    bin_size : float, optional
+        The size of a single bin, either in samples or in seconds.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, the algorithm
+        will work in the time domain (the other parameters should then be
+        specified in seconds). Otherwise, it will work with samples.
+
+    Returns
+    -------
+    spikes_count : ndarray
+        A (n_batch x n_bins) matrix containing the number of spikes in each bin,
+        summed over all the trials.
+    '''
+    if bin_size is None:
+        bin_size = 1e-3 if sampling_time is not None else 20
+
+    surrogates = np.atleast_2d(surrogates).astype(np.int64)
+    stimuli_idxs = utils.get_spikes_idxs(stimuli)
+    n_batch = surrogates.shape[0]
+
+    duration = utils.get_in_samples(duration, sampling_time)
+    bin_size = utils.get_in_samples(bin_size, sampling_time)
+    n_bins = duration // bin_size
+
+    trials = np.searchsorted(stimuli_idxs, surrogates, side='right') - 1
+    delays = surrogates - stimuli_idxs[np.maximum(trials, 0)]
+    bins = delays // bin_size
+    is_counted = (trials >= 0) & (delays < duration) & (bins < n_bins)
+
+    rows = np.broadcast_to(np.arange(n_batch)[:, np.newaxis], surrogates.shape)
+    spikes_count = np.bincount(rows[is_counted] * n_bins + bins[is_counted], minlength=n_batch * n_bins).reshape(n_batch, n_bins)
+
+    return spikes_count.astype(np.int64)
+
+def _evaluate_batch(statistic, spikes_idxs, n_surrogates, method, seed, **kwargs):
+    surrogates = generate_surrogates(spikes_idxs, n_surrogates, method=method, random_state=seed, **kwargs)
+
+    return np.asarray(statistic(surrogates))
@@ -0,0 +1,202 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from ... import parallel, utils
+
+def _parse_kwargs(**kwargs):
+    kwargs_list = [
+        {'key': 'block_size', 'default': 32, 'type': int},
+        {'key': 'duration', 'default': None, 'type': float},
+        {'key': 'sampling_time', 'default': None, 'type': float},
+        {'key': 'threshold', 'default': None, 'type': float}
+    ]
+    kwargs = utils.check_kwargs_list(kwargs_list, **kwargs)
+
+    return kwargs
+
+@utils.cacheable(_parse_kwargs)
+def STTC(spikes:list, dt:float, n_jobs:int = None, **kwargs):
+    '''
+    Compute the Spike Time Tiling Coefficient (STTC) between all the pairs
+    of spike trains, with parameters specified either in the time domain
+    or in samples.
+
+    Parameters
+    ----------
+    spikes : list of ndarray
+        A list of arrays containing the detected spikes of each channel. They
+        can be expressed both as spike trains or the indices at which spikes occur.
+    dt : float
+        The synchrony window: two spikes closer than dt are considered coincident.
+        Expressed in seconds or samples.
+    n_jobs : int, optional
+        The number of parallel jobs, each processing a block of pairs.
+        If not specified, the value set by parallel.config is employed.
+    duration : float, optional
+        The duration of the recording, either in samples or in seconds. If not
+        specified, the recording is assumed to end at the last spike.
+    threshold : float, optional
+        If specified, only the coefficients greater or equal than threshold are
+        returned, as a sparse matrix.
+    block_size : int, default=32
+        The number of channels of each side of a block of pairs.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, the algorithm
+        will work in the time domain (the other parameters should then be
+        specified in seconds). Otherwise, it will work with samples.
+
+    Returns
+    -------
+    STTC : ndarray or scipy.sparse.csr_matrix
+        A (n_channels x n_channels) symmetric matrix containing the STTC of each
+        pair. The diagonal is set to 1, while pairs involving empty trains are NaN.
+
+    References
+    ----------
+    [1] Cutts, C. S., & Eglen, S. J. (2014). Detecting Pairwise Correlations in Spike Trains: An Objective Comparison of Methods and Application to the Study of Retinal Waves. Journal of Neuroscience, 34(43), 14288–14303. https://doi.org/10.1523/jneurosci.2767-14.2014
+    '''
+    kwargs = _parse_kwargs(**kwargs)
+
+    dt = utils.get_in_samples(dt, kwargs.get('sampling_time'))
+    spikes_idxs = [np.sort(utils.get_spikes_idxs(channel_spikes)) for channel_spikes in spikes]
+
+    if kwargs.get('duration') is not None:
+        duration = utils.get_in_samples(kwargs.get('duration'), kwargs.get('sampling_time'))
+    else:
+        duration = max([channel_idxs[-1] + 1 for channel_idxs in spikes_idxs if channel_idxs.size > 0], default=1)
+
+    # Fraction of the recording tiled by the synchrony window around the spikes of each channel
+    T = np.array([_compute_tiling(channel_idxs, dt, duration) for channel_idxs in spikes_idxs])
+    P, _ = _compute_pairs(spikes_idxs, dt, n_jobs, kwargs.get('block_size'))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        PT = P * T[np.newaxis, :]
+        terms = np.where(PT == 1, 1, (P - T[np.newaxis, :]) / (1 - PT))
+        sttc = 0.5 * (terms + terms.T)
+
+    np.fill_diagonal(sttc, 1)
+    is_empty = np.array([channel_idxs.size == 0 for channel_idxs in spikes_idxs])
+    sttc[is_empty, :] = np.nan
+    sttc[:, is_empty] = np.nan
+
+    if kwargs.get('threshold') is not None:
+        sttc = _threshold_matrix(sttc, kwargs.get('threshold'))
+
+    return sttc
+
+@utils.cacheable(_parse_kwargs)
+def coincidence_matrix(spikes:list, dt:float, n_jobs:int = None, **kwargs):
+    '''
+    Count the coincident spikes between all the pairs of spike trains, i.e.
+    the number of pairs of spikes closer than dt, with parameters specified
+    either in the time domain or in samples.
+
+    Parameters
+    ----------
+    spikes : list of ndarray
+        A list of arrays containing the detected spikes of each channel. They
+        can be expressed both as spike trains or the indices at which spikes occur.
+    dt : float
+        The synchrony window: two spikes closer than dt are considered coincident.
+        Expressed in seconds or samples.
+    n_jobs : int, optional
+        The number of parallel jobs, each processing a block of pairs.
+        If not specified, the value set by parallel.config is employed.
+    threshold : float, optional
+        If specified, only the counts greater or equal than threshold are
+        returned, as a sparse matrix.
+    block_size : int, default=32
+        The number of channels of each side of a block of pairs.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, the algorithm
+        will work in the time domain (the other parameters should then be
+        specified in seconds). Otherwise, it will work with samples.
+
+    Returns
+    -------
+    coincidences : ndarray or scipy.sparse.csr_matrix
+        A (n_channels x n_channels) symmetric matrix containing the number of
+        coincidences of each pair. The diagonal is set to 0.
+    '''
+    kwargs = _parse_kwargs(**kwargs)
+
+    dt = utils.get_in_samples(dt, kwargs.get('sampling_time'))
+    spikes_idxs = [np.sort(utils.get_spikes_idxs(channel_spikes)) for channel_spikes in spikes]
+
+    _, coincidences = _compute_pairs(spikes_idxs, dt, n_jobs, kwargs.get('block_size'))
+
+    if kwargs.get('threshold') is not None:
+        coincidences = _threshold_matrix(coincidences, kwargs.get('threshold'))
+
+    return coincidences
+
+def _compute_tiling(spikes_idxs, dt, duration):
+    if spikes_idxs.size == 0:
+        return 0
+
+    # Tiles are sorted, so each one only adds the part not covered by the previous ones
+    tiles_start = np.clip(spikes_idxs - dt, 0, duration)
+    tiles_stop = np.clip(spikes_idxs + dt, 0, duration)
+    previous_stop = np.concatenate(([0], tiles_stop[:-1]))
+    covered = np.sum(np.maximum(tiles_stop - np.maximum(tiles_start, previous_stop), 0))
+
+    return covered / duration
+
+def _compute_pairs(spikes_idxs, dt, n_jobs, block_size):
+    # Split the upper triangle of the pairs matrix into square blocks of channels
+    n_trains = len(spikes_idxs)
+    block_size = max(block_size, 1)
+    blocks = [(start, min(start + block_size, n_trains)) for start in range(0, n_trains, block_size)]
+    tasks = [(rows, cols) for rows_idx, rows in enumerate(blocks) for cols in blocks[rows_idx:]]
+
+    if parallel.get_n_jobs(n_jobs) == 1:
+        out = parallel.map_tasks(_compute_task, spikes_idxs, tasks, n_jobs, dt=dt)
+    else:
+        with parallel.SharedArrays(spikes_idxs) as shared_spikes:
+            out = parallel.map_tasks(_compute_task, shared_spikes, tasks, n_jobs, dt=dt)
+
+    P = np.zeros((n_trains, n_trains))
+    coincidences = np.zeros((n_trains, n_trains), dtype=np.int64)
+
+    for (rows, cols), (block_P, block_P_T, block_coincidences) in zip(tasks, out):
+        P[rows[0]:rows[1], cols[0]:cols[1]] = block_P
+        P[cols[0]:cols[1], rows[0]:rows[1]] = block_P_T
+        coincidences[rows[0]:rows[1], cols[0]:cols[1]] = block_coincidences
+        coincidences[cols[0]:cols[1], rows[0]:rows[1]] = block_coincidences.T
+
+    np.fill_diagonal(coincidences, 0)
+
+    return P, coincidences
+
+def _compute_task(spikes_idxs, task, dt):
+    (rows, cols) = task
+
+    return _compute_block(spikes_idxs[rows[0]:rows[1]], spikes_idxs[cols[0]:cols[1]], dt)
+
+def _compute_block(references, targets, dt):
+    block_P = np.zeros((len(references), len(targets)))
+    block_P_T = np.zeros((len(targets), len(references)))
+    block_coincidences = np.zeros((len(references), len(targets)), dtype=np.int64)
+
+    for reference_idx, reference in enumerate(references):
+        for target_idx, target in enumerate(targets):
+            if reference.size == 0 or target.size == 0:
+                continue
+
+            # Number of target spikes inside the synchrony window of each reference spike
+            first = np.searchsorted(target, reference - dt, side='left')
+            last = np.searchsorted(target, reference + dt, side='right')
+            block_coincidences[reference_idx, target_idx] = np.sum(last - first)
+            block_P[reference_idx, target_idx] = np.mean(last > first)
+
+            first = np.searchsorted(reference, target - dt, side='left')
+            last = np.searchsorted(reference, target + dt, side='right')
+            block_P_T[target_idx, reference_idx] = np.mean(last > first)
+
+    return block_P, block_P_T, block_coincidences
+
+def _threshold_matrix(matrix, threshold):
+    matrix = np.where(matrix >= threshold, matrix, 0)
+    np.fill_diagonal(matrix, 0)
+
+    return csr_matrix(matrix)
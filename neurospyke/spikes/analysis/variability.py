@@ -0,0 +1,158 @@
+import numpy as np
+
+from ... import utils
+
+def _parse_kwargs(**kwargs):
+    kwargs_list = [
+        {'key': 'bin_size', 'default': None, 'type': float},
+        {'key': 'offset', 'default': 0, 'type': float},
+        {'key': 'sampling_time', 'default': None, 'type': float}
+    ]
+    kwargs = utils.check_kwargs_list(kwargs_list, **kwargs)
+
+    return kwargs
+
+@utils.cacheable(_parse_kwargs)
+def trials_spikes_count(spikes, events:np.ndarray, duration:float, **kwargs):
+    '''
+    Count the spikes of all the units in consecutive windows of each trial,
+    with parameters specified either in the time domain or in samples.
+
+    Parameters
+    ----------
+    spikes : ndarray or list of ndarray
+        An array containing the detected spikes. It can be expressed both
+        as a spike train or the indices at which spikes occur. Multiple
+        units may be passed as a list of ndarray.
+    events : ndarray
+        An array containing the events determining the start of a new trial.
+        It can be expressed both as a event train or the indices at which events occur.
+    duration : float
+        The duration of a trial, either in samples or in seconds.
+    bin_size : float, optional
+        The size of a single window, either in samples or in seconds. If not
+        specified, each trial is made of a single window.
+    offset : float, default=0
+        The start of the trial with respect to its event, either in samples or
+        in seconds. Negative values allow including a pre-event baseline.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, the algorithm
+        will work in the time domain (the other parameters should then be
+        specified in seconds). Otherwise, it will work with samples.
+
+    Returns
+    -------
+    spikes_count : ndarray
+        A (n_units x n_trials x n_windows) tensor containing the number of spikes
+        of each unit in each window of each trial. Unlike get_trials, trials
+        may overlap, and a spike is then counted in every trial containing it.
+    '''
+    kwargs = _parse_kwargs(**kwargs)
+
+    if isinstance(spikes, np.ndarray) and (len(spikes.squeeze().shape) <= 1):
+        spikes = [spikes]
+
+    duration = utils.get_in_samples(duration, kwargs.get('sampling_time'))
+    bin_size = utils.get_in_samples(kwargs.get('bin_size'), kwargs.get('sampling_time')) if kwargs.get('bin_size') is not None else duration
+    offset = utils.get_in_samples(kwargs.get('offset'), kwargs.get('sampling_time'))
+    n_windows = duration // bin_size
+
+    events_idxs = utils.get_spikes_idxs(events)
+
+    # The edges of all the windows of all the trials, searched at once in each unit
+    edges = events_idxs[:, np.newaxis] + offset + bin_size * np.arange(n_windows + 1)[np.newaxis, :]
+
+    spikes_count = np.zeros((len(spikes), events_idxs.size, n_windows), dtype=np.int64)
+    for unit_idx, unit_spikes in enumerate(spikes):
+        spikes_idxs = np.sort(utils.get_spikes_idxs(unit_spikes))
+        spikes_count[unit_idx] = np.diff(np.searchsorted(spikes_idxs, edges, side='left'), axis=1)
+
+    return spikes_count
+
+def fano_factor(spikes_count:np.ndarray, conditions:np.ndarray = None):
+    '''
+    Compute the Fano factor, i.e. the ratio between the variance and the mean
+    of the spike counts across trials, for each unit and window.
+
+    Parameters
+    ----------
+    spikes_count : ndarray
+        A (n_units x n_trials x n_windows) tensor of spike counts, as returned
+        by trials_spikes_count.
+    conditions : ndarray, optional
+        An array containing the stimulus condition of each trial. If specified,
+        the Fano factor is computed separately for each condition.
+
+    Returns
+    -------
+    fano : ndarray
+        A (n_units x n_windows) matrix containing the Fano factor of each unit and
+        window, or a (n_units x n_conditions x n_windows) tensor if conditions is
+        specified. Conditions are sorted as in np.unique.
+    '''
+    spikes_count = np.asarray(spikes_count, dtype=np.float64)
+
+    if conditions is None:
+        mean = np.mean(spikes_count, axis=1)
+        variance = np.var(spikes_count, axis=1, ddof=1)
+    else:
+        mean, variance, _ = _get_conditions_moments(spikes_count, conditions)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fano = variance / mean
+
+    return fano
+
+def noise_correlation(spikes_count:np.ndarray, conditions:np.ndarray = None):
+    '''
+    Compute the noise correlation between all the pairs of units, i.e. the
+    correlation across trials of the total spike counts of a trial, once the
+    mean response to each stimulus condition has been removed.
+
+    Parameters
+    ----------
+    spikes_count : ndarray
+        A (n_units x n_trials x n_windows) tensor of spike counts, as returned
+        by trials_spikes_count.
+    conditions : ndarray, optional
+        An array containing the stimulus condition of each trial. If specified,
+        the counts are z-scored within each condition before computing the
+        correlation. Otherwise, all trials are assumed to share one condition.
+
+    Returns
+    -------
+    correlation : ndarray
+        A (n_units x n_units) matrix containing the noise correlation of each
+        pair of units. Units with constant counts give NaN.
+    '''
+    spikes_count = np.asarray(spikes_count, dtype=np.float64)
+    totals = np.sum(spikes_count, axis=2)[:, :, np.newaxis]
+
+    if conditions is None:
+        conditions = np.zeros(totals.shape[1], dtype=np.int64)
+
+    mean, variance, codes = _get_conditions_moments(totals, conditions, ddof=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z_scores = (totals[:, :, 0] - mean[:, codes, 0]) / np.sqrt(variance[:, codes, 0])
+
+    n_trials = z_scores.shape[1]
+    with np.errstate(invalid='ignore'):
+        correlation = (z_scores @ z_scores.T) / n_trials
+
+    return correlation
+
+def _get_conditions_moments(spikes_count, conditions, ddof=1):
+    # Mean and variance across the trials of each condition, through a one-hot trials matrix
+    _, codes = np.unique(np.asarray(conditions), return_inverse=True)
+    codes = codes.ravel()
+    one_hot = np.zeros((codes.size, np.amax(codes, initial=-1) + 1))
+    one_hot[np.arange(codes.size), codes] = 1
+    n_trials = np.sum(one_hot, axis=0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (one_hot.T @ spikes_count) / n_trials[np.newaxis, :, np.newaxis]
+        squares = one_hot.T @ (spikes_count - mean[:, codes, :])**2
+        variance = squares / (n_trials[np.newaxis, :, np.newaxis] - ddof)
+
+    return mean, variance, codes
@@ -3,11 +3,15 @@ from .differential import differential_threshold
 from .ptsd import PTSD
 from .swtteo import SWTTEO
 from .oswtteo import OSWTTEO
+from .multichannel import detect_spikes
+from .blocks import detect_spikes_blocks
 
 __all__ = [
         'hard_threshold',
         'differential_threshold',
         'PTSD',
         'SWTTEO',
-        'OSWTTEO'
+        'OSWTTEO',
+        'detect_spikes',
+        'detect_spikes_blocks'
     ]
\ No newline at end of file
@@ -0,0 +1,360 @@
+import contextlib
+import math
+import numpy as np
+import pywt
+from scipy.signal import convolve, find_peaks, get_window
+
+from ... import parallel, utils
+from . import differential, hard, swtteo
+
+def detect_spikes_blocks(data, method:str, *args, block_size:int = None, n_jobs:int = None, **kwargs):
+    '''
+    Detect spikes on a single, very long, channel by splitting it into time
+    blocks processed in parallel. Each block is extended by a halo sized
+    from the parameters of the detector, and the candidates of all the blocks
+    are stitched before the steps coupling distant samples, such as the
+    refractory period, so that the result is identical to the one of the
+    serial detector.
+
+    Parameters
+    ----------
+    data : ndarray or Reader
+        The array of recorded data, or a reader of a recording.
+    method : {'hard_threshold', 'differential_threshold', 'SWTTEO'}
+        The detection algorithm.
+    *args
+        The positional parameters of the detector, e.g. threshold and
+        refractory_period for hard_threshold.
+    block_size : int, optional
+        The number of samples of each block, halo excluded. If not specified,
+        the chunk size set by parallel.config is employed.
+    n_jobs : int, optional
+        The number of processes. If not specified, the value set by
+        parallel.config is employed.
+    **kwargs
+        The optional parameters of the detector, including channel.
+
+    Returns
+    -------
+    spikes_idxs : ndarray
+        An array containing all the indices of detected spikes.
+    spikes_values ndarray
+        An array containing all the values (i.e. amplitude) of detected spikes.
+    '''
+    if method not in BLOCK_DETECTORS:
+        raise ValueError("'method' expected to be one of " + ", ".join(["'" + name + "'" for name in BLOCK_DETECTORS]) + ", received '" + str(method) + "'")
+
+    block_size = max(int(block_size if block_size is not None else parallel.get_config()['chunk_size']), 1)
+
+    return BLOCK_DETECTORS[method](data, *args, block_size=block_size, n_jobs=n_jobs, **kwargs)
+
+def _hard_threshold_blocks(data, threshold:float, refractory_period:float, block_size:int, n_jobs:int, **kwargs):
+    kwargs = hard._parse_kwargs(**kwargs)
+
+    refractory_period = utils.get_in_samples(refractory_period, kwargs.get('sampling_time'))
+    if refractory_period < 1:
+        raise ValueError("'refractory_period' must be at least 1 sample")
+
+    polarity = kwargs.get('polarity')
+    height = -threshold if polarity == -1 else threshold
+
+    with _get_source(data, kwargs.get('channel'), n_jobs) as (source, n_samples):
+        bounds = _get_plateau_bounds(source, n_samples, block_size, polarity)
+        tasks = list(zip(bounds[:-1], bounds[1:]))
+        out = parallel.map_tasks(_hard_threshold_block, source, tasks, n_jobs, n_samples=n_samples, height=height, polarity=polarity)
+
+        peaks = np.concatenate([np.zeros(0, dtype=np.intp)] + [block_out[0] for block_out in out])
+        priority = np.concatenate([np.zeros(0)] + [block_out[1] for block_out in out])
+
+        # The refractory period couples the candidates of all the blocks, as in find_peaks
+        spikes_idxs = peaks[_select_by_distance(peaks, priority, refractory_period)].astype(np.int64)
+        spikes_values = _gather(source, spikes_idxs)
+
+    return spikes_idxs, spikes_values
+
+def _differential_threshold_blocks(data, threshold:float, window_length:float, refractory_period:float, block_size:int, n_jobs:int, **kwargs):
+    kwargs = differential._parse_kwargs(**kwargs)
+
+    window_length = utils.get_in_samples(window_length, kwargs.get('sampling_time'))
+    refractory_period = utils.get_in_samples(refractory_period, kwargs.get('sampling_time'))
+
+    with _get_source(data, kwargs.get('channel'), n_jobs) as (source, n_samples):
+        # Blocks are made of whole detection windows, so that no halo is needed
+        n_windows = math.floor(n_samples / window_length)
+        block_windows = max(block_size // window_length, 1)
+        tasks = [(start, min(start + block_windows, n_windows)) for start in range(0, n_windows, block_windows)]
+        out = parallel.map_tasks(_differential_threshold_block, source, tasks, n_jobs, threshold=threshold, window_length=window_length, polarity=kwargs.get('polarity'))
+
+        candidates = np.concatenate([np.zeros(0, dtype=np.int64)] + out)
+
+        # Each spike must follow the previous detected one by more than the refractory period
+        spikes_idxs = []
+        candidate_idx = 0
+        while candidate_idx < candidates.size:
+            spikes_idxs.append(candidates[candidate_idx])
+            candidate_idx = np.searchsorted(candidates, candidates[candidate_idx] + refractory_period, side='right')
+
+        spikes_idxs = np.array(spikes_idxs, dtype=np.int64)
+        spikes_values = _gather(source, spikes_idxs)
+
+    return spikes_idxs, spikes_values
+
+def _SWTTEO_blocks(data, sampling_time:float, block_size:int, n_jobs:int, **kwargs):
+    kwargs = swtteo._parse_kwargs(**kwargs)
+
+    refractory_period = utils.get_in_samples(kwargs.get('refractory_period'), sampling_time)
+    peak_duration = utils.get_in_samples(kwargs.get('peak_duration'), sampling_time)
+
+    # The data are zero-padded to a multiple of the wavelet decimation, as in SWTTEO
+    (data, channel, n_data, dtype) = _get_data(data, kwargs.get('channel'))
+    pow = np.power(2, kwargs.get('wavelet_level'))
+    n_samples = int(np.ceil(n_data / pow) * pow)
+
+    # The halo covers the support of the wavelet filters at all levels, of the TEO and of the smoothing window
+    wavelet = pywt.Wavelet(kwargs.get('wavelet_name'))
+    filters_length = sum([len(wavelet.dec_lo) * 2**level for level in range(kwargs.get('wavelet_level'))])
+    halo = filters_length + kwargs.get('window_samples') + 2
+
+    tasks = [(start, min(start + block_size, n_samples)) for start in range(0, n_samples, block_size)]
+
+    # The source is read directly into the padded array, which keeps its data type when no precision is lost
+    with _allocate([(n_samples, dtype), (n_samples, np.float64)], n_jobs) as (shared_padded, shared_out):
+        _fill(shared_padded, data, channel, n_data)
+        parallel.map_tasks(_SWTTEO_block, (shared_padded, shared_out), tasks, n_jobs, halo=halo, kwargs=kwargs)
+
+        # Thresholds depend on the whole recording
+        lambda_swtteo = np.percentile(shared_out[:], 99)
+        lambda_data = kwargs.get('threshold') * np.median(np.abs(shared_padded[:], dtype=np.float64))
+
+        out = parallel.map_tasks(_SWTTEO_candidates, (shared_padded, shared_out), tasks, n_jobs, lambda_swtteo=lambda_swtteo, lambda_data=lambda_data, polarity=kwargs.get('polarity'))
+        locs = np.concatenate([np.zeros(0, dtype=np.intp)] + [block_out[0] for block_out in out])
+        pks = np.concatenate([np.zeros(0)] + [block_out[1] for block_out in out])
+
+        ts, _ = swtteo.select_peaks(locs, pks, refractory_period)
+
+        # The shape of each peak is checked in parallel, on groups of peaks
+        groups = [group for group in np.array_split(ts, parallel.get_n_jobs(n_jobs)) if group.size > 0]
+        keep_idxs = parallel.map_tasks(_SWTTEO_select, shared_padded, groups, n_jobs, peak_duration=peak_duration)
+        ts = ts[np.concatenate([np.zeros(0, dtype=bool)] + keep_idxs)]
+
+        spikes_idxs = np.array(ts, dtype=np.int64)
+        spikes_values = np.array(shared_padded[spikes_idxs], dtype=np.float64)
+
+    return spikes_idxs, spikes_values
+
+BLOCK_DETECTORS = {
+    'differential_threshold': _differential_threshold_blocks,
+    'hard_threshold': _hard_threshold_blocks,
+    'SWTTEO': _SWTTEO_blocks
+}
+
+def _hard_threshold_block(source, task, n_samples, height, polarity):
+    (start, stop) = task
+
+    # A sample of halo on each side makes local maxima at the boundaries detectable
+    block_start = max(start - 1, 0)
+    x = _transform(_read(source, block_start, min(stop + 1, n_samples)), polarity)
+    peaks, _ = find_peaks(x, height=height)
+
+    is_inside = (peaks + block_start >= start) & (peaks + block_start < stop)
+    peaks = peaks[is_inside]
+
+    return peaks + block_start, x[peaks]
+
+def _differential_threshold_block(source, task, threshold, window_length, polarity):
+    (first_window, last_window) = task
+
+    x = _read(source, first_window * window_length, last_window * window_length)
+    if polarity == -1:
+        x = -x
+    windows = x.reshape(-1, window_length)
+
+    is_spike = np.abs(np.amax(windows, axis=1) - np.amin(windows, axis=1)) >= threshold
+    windows_idxs = np.flatnonzero(is_spike)
+
+    return np.argmax(windows[windows_idxs], axis=1) + (first_window + windows_idxs) * window_length
+
+def _SWTTEO_block(shared, task, halo, kwargs):
+    (padded, out) = shared
+    (start, stop) = task
+    n_samples = len(padded)
+
+    # The serial algorithm extends each level circularly, so the block is read circularly
+    ss = padded[np.arange(start - halo, stop + halo) % n_samples]
+    ss_start = start - halo
+
+    wavelet = pywt.Wavelet(kwargs.get('wavelet_name'))
+    lo_D = np.array(wavelet.dec_lo)
+    block_out = np.zeros(stop - start)
+
+    for k in range(1, kwargs.get('wavelet_level') + 1):
+        lf = np.size(lo_D)
+        swa = convolve(ss, lo_D, mode='valid', method='direct')
+        swa_start = ss_start + lf // 2 - 1
+
+        # TEO and smoothing are not circular, so they only see the samples inside the recording
+        first = max(-swa_start, 0)
+        last = min(n_samples - swa_start, swa.size)
+        temp = np.abs(swtteo.TEO(swa[first:last], 1))
+        temp_start = swa_start + first
+
+        if kwargs.get('window_samples'):
+            window = get_window(kwargs.get('window'), kwargs.get('window_samples'), fftbins=(not kwargs.get('window_symmetric')))
+            temp = convolve(temp, window, mode='same', method='direct')
+
+        block_out += temp[start - temp_start:stop - temp_start]
+
+        lo_D = np.repeat(lo_D, 2)
+        lo_D[np.arange(1, lo_D.size, 2)] = 0
+
+        ss = swa
+        ss_start = swa_start
+
+    out[start:stop] = block_out
+
+def _SWTTEO_candidates(shared, task, lambda_swtteo, lambda_data, polarity):
+    (padded, out) = shared
+    (start, stop) = task
+    n_samples = len(padded)
+
+    block_start = max(start - 1, 0)
+    block_stop = min(stop + 1, n_samples)
+    x = np.where(out[block_start:block_stop] > lambda_swtteo, polarity * padded[block_start:block_stop], 0)
+
+    # Local maxima as in seek_peaks, which excludes the first and last samples
+    locs = np.arange(max(start, 1), min(stop, n_samples - 1))
+    idxs = locs - block_start
+    is_peak = (x[idxs] >= x[idxs - 1]) & (x[idxs] >= x[idxs + 1])
+    locs = locs[is_peak]
+    locs = locs[x[locs - block_start] > lambda_data]
+
+    return locs, x[locs - block_start]
+
+def _SWTTEO_select(padded, ts, peak_duration):
+    tloc = np.tile(ts, (2 * peak_duration + 1, 1)) + np.arange(-peak_duration, peak_duration + 1)[:, np.newaxis]
+    tloc[tloc < 0] = 0
+    tloc[tloc >= len(padded)] = len(padded) - 1
+
+    return swtteo.select_spikes(padded[tloc], peak_duration)
+
+def _get_plateau_bounds(source, n_samples, block_size, polarity):
+    # Move each boundary forward until it does not split a plateau, i.e. x[bound - 1] != x[bound]
+    bounds = [0]
+    for bound in range(block_size, n_samples, block_size):
+        bound = max(bound, bounds[-1] + 1)
+        length = 64
+        while bound < n_samples:
+            x = _transform(_read(source, bound - 1, min(bound - 1 + length, n_samples)), polarity)
+            changes = np.flatnonzero(np.diff(x) != 0)
+            if changes.size > 0:
+                bound = bound + changes[0]
+                break
+            bound = bound - 1 + x.size
+            length *= 2
+
+        if bound < n_samples:
+            bounds.append(bound)
+
+    return bounds + [n_samples]
+
+def _select_by_distance(peaks, priority, distance):
+    if peaks.size == 0:
+        return np.zeros(0, dtype=bool)
+
+    # Same algorithm as find_peaks: the highest peaks are kept first
+    distance = math.ceil(distance)
+    keep = np.ones(peaks.size, dtype=bool)
+
+    # Peaks far from both neighbours are always kept, so only the others are visited, in the same order
+    is_close = np.zeros(peaks.size, dtype=bool)
+    is_close[1:] = np.diff(peaks) < distance
+    is_close[:-1] |= is_close[1:]
+
+    order = np.argsort(priority)[::-1]
+    for j in order[is_close[order]]:
+        if not keep[j]:
+            continue
+
+        first = np.searchsorted(peaks, peaks[j] - distance, side='right')
+        last = np.searchsorted(peaks, peaks[j] + distance, side='left')
+        keep[first:j] = False
+        keep[j + 1:last] = False
+
+    return keep
+
+def _transform(x, polarity):
+    if polarity == -1:
+        return -x
+    elif polarity == 0:
+        return abs(x)
+
+    return x
+
+@contextlib.contextmanager
+def _get_source(data, channel, n_jobs):
+    (data, channel, n_samples, _) = _get_data(data, channel)
+
+    # Readers are opened again and memory maps mapped again by each worker, while other arrays are placed in shared memory
+    if utils.is_reader(data) or parallel.get_n_jobs(n_jobs) == 1:
+        yield (data, channel), n_samples
+    elif parallel.is_mapped(data):
+        yield (parallel.MappedArray(data), None), n_samples
+    else:
+        with parallel.SharedArray(data) as shared_data:
+            yield (shared_data, None), n_samples
+
+def _get_data(data, channel):
+    if utils.is_reader(data):
+        return data, utils.get_reader_channel(data, channel), data.n_samples, np.float64
+
+    # Indexing a channel of a memory map does not read it
+    data = data if isinstance(data, np.ndarray) else np.asarray(data)
+    if channel is not None and data.ndim > 1:
+        data = data[channel]
+    data = data.squeeze()
+
+    # Floating point types that represent the data exactly are kept, e.g. float32 for int16 recordings
+    return data, None, data.size, np.promote_types(data.dtype, np.float32)
+
+@contextlib.contextmanager
+def _allocate(arrays, n_jobs):
+    if parallel.get_n_jobs(n_jobs) == 1:
+        yield tuple([np.zeros(size, dtype=dtype) for (size, dtype) in arrays])
+        return
+
+    shared = [parallel.SharedArray.zeros(size, dtype) for (size, dtype) in arrays]
+    try:
+        yield tuple(shared)
+    finally:
+        for shared_array in shared:
+            shared_array.close()
+            shared_array.unlink()
+
+def _fill(array, data, channel, n_data):
+    chunk_size = parallel.get_config()['chunk_size']
+
+    if utils.is_reader(data):
+        for (chunk_start, chunk_stop, _, block) in data.iter_chunks(chunk_size, channels=channel):
+            array[chunk_start:chunk_stop] = block
+        return
+
+    # The samples following the data are left as allocated, i.e. as the zero padding
+    for chunk_start in range(0, n_data, chunk_size):
+        chunk_stop = min(chunk_start + chunk_size, n_data)
+        array[chunk_start:chunk_stop] = data[chunk_start:chunk_stop]
+
+def _read(source, start, stop):
+    (data, channel) = source
+
+    if utils.is_reader(data):
+        return data.read(channels=channel, start=start, stop=stop)
+
+    return np.asarray(data[start:stop], dtype=np.float64)
+
+def _gather(source, idxs):
+    (data, channel) = source
+
+    if utils.is_reader(data):
+        return data.gather(idxs, channels=channel)
+
+    return np.asarray(data[idxs], dtype=np.float64)
@@ -4,6 +4,7 @@ from ... import utils
 
 def _parse_kwargs(**kwargs):
     kwargs_list = [
+        {'key': 'channel', 'default': None, 'type': int},
         {'key': 'polarity', 'default': -1, 'type': int},
         {'key': 'sampling_time', 'default': None, 'type': float}
     ]
@@ -11,6 +12,7 @@ def _parse_kwargs(**kwargs):
 
     return kwargs
 
+@utils.cacheable(_parse_kwargs)
 def differential_threshold(data:np.ndarray, threshold:float, window_length:float, refractory_period:float, **kwargs):
     '''
     Use the Spike Detection Differential Threshold (SDDT) algorithm
@@ -19,8 +21,8 @@ def differential_threshold(data:np.ndarray, threshold:float, window_length:float
 
     Parameters
     ----------
-    data : ndarray
-        The array of recorded data.
+    data : ndarray or Reader
+        The array of recorded data, or a reader of a recording.
     threshold : float
         A threshold employed by the algorithm to detect a spike.
     window_length : float
@@ -31,6 +33,8 @@ def differential_threshold(data:np.ndarray, threshold:float, window_length:float
     polarity : {-1, 1}, defualt=-1
         The polarity of spikes to look for. -1 means negative polarity,
         1 mean positive ones.
+    channel : int, optional
+        The channel to read, when data is a multi-channel reader or matrix.
     sampling_time : float, optional
         The sampling time for the recorded data. If specified, the algorithm
         will work in the time domain (the other parameters should then be
@@ -53,8 +57,8 @@ def differential_threshold(data:np.ndarray, threshold:float, window_length:float
     window_length = utils.get_in_samples(window_length, kwargs.get('sampling_time'))
     refractory_period = utils.get_in_samples(refractory_period, kwargs.get('sampling_time'))
 
-    # Cast data type to float
-    data = data.astype(np.float64).squeeze()
+    # Read data from a recording reader if needed, and cast data type to float
+    data = utils.read_data(data, kwargs.get('channel')).squeeze()
 
     if kwargs.get('polarity') == -1:
         data = -data
@@ -4,6 +4,7 @@ from ... import utils
 
 def _parse_kwargs(**kwargs):
     kwargs_list = [
+        {'key': 'channel', 'default': None, 'type': int},
         {'key': 'polarity', 'default': -1, 'type': int},
         {'key': 'sampling_time', 'default': None, 'type': float}
     ]
@@ -11,6 +12,7 @@ def _parse_kwargs(**kwargs):
 
     return kwargs
 
+@utils.cacheable(_parse_kwargs)
 def hard_threshold(data:np.ndarray, threshold:float, refractory_period:float, **kwargs):
     '''
     Use the Hard Threshold Local Maxima algorithm to detect spikes,
@@ -18,8 +20,8 @@ def hard_threshold(data:np.ndarray, threshold:float, refractory_period:float, **
 
     Parameters
     ----------
-    data : ndarray
-        The array of recorded data.
+    data : ndarray or Reader
+        The array of recorded data, or a reader of a recording.
     threshold : float
         A threshold employed by the algorithm to detect a spike.
     refractory_period : float
@@ -28,6 +30,8 @@ def hard_threshold(data:np.ndarray, threshold:float, refractory_period:float, **
         The polarity of spikes to look for. -1 means negative polarity,
         1 mean positive ones, while 0 applies the absolute value to the
         signal.
+    channel : int, optional
+        The channel to read, when data is a multi-channel reader or matrix.
     sampling_time : float, optional
         The sampling time for the recorded data. If specified, the algorithm
         will work in the time domain (the other parameters should then be
@@ -49,8 +53,8 @@ def hard_threshold(data:np.ndarray, threshold:float, refractory_period:float, **
     # Convert all parameters from time-domain to samples (if sampling_time not None) and force to int
     refractory_period = utils.get_in_samples(refractory_period, kwargs.get('sampling_time'))
 
-    # Cast data type to float
-    data = data.astype(np.float64).squeeze()
+    # Read data from a recording reader if needed, and cast data type to float
+    data = utils.read_data(data, kwargs.get('channel')).squeeze()
     
     if kwargs.get('polarity') == -1:
         spikes_idxs, _ = find_peaks(-data, height=-threshold, distance=refractory_period)
@@ -0,0 +1,57 @@
+from ... import parallel
+from .differential import differential_threshold
+from .hard import hard_threshold
+from .oswtteo import OSWTTEO
+from .ptsd import PTSD
+from .swtteo import SWTTEO
+
+DETECTORS = {
+    'differential_threshold': differential_threshold,
+    'hard_threshold': hard_threshold,
+    'OSWTTEO': OSWTTEO,
+    'PTSD': PTSD,
+    'SWTTEO': SWTTEO
+}
+
+def detect_spikes(data, method, *args, channels = None, n_jobs:int = None, **kwargs):
+    '''
+    Detect spikes on multiple channels in parallel, placing in-memory
+    recordings in shared memory once and dispatching each channel to the
+    persistent pool of worker processes.
+
+    Parameters
+    ----------
+    data : ndarray or Reader
+        A (n_channels x n_samples) matrix of recorded data, or a reader.
+    method : str or callable
+        The detection algorithm, either the name of one of the detectors of
+        neurospyke or a function defined at module level with the same signature.
+    *args
+        The positional parameters of the detector, e.g. threshold and
+        refractory_period for hard_threshold.
+    channels : array_like, optional
+        The channels to process. If not specified, all the channels are processed.
+    n_jobs : int, optional
+        The number of processes. If not specified, the value set by
+        parallel.config is employed.
+    **kwargs
+        The optional parameters of the detector.
+
+    Returns
+    -------
+    spikes_idxs : list of ndarray
+        The indices of the spikes detected on each channel.
+    spikes_values : list of ndarray
+        The values of the spikes detected on each channel.
+    '''
+    if isinstance(method, str):
+        if method not in DETECTORS:
+            raise ValueError("'method' expected to be one of " + ", ".join(["'" + name + "'" for name in DETECTORS]) + ", received '" + method + "'")
+        method = DETECTORS[method]
+
+    out = parallel.map_channels(method, data, channels, args, n_jobs=n_jobs, **kwargs)
+
+    spikes_idxs = [channel_out[0] for channel_out in out]
+    spikes_values = [channel_out[1] for channel_out in out]
+
+    return spikes_idxs, spikes_values
\ No newline at end of file
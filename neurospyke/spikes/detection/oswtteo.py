@@ -5,6 +5,7 @@ from ... import utils
 
 def _parse_kwargs(**kwargs):
     kwargs_list = [
+        {'key': 'channel', 'default': None, 'type': int},
         {'key': 'sampling_time', 'default': None, 'type': float},
         {'key': 'wavelet_level', 'default': 2, 'type': int},
         {'key': 'wavelet_name', 'default': 'sym6', 'type': str},
@@ -18,6 +19,7 @@ def _parse_kwargs(**kwargs):
 
     return kwargs
 
+@utils.cacheable(_parse_kwargs)
 def OSWTTEO(data:np.ndarray, refractory_period:float, peak_duration:float, **kwargs):
     '''
     Use the Precision Timing Spike Detection (PTSD) algorithm to detect spikes,
@@ -25,8 +27,8 @@ def OSWTTEO(data:np.ndarray, refractory_period:float, peak_duration:float, **kwa
 
     Parameters
     ----------
-    data : numpy.ndarray
-        The array of recorded data.
+    data : numpy.ndarray or Reader
+        The array of recorded data, or a reader of a recording.
     threshold : float
         A threshold employed by the algorithm to detect a spike.
     refractory_period : float
@@ -41,6 +43,8 @@ def OSWTTEO(data:np.ndarray, refractory_period:float, peak_duration:float, **kwa
         The sampling time for the recorded data. If specified, the algorithm
         will work in the time domain (the other parameters should then be
         specified in seconds). Otherwise, it will work with samples.
+    channel : int, optional
+        The channel to read, when data is a multi-channel reader or matrix.
     
     Returns
     -------
@@ -59,8 +63,8 @@ def OSWTTEO(data:np.ndarray, refractory_period:float, peak_duration:float, **kwa
     refractory_period = utils.get_in_samples(refractory_period, kwargs.get('sampling_time'))
     peak_duration = utils.get_in_samples(peak_duration, kwargs.get('sampling_time'))
 
-    # Cast data type to float
-    data = data.astype(np.float64)
+    # Read data from a recording reader if needed, and cast data type to float
+    data = utils.read_data(data, kwargs.get('channel'))
 
     spikes_idxs = []
     spikes_values = []
@@ -4,6 +4,7 @@ from ... import utils
 
 def _parse_kwargs(**kwargs):
     kwargs_list = [
+        {'key': 'channel', 'default': None, 'type': int},
         {'key': 'polarity', 'default': -1, 'type': int},
         {'key': 'sampling_time', 'default': None, 'type': float}
     ]
@@ -11,6 +12,7 @@ def _parse_kwargs(**kwargs):
 
     return kwargs
 
+@utils.cacheable(_parse_kwargs)
 def PTSD(data:np.ndarray, threshold:float, refractory_period:float, peak_lifetime_period:float, overshoot:float, **kwargs):
     '''
     Use the Precision Timing Spike Detection (PTSD) algorithm to detect spikes,
@@ -18,8 +20,8 @@ def PTSD(data:np.ndarray, threshold:float, refractory_period:float, peak_lifetim
 
     Parameters
     ----------
-    data : ndarray
-        The array of recorded data.
+    data : ndarray or Reader
+        The array of recorded data, or a reader of a recording.
     threshold : float
         A threshold employed by the algorithm to detect a spike.
     refractory_period : float
@@ -33,6 +35,8 @@ def PTSD(data:np.ndarray, threshold:float, refractory_period:float, peak_lifetim
     polarity : {-1, 1}, defualt=-1
         The polarity of spikes to look for. -1 means negative polarity,
         1 mean positive ones.
+    channel : int, optional
+        The channel to read, when data is a multi-channel reader or matrix.
     sampling_time : float, optional
         The sampling time for the recorded data. If specified, the algorithm
         will work in the time domain (the other parameters should then be
@@ -56,8 +60,8 @@ def PTSD(data:np.ndarray, threshold:float, refractory_period:float, peak_lifetim
     peak_lifetime_period = utils.get_in_samples(peak_lifetime_period, kwargs.get('sampling_time'))
     overshoot = utils.get_in_samples(overshoot, kwargs.get('sampling_time'))
 
-    # Cast data type to float
-    data = data.astype(np.float64).squeeze()
+    # Read data from a recording reader if needed, and cast data type to float
+    data = utils.read_data(data, kwargs.get('channel')).squeeze()
     
     if kwargs.get('polarity') == -1:
         data = -data
@@ -5,6 +5,7 @@ from ... import utils
 
 def _parse_kwargs(**kwargs):
     kwargs_list = [
+        {'key': 'channel', 'default': None, 'type': int},
         {'key': 'peak_duration', 'default': 0.0025, 'type': float},
         {'key': 'polarity', 'default': -1, 'type': int},
         {'key': 'refractory_period', 'default': 0.001, 'type': float},
@@ -19,6 +20,7 @@ def _parse_kwargs(**kwargs):
 
     return kwargs
 
+@utils.cacheable(_parse_kwargs)
 def SWTTEO(data:np.ndarray, sampling_time:float, **kwargs):
     '''
     Use the stationary wavelet transform and Teager Energy Operator (SWTTEO) algorithm to detect spikes,
@@ -26,8 +28,8 @@ def SWTTEO(data:np.ndarray, sampling_time:float, **kwargs):
 
     Parameters
     ----------
-    data : ndarray
-        The array of recorded data.
+    data : ndarray or Reader
+        The array of recorded data, or a reader of a recording.
     sampling_time : float
         The sampling time for the recorded data.
     peak_duration : float, default=0.0025
@@ -55,6 +57,8 @@ def SWTTEO(data:np.ndarray, sampling_time:float, **kwargs):
         If True, create a “symmetric” window, for use in filter design.
         If False, create a “periodic” window, ready to use with ifftshift
         and be multiplied by the result of an FFT. 
+    channel : int, optional
+        The channel to read, when data is a multi-channel reader or matrix.
     
     Returns
     -------
@@ -73,8 +77,8 @@ def SWTTEO(data:np.ndarray, sampling_time:float, **kwargs):
     refractory_period = utils.get_in_samples(kwargs.get('refractory_period'), sampling_time)
     peak_duration = utils.get_in_samples(kwargs.get('peak_duration'), sampling_time)
 
-    # Cast data type to float
-    data = data.astype(np.float64).squeeze()
+    # Read data from a recording reader if needed, and cast data type to float
+    data = utils.read_data(data, kwargs.get('channel')).squeeze()
     L = np.size(data)
 
     pow = np.power(2, kwargs.get('wavelet_level'))
@@ -97,7 +101,7 @@ def SWTTEO(data:np.ndarray, sampling_time:float, **kwargs):
         ss = extend_swt(ss, lf)
         
         # Convolution
-        swa = convolve(ss, lo_D, mode='valid')
+        swa = convolve(ss, lo_D, mode='valid', method='direct')
         swa = swa[1:]  # Even number of filter coefficients
         
         # Apply TEO to SWT output
@@ -105,7 +109,7 @@ def SWTTEO(data:np.ndarray, sampling_time:float, **kwargs):
         
         if kwargs.get('window_samples'):
             window = get_window(kwargs.get('window'), kwargs.get('window_samples'), fftbins=(not kwargs.get('window_symmetric')))
-            temp = convolve(temp, window, mode='same')
+            temp = convolve(temp, window, mode='same', method='direct')
         
         out += temp
         
@@ -122,57 +126,15 @@ def SWTTEO(data:np.ndarray, sampling_time:float, **kwargs):
     data_th = np.zeros(data.shape)
     data_th[out > lambda_swtteo] = kwargs.get('polarity') * data[out > lambda_swtteo]
 
-    ts, pmin = seek_peaks(data_th, refractory_period, lambda_data)
-    pmin = pmin * kwargs.get('polarity')
-    E = out[ts]
+    ts, _ = seek_peaks(data_th, refractory_period, lambda_data)
 
-    # Get peak-to-peak values
+    # Get the data surrounding each peak
     tloc = np.tile(ts, (2 * peak_duration + 1, 1)) + np.arange(-peak_duration, peak_duration + 1)[:, np.newaxis]
     tloc[tloc < 0] = 0
     tloc[tloc >= len(data)] = len(data) - 1
 
-    pmax = np.max(data[tloc], axis=0)
-    # Imax = np.argmax(data[tloc], axis=0)
-    p2p_amplitude = pmax + pmin
-
-    # Get peak width and exclude peak_width > peak_duration
-    tlocmin = np.flipud(np.tile(ts, (peak_duration + 1, 1)) + np.arange(-peak_duration, 1)[:, np.newaxis])
-    tlocmin[tlocmin < 0] = 0
-    tlocmin[tlocmin >= len(data)] = len(data) - 1
-
-    tlocmax = np.tile(ts, (peak_duration, 1)) + np.arange(1, peak_duration + 1)[:, np.newaxis]
-    tlocmax[tlocmax < 0] = 0
-    tlocmax[tlocmax >= len(data)] = len(data) - 1
-
-    Imax1 = np.zeros(tlocmin.shape[1], dtype=int)
-    Imax2 = np.zeros(tlocmin.shape[1], dtype=int)
-
-    for ii in range(tlocmin.shape[1]):
-        peak_indices, _ = find_peaks(data[tlocmin[:, ii]])
-        if len(peak_indices) == 0:
-            this_peak = peak_duration
-        else:
-            this_peak = peak_indices[0]
-        Imax1[ii] = -this_peak
-
-        peak_indices, _ = find_peaks(data[tlocmax[:, ii]])
-        if len(peak_indices) == 0:
-            this_peak = peak_duration
-        else:
-            this_peak = peak_indices[0]
-        Imax2[ii] = this_peak + 1
-
-    peak_width = Imax2 - Imax1
-
-    # Exclude values
-    keep_idxs = (peak_width <= peak_duration) & (pmax[:] > 0)
-
+    keep_idxs = select_spikes(data[tloc], peak_duration)
     ts = ts[keep_idxs]
-    p2p_amplitude = p2p_amplitude[keep_idxs]
-    pmax = pmax[keep_idxs]
-    pmin = pmin[keep_idxs]
-    E = E[keep_idxs]
-    peak_width = peak_width[keep_idxs]
 
     spikes_idxs = np.array(ts, dtype=np.int64)
     spikes_values = np.array(data[spikes_idxs], dtype=np.float64)
@@ -204,12 +166,48 @@ def roll_TEO(x, k):
 
     return y
 
+def select_spikes(windows, peak_duration):
+    # Windows are (2 * peak_duration + 1 x n_peaks), centred on each peak
+    pmax = np.max(windows, axis=0)
+
+    # Get peak width and exclude peak_width > peak_duration
+    windows_min = windows[peak_duration::-1]
+    windows_max = windows[peak_duration + 1:]
+
+    Imax1 = np.zeros(windows.shape[1], dtype=int)
+    Imax2 = np.zeros(windows.shape[1], dtype=int)
+
+    for ii in range(windows.shape[1]):
+        peak_indices, _ = find_peaks(windows_min[:, ii])
+        if len(peak_indices) == 0:
+            this_peak = peak_duration
+        else:
+            this_peak = peak_indices[0]
+        Imax1[ii] = -this_peak
+
+        peak_indices, _ = find_peaks(windows_max[:, ii])
+        if len(peak_indices) == 0:
+            this_peak = peak_duration
+        else:
+            this_peak = peak_indices[0]
+        Imax2[ii] = this_peak + 1
+
+    peak_width = Imax2 - Imax1
+
+    # Exclude values
+    keep_idxs = (peak_width <= peak_duration) & (pmax[:] > 0)
+
+    return keep_idxs
+
 def seek_peaks(x, min_peak_distance=1, min_peak_height=None):
     locs = np.where((x[1:-1] >= x[:-2]) & (x[1:-1] >= x[2:]))[0] + 1
 
     if min_peak_height is not None:
         locs = locs[x[locs] > min_peak_height]
 
+    return select_peaks(locs, x[locs], min_peak_distance)
+
+def select_peaks(locs, pks, min_peak_distance=1):
     if min_peak_distance > 1:
         while True:
             del_vals = np.diff(locs) < min_peak_distance
@@ -217,8 +215,6 @@ def seek_peaks(x, min_peak_distance=1, min_peak_height=None):
             if not np.any(del_vals):
                 break
 
-            pks = x[locs]
-
             mins = np.argmin(np.vstack((pks[np.hstack((del_vals, False))], pks[np.hstack((False, del_vals))])), axis=0)
 
             deln = np.where(del_vals)[0]
@@ -226,7 +222,6 @@ def seek_peaks(x, min_peak_distance=1, min_peak_height=None):
             deln = np.concatenate((deln[mins == 0], deln[mins == 1] + 1))
 
             locs = np.delete(locs, deln)
-
-    pks = x[locs]
+            pks = np.delete(pks, deln)
     
     return locs, pks
\ No newline at end of file
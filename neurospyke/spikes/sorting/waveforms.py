@@ -1,9 +1,11 @@
 import numpy as np
 
-from ... import utils
+from ... import parallel, utils
 
 def _parse_kwargs(**kwargs):
     kwargs_list = [
+        {'key': 'channel', 'default': None, 'type': int},
+        {'key': 'n_jobs', 'default': None, 'type': int},
         {'key': 'sampling_time', 'default': None, 'type': float},
         {'key': 'window_length', 'default': 0.001 if kwargs.get('sampling_time', None) is not None else 20, 'type': float},
     ]
@@ -11,6 +13,7 @@ def _parse_kwargs(**kwargs):
 
     return kwargs
 
+@utils.cacheable(_parse_kwargs)
 def get_waveforms(data:np.ndarray, events:np.ndarray, **kwargs):
     '''
     Get the data surrounding certain set of events, according to a
@@ -19,14 +22,22 @@ def get_waveforms(data:np.ndarray, events:np.ndarray, **kwargs):
 
     Parameters
     ----------
-    data : ndarray
-        The array of recorded data.
-    events : ndarray
+    data : ndarray or Reader
+        The array of recorded data, or a reader of a recording. With a
+        reader, only the samples inside the windows are read.
+    events : ndarray or list of ndarray
         An array containing the events of interest. It can be express both
         as a event train or as a list of the indices at which events occur.
+        A list of arrays gives the events of each channel of data, which are
+        then processed in parallel.
     window_length : float, optional
         The length for the detection window to employ while isolating
         events, expressed in seconds or samples.
+    channel : int, optional
+        The channel to read, when data is a multi-channel reader or matrix.
+    n_jobs : int, optional
+        The number of processes employed when events of multiple channels
+        are passed. If not specified, the value set by parallel.config is employed.
     sampling_time : float, optional
         The sampling time for the recorded data. If specified, the algorithm
         will work in the time domain (the other parameters should then be
@@ -34,13 +45,20 @@ def get_waveforms(data:np.ndarray, events:np.ndarray, **kwargs):
 
     Returns
     -------
-    waveforms : ndarray
+    waveforms : ndarray or list of ndarray
         A (2 x n_events) matrix where each row represents a different waveform surrounding
-        the specified events, according to the specified window.
+        the specified events, according to the specified window. A list of
+        matrices is returned if the events of multiple channels are passed.
     '''
     kwargs = _parse_kwargs(**kwargs)
 
-    data = data.squeeze()
+    if isinstance(events, list):
+        channels_args = [(channel_events,) for channel_events in events]
+        return parallel.map_channels(get_waveforms, data, range(len(events)), channels_args=channels_args, n_jobs=kwargs.get('n_jobs'), read=False, window_length=kwargs.get('window_length'), sampling_time=kwargs.get('sampling_time'))
+
+    if not utils.is_reader(data):
+        data = data[kwargs.get('channel')] if kwargs.get('channel') is not None else data
+        data = data.squeeze()
     events = events.squeeze()
 
     if events.dtype == 'bool':
@@ -59,7 +77,10 @@ def get_waveforms(data:np.ndarray, events:np.ndarray, **kwargs):
 
     windows_samples = np.ravel(windows_samples)
 
-    waveforms = data[windows_samples]
+    if utils.is_reader(data):
+        waveforms = data.gather(windows_samples, channels=utils.get_reader_channel(data, kwargs.get('channel')))
+    else:
+        waveforms = data[windows_samples]
     waveforms = np.reshape(waveforms, np.shape(events_idxs))
 
     return waveforms
\ No newline at end of file
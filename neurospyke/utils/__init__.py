@@ -1,14 +1,27 @@
-from .iei import get_IEI
+from .cache import Cache, cacheable
+from .iei import get_IEI, get_IEI_edges, get_IEI_histogram
+from .packed import as_packed_train, PackedTrain
 from .trials import get_trials
 from .utils import check_kwargs_list
 from .utils import convert_train_to_idxs, convert_idxs_to_train
-from .utils import get_in_samples
+from .utils import get_in_samples, get_spikes_idxs
+from .utils import get_reader_channel, is_reader, read_data
 
 __all__ = [
+        'as_packed_train',
+        'Cache',
+        'cacheable',
         'check_kwargs_list',
         'convert_train_to_idxs',
         'convert_idxs_to_train',
         'get_in_samples',
+        'get_spikes_idxs',
         'get_IEI',
+        'get_IEI_edges',
+        'get_IEI_histogram',
+        'get_reader_channel',
+        'is_reader',
+        'read_data',
+        'PackedTrain',
         'get_trials'
     ]
\ No newline at end of file
@@ -0,0 +1,282 @@
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import threading
+import numpy as np
+
+from .utils import is_reader
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+# Arguments which do not affect the result
+IGNORED_ARGUMENTS = ['n_jobs']
+
+_active_caches = []
+_state = threading.local()
+
+class Cache:
+    '''
+    Store the results of expensive computations on disk, keyed on a hash of
+    their inputs. Arrays larger than sample_size bytes are hashed by sampling
+    evenly spaced blocks, while memory-mapped arrays and recording readers
+    are also identified by the path and modification time of their file.
+    When the total size of the stored results exceeds max_size, the least
+    recently used ones are evicted.
+
+    Inside a with statement, the cache is used by all the neurospyke functions
+    supporting it. It can also be applied as a decorator to any function.
+
+    Parameters
+    ----------
+    path : str
+        The path of the cache directory. It is created if it does not exist.
+    max_size : int, default=1073741824
+        The maximum size of the stored results, in bytes.
+    sample_size : int, default=67108864
+        The number of bytes hashed for each array. Smaller arrays are hashed
+        entirely, while changes outside of the sampled blocks of larger arrays
+        are not detected, unless they are memory-mapped.
+    version : str, optional
+        A string added to all the keys, to be changed whenever the stored
+        results become stale in ways the code of the cached functions does
+        not show, e.g. after updating a function they call.
+    '''
+    def __init__(self, path:str, max_size:int = 2**30, sample_size:int = 2**26, version:str = None):
+        self.path = path
+        self.max_size = max_size
+        self.sample_size = sample_size
+        self.version = version
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(path, exist_ok=True)
+        self.size = sum([entry.stat().st_size for entry in self._get_entries()])
+
+    @property
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'size': self.size}
+
+    def __enter__(self):
+        _active_caches.append(self)
+
+        return self
+
+    def __exit__(self, *args):
+        _active_caches.remove(self)
+
+    def __call__(self, func, parse_kwargs = None):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.call(func, args, kwargs, signature, parse_kwargs)
+
+        return wrapper
+
+    def call(self, func, args:tuple, kwargs:dict, signature = None, parse_kwargs = None):
+        '''
+        Get the result of func(*args, **kwargs), either from the cache or by
+        computing and storing it.
+        '''
+        key = self.get_key(func, args, kwargs, signature, parse_kwargs)
+        filename = os.path.join(self.path, key + '.pkl')
+
+        try:
+            with open(filename, 'rb') as f:
+                result = pickle.load(f)
+            os.utime(filename)
+            self.hits += 1
+
+            return result
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+
+        # Nested cacheable functions are computed directly, only the outer result is stored
+        _state.depth = getattr(_state, 'depth', 0) + 1
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            _state.depth -= 1
+
+        self._store(filename, result)
+
+        return result
+
+    def get_key(self, func, args:tuple, kwargs:dict, signature = None, parse_kwargs = None):
+        '''
+        Get the hash identifying a call, given the function, its code, its
+        constants and its arguments, with defaults and kwargs normalised
+        through parse_kwargs, and the version of the cache.
+        '''
+        signature = inspect.signature(func) if signature is None else signature
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+
+        arguments = {}
+        for name, value in bound.arguments.items():
+            if signature.parameters[name].kind == inspect.Parameter.VAR_KEYWORD:
+                value = parse_kwargs(**value) if parse_kwargs is not None else value
+                arguments.update({key: item for key, item in value.items() if key not in arguments and key not in IGNORED_ARGUMENTS})
+            elif name not in IGNORED_ARGUMENTS:
+                arguments[name] = value
+
+        h = _get_hasher()
+        _update_hash(h, func.__module__ + '.' + func.__qualname__, self.sample_size)
+        _update_hash(h, [_get_code_identity(func), _get_code_identity(parse_kwargs), self.version], self.sample_size)
+        _update_hash(h, arguments, self.sample_size)
+
+        return h.hexdigest()
+
+    def clear(self):
+        '''
+        Remove all the stored results and reset the statistics.
+        '''
+        for entry in self._get_entries():
+            os.remove(entry.path)
+
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get_entries(self):
+        return [entry for entry in os.scandir(self.path) if entry.is_file() and entry.name.endswith('.pkl')]
+
+    def _store(self, filename, result):
+        temp_filename = filename + '.' + str(os.getpid()) + '.tmp'
+
+        with open(temp_filename, 'wb') as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_filename, filename)
+
+        self.size += os.path.getsize(filename)
+        if self.size > self.max_size:
+            self._evict()
+
+    def _evict(self):
+        # Results are touched when used, so the oldest modification time is the least recently used
+        entries = sorted([(entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in self._get_entries()])
+        self.size = sum([size for _, size, _ in entries])
+
+        for _, size, path in entries:
+            if self.size <= self.max_size:
+                break
+
+            os.remove(path)
+            self.size -= size
+            self.evictions += 1
+
+def cacheable(parse_kwargs = None):
+    '''
+    Make a function use the active cache, if any, normalising its kwargs
+    through parse_kwargs. Without an active cache, the function is called
+    directly.
+    '''
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if len(_active_caches) == 0 or getattr(_state, 'depth', 0) > 0:
+                return func(*args, **kwargs)
+
+            return _active_caches[-1].call(func, args, kwargs, signature, parse_kwargs)
+
+        return wrapper
+
+    return decorator
+
+def _get_hasher():
+    if xxhash is not None:
+        return xxhash.xxh3_128()
+
+    return hashlib.blake2b(digest_size=16)
+
+def _update_hash(h, value, sample_size):
+    if isinstance(value, np.generic):
+        value = value.item()
+
+    if isinstance(value, np.ndarray):
+        h.update(b'ndarray' + str((value.shape, value.dtype.str)).encode())
+
+        # Memory-mapped arrays are also identified by their file, which may be modified in place
+        if isinstance(value, np.memmap) and value.filename is not None:
+            _update_hash(h, _get_file_identity(value.filename), sample_size)
+
+        _update_hash_array(h, value, sample_size)
+    elif is_reader(value):
+        h.update(b'reader' + type(value).__name__.encode())
+
+        # Readers deriving their samples from another source, such as FilteredReader, identify themselves
+        if hasattr(value, 'get_cache_identity'):
+            _update_hash(h, value.get_cache_identity(), sample_size)
+        else:
+            _update_hash(h, _get_file_identity(getattr(value, 'filename', None)), sample_size)
+            _update_hash(h, [value.shape, value.gain, value.offset, value.sampling_time], sample_size)
+    elif isinstance(value, (list, tuple)):
+        h.update(type(value).__name__.encode() + str(len(value)).encode())
+        for item in value:
+            _update_hash(h, item, sample_size)
+    elif isinstance(value, dict):
+        h.update(b'dict' + str(len(value)).encode())
+        for key in sorted(value, key=str):
+            _update_hash(h, str(key), sample_size)
+            _update_hash(h, value[key], sample_size)
+    elif isinstance(value, bytes):
+        h.update(b'bytes' + value)
+    elif value is None or isinstance(value, (bool, int, float, complex, str)):
+        h.update(type(value).__name__.encode() + repr(value).encode())
+    elif callable(value) and hasattr(value, '__code__'):
+        h.update(b'callable' + (value.__module__ + '.' + value.__qualname__).encode())
+        _update_hash(h, _get_code_identity(value), sample_size)
+    else:
+        h.update(b'object' + pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+def _get_code_identity(value):
+    if value is None:
+        return None
+
+    # Constants, e.g. the defaults of _parse_kwargs, and nested functions change the result as much as the bytecode
+    if inspect.iscode(value):
+        return [value.co_code, _get_code_identity(list(value.co_consts)), list(value.co_names)]
+    elif isinstance(value, (list, tuple)):
+        return [_get_code_identity(item) for item in value]
+    elif isinstance(value, (set, frozenset)):
+        return sorted([repr(item) for item in value])
+    elif hasattr(value, '__code__'):
+        return [_get_code_identity(value.__code__), _get_code_identity(value.__defaults__), _get_code_identity(value.__kwdefaults__)]
+    elif isinstance(value, dict):
+        return {key: _get_code_identity(item) for key, item in value.items()}
+
+    return value
+
+def _update_hash_array(h, array, sample_size):
+    if array.dtype.hasobject:
+        h.update(pickle.dumps(array, protocol=pickle.HIGHEST_PROTOCOL))
+        return
+
+    if array.nbytes <= sample_size:
+        h.update(np.ascontiguousarray(array).view(np.uint8).reshape(-1))
+        return
+
+    # Evenly spaced blocks of elements, always including the first and the last ones
+    n_blocks = 64
+    block_size = max(sample_size // (n_blocks * array.itemsize), 1)
+    starts = np.linspace(0, array.size - block_size, n_blocks).astype(np.int64)
+    idxs = (starts[:, np.newaxis] + np.arange(block_size)[np.newaxis, :]).ravel()
+    h.update(np.ascontiguousarray(array.flat[idxs]).view(np.uint8))
+
+def _get_file_identity(filename):
+    if filename is None or not os.path.exists(filename):
+        return None
+
+    stat = os.stat(filename)
+
+    return [os.path.abspath(filename), stat.st_size, stat.st_mtime_ns]
@@ -32,4 +32,84 @@ def get_IEI(spikes:np.ndarray, sampling_time:float = None):
     if sampling_time is not None:
         IEI = IEI * sampling_time
 
-    return IEI
\ No newline at end of file
+    return IEI
+
+def get_IEI_histogram(IEI:np.ndarray, bins = 10, range:tuple = None, log:bool = False, chunk_size:int = 2**20):
+    '''
+    Get the histogram of a set of Inter-Event-Intervals, as np.histogram,
+    optionally with log-spaced bins. Intervals are assigned to the bins with
+    a vectorized digitize, in chunks, so that the memory required does not
+    depend on the number of intervals.
+
+    Parameters
+    ----------
+    IEI : ndarray
+        The Inter-Event-Intervals, either in samples or in seconds.
+    bins : int or ndarray, default=10
+        The number of bins, or the edges of the bins.
+    range : tuple, optional
+        The lower and upper range of the bins. If not specified, the minimum
+        and the maximum of the intervals are employed, excluding the
+        non-positive ones when the bins are log-spaced.
+    log : bool, default=False
+        If True, the bins are spaced evenly on a log scale.
+    chunk_size : int, default=2**20
+        The number of intervals processed at once.
+
+    Returns
+    -------
+    counts : ndarray
+        The number of intervals in each bin.
+    edges : ndarray
+        The edges of the bins.
+    '''
+    IEI = np.asarray(IEI).ravel()
+    edges = get_IEI_edges(bins, range, log, IEI)
+
+    counts = np.zeros(edges.size - 1, dtype=np.int64)
+    for start in np.arange(0, IEI.size, chunk_size):
+        chunk = IEI[start:start + chunk_size]
+
+        # As np.histogram, the last bin includes its right edge
+        bins_idxs = np.digitize(chunk, edges) - 1
+        bins_idxs[chunk == edges[-1]] = counts.size - 1
+        is_counted = (bins_idxs >= 0) & (bins_idxs < counts.size)
+        counts += np.bincount(bins_idxs[is_counted], minlength=counts.size)
+
+    return counts, edges
+
+def get_IEI_edges(bins = 10, range:tuple = None, log:bool = False, IEI:np.ndarray = None):
+    '''
+    Get the edges of the bins of an Inter-Event-Interval histogram.
+
+    Parameters
+    ----------
+    bins : int or ndarray, default=10
+        The number of bins, or the edges of the bins, which are returned as they are.
+    range : tuple, optional
+        The lower and upper range of the bins. It is required if IEI is not specified.
+    log : bool, default=False
+        If True, the bins are spaced evenly on a log scale.
+    IEI : ndarray, optional
+        The Inter-Event-Intervals giving the range, if not specified.
+
+    Returns
+    -------
+    edges : ndarray
+        The edges of the bins.
+    '''
+    if np.ndim(bins) > 0:
+        return np.asarray(bins, dtype=np.float64)
+
+    if range is None:
+        if IEI is None:
+            raise ValueError("'range' must be specified when the intervals are not available")
+        IEI = IEI[IEI > 0] if log else IEI
+        range = (np.amin(IEI), np.amax(IEI)) if IEI.size > 0 else (1, 2) if log else (0, 1)
+
+    if log:
+        if range[0] <= 0:
+            raise ValueError("'range' expected to be positive for log-spaced bins, received " + str(tuple(range)))
+        return np.geomspace(range[0], range[1] if range[1] > range[0] else range[0] * 2, bins + 1)
+
+    return np.histogram_bin_edges(np.zeros(0), bins=bins, range=(range[0], range[1]) if range[1] > range[0] else (range[0] - 0.5, range[0] + 0.5))
@@ -0,0 +1,286 @@
+import math
+import numpy as np
+from . import utils
+
+_POPCOUNT_TABLE = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+def _popcount(data:np.ndarray):
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(data)
+    else:
+        return _POPCOUNT_TABLE[data.view(np.uint8)]
+
+def _shift_bytes(data:np.ndarray, shift:int):
+    # Move every bit of a big-endian packed buffer by shift positions (positive towards later samples)
+    q, r = divmod(abs(shift), 8)
+    size = data.size
+    shifted = np.zeros(size, dtype=np.uint8)
+
+    if q >= size:
+        return shifted
+
+    data = data.astype(np.uint16)
+
+    if shift >= 0:
+        source = data[:size - q]
+        block = source >> r
+        if r > 0:
+            block[1:] |= (source[:-1] << (8 - r)) & 0xFF
+        shifted[q:] = block
+    else:
+        source = data[q:]
+        block = (source << r) & 0xFF
+        if r > 0:
+            block[:-1] |= source[1:] >> (8 - r)
+        shifted[:size - q] = block
+
+    return shifted
+
+class PackedTrain:
+    '''
+    A spike train stored as packed bits, using one bit per sample instead
+    of the one byte per sample of a boolean train.
+
+    The bits are packed with np.packbits (big-endian bit order) in a buffer
+    padded to a whole number of 64-bit words, so that logical operations and
+    coincidence counts can work on np.uint64 words.
+
+    Parameters
+    ----------
+    data : ndarray
+        The packed bits, as an array of np.uint8.
+    n_samples : int
+        The number of samples represented by the train.
+    '''
+    # Binary operators with arrays are left to PackedTrain, instead of being broadcast by numpy
+    __array_ufunc__ = None
+
+    def __init__(self, data:np.ndarray, n_samples:int):
+        n_samples = int(n_samples)
+        n_bytes = 8 * math.ceil(n_samples / 64)
+
+        data = np.asarray(data, dtype=np.uint8).ravel()
+        if data.size < n_bytes:
+            data = np.concatenate((data, np.zeros(n_bytes - data.size, dtype=np.uint8)))
+        else:
+            data = data[:n_bytes].copy()
+
+        self.data = data
+        self.n_samples = n_samples
+        self._clear_padding()
+
+    @classmethod
+    def from_idxs(cls, idxs:np.ndarray, duration:float = None, sampling_time:float = None):
+        '''
+        Build a packed train from the indices at which spikes occur, following
+        the same conventions as convert_idxs_to_train.
+
+        Parameters
+        ----------
+        idxs : ndarray
+            The indices at which spikes occur.
+        duration : float, optional
+            The duration of the train, either in samples or in seconds. If not
+            specified, the train will end at the last spike.
+        sampling_time : float, optional
+            The sampling time for the recorded data. If specified, duration is
+            expressed in seconds.
+
+        Returns
+        -------
+        train : PackedTrain
+            The packed spike train.
+        '''
+        idxs = np.unique(np.asarray(idxs, dtype=np.int64).ravel())
+
+        if duration is None:
+            n_samples = idxs[-1] + 1 if idxs.size > 0 else 0
+        elif sampling_time is None:
+            n_samples = math.floor(duration)
+        else:
+            n_samples = math.floor(duration/sampling_time)
+
+        idxs = idxs[(idxs >= 0) & (idxs < n_samples)]
+        n_bytes = 8 * math.ceil(n_samples / 64)
+        bits = np.right_shift(0x80, idxs & 7)
+        data = np.bincount(idxs >> 3, weights=bits, minlength=n_bytes).astype(np.uint8)
+
+        return cls(data, n_samples)
+
+    @classmethod
+    def from_train(cls, train:np.ndarray):
+        '''
+        Build a packed train from a boolean spike train.
+        '''
+        train = np.asarray(train, dtype=bool).ravel()
+
+        return cls(np.packbits(train), train.size)
+
+    @property
+    def words(self):
+        '''
+        The packed bits viewed as an array of np.uint64 words.
+        '''
+        return self.data.view(np.uint64)
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def __len__(self):
+        return self.n_samples
+
+    def __repr__(self):
+        return 'PackedTrain(n_samples=' + str(self.n_samples) + ', n_spikes=' + str(self.count()) + ')'
+
+    def __and__(self, other):
+        return self._combine(other, np.bitwise_and)
+
+    def __or__(self, other):
+        return self._combine(other, np.bitwise_or)
+
+    __rand__ = __and__
+    __ror__ = __or__
+
+    def __eq__(self, other):
+        if not isinstance(other, PackedTrain):
+            return NotImplemented
+        return (self.n_samples == other.n_samples) and np.array_equal(self.data, other.data)
+
+    def to_idxs(self):
+        '''
+        Get the indices at which spikes occur, unpacking only the non-empty bytes.
+        '''
+        nonzero_bytes = np.flatnonzero(self.data)
+        bits = np.unpackbits(self.data[nonzero_bytes][:, np.newaxis], axis=1).astype(bool)
+        idxs = (8 * nonzero_bytes[:, np.newaxis] + np.arange(8))[bits]
+
+        return idxs.astype(np.int64)
+
+    def to_train(self):
+        '''
+        Get the equivalent boolean spike train.
+        '''
+        return np.unpackbits(self.data, count=self.n_samples).astype(bool)
+
+    def count(self):
+        '''
+        Get the number of spikes in the train.
+        '''
+        return int(np.sum(_popcount(self.words), dtype=np.int64))
+
+    def shift(self, n:int):
+        '''
+        Get a copy of the train with every spike moved by n samples. Positive
+        values move spikes later in time. Spikes moved outside of the train
+        are dropped.
+        '''
+        return PackedTrain(_shift_bytes(self.data, int(n)), self.n_samples)
+
+    def coincidences(self, other, shifts):
+        '''
+        Count the coincidences between this train and another one shifted by
+        each of the specified amounts, i.e. the number of samples i for which
+        both self[i] and other[i - shift] contain a spike.
+
+        Parameters
+        ----------
+        other : PackedTrain or ndarray
+            The train to compare with. A boolean spike train is packed first.
+        shifts : int or ndarray
+            The shifts to apply to other, expressed in samples.
+
+        Returns
+        -------
+        counts : ndarray
+            The number of coincidences for each of the specified shifts.
+        '''
+        other = as_packed_train(other)
+        shifts = np.atleast_1d(np.asarray(shifts, dtype=np.int64))
+        counts = np.zeros(shifts.size, dtype=np.int64)
+
+        # Pad the other train so that no spike is lost when moving it within the span of this one
+        other_data = np.zeros(max(self.data.size, other.data.size), dtype=np.uint8)
+        other_data[:other.data.size] = other.data
+
+        for shift_idx, shift in enumerate(shifts):
+            shifted = _shift_bytes(other_data, int(shift))
+            common = np.bitwise_and(self.data.view(np.uint64), shifted[:self.data.size].view(np.uint64))
+            counts[shift_idx] = np.sum(_popcount(common), dtype=np.int64)
+
+        return counts
+
+    def bin(self, bin_size:float, sampling_time:float = None):
+        '''
+        Count the number of spikes in consecutive bins of the train, without
+        unpacking it. A trailing partial bin is discarded.
+
+        Parameters
+        ----------
+        bin_size : float
+            The size of a single bin, either in samples or in seconds.
+        sampling_time : float, optional
+            The sampling time for the recorded data. If specified, bin_size
+            is expressed in seconds.
+
+        Returns
+        -------
+        spikes_count : ndarray
+            The number of spikes in each bin.
+        '''
+        bin_size = utils.get_in_samples(bin_size, sampling_time)
+        if bin_size < 1:
+            raise ValueError("'bin_size' expected to be at least 1 sample, received " + str(bin_size))
+
+        n_bins = self.n_samples // bin_size
+        edges = np.arange(n_bins + 1, dtype=np.int64) * bin_size
+
+        # One extra zero byte allows looking up the byte of an edge lying at the very end of the buffer
+        popcount = np.append(_popcount(self.data), np.uint8(0))
+        data = np.append(self.data, np.uint8(0))
+
+        edges_bytes = edges >> 3
+        full = np.add.reduceat(popcount, edges_bytes, dtype=np.int64)[:-1]
+        full[edges_bytes[1:] == edges_bytes[:-1]] = 0
+
+        leading_mask = (np.right_shift(0xFF00, edges & 7) & 0xFF).astype(np.uint8)
+        leading = _popcount(data[edges_bytes] & leading_mask).astype(np.int64)
+
+        spikes_count = full - leading[:-1] + leading[1:]
+
+        return spikes_count
+
+    def _combine(self, other, operation):
+        other = as_packed_train(other)
+
+        n_samples = max(self.n_samples, other.n_samples)
+        size = max(self.data.size, other.data.size)
+        data = np.zeros(size, dtype=np.uint8)
+        other_data = np.zeros(size, dtype=np.uint8)
+        data[:self.data.size] = self.data
+        other_data[:other.data.size] = other.data
+
+        return PackedTrain(operation(data, other_data), n_samples)
+
+    def _clear_padding(self):
+        n_full_bytes, n_bits = divmod(self.n_samples, 8)
+        if n_full_bytes < self.data.size:
+            self.data[n_full_bytes] &= np.uint8((0xFF00 >> n_bits) & 0xFF)
+            self.data[n_full_bytes + 1:] = 0
+
+def as_packed_train(train):
+    '''
+    Get a spike train as a PackedTrain, packing boolean spike trains, or
+    trains of zeros and ones, and leaving packed ones unchanged.
+    '''
+    if isinstance(train, PackedTrain):
+        return train
+
+    if not isinstance(train, (np.ndarray, list, tuple)):
+        raise TypeError("'train' expected to be a PackedTrain or a spike train, received " + type(train).__name__)
+
+    train = np.asarray(train)
+    if train.dtype != bool and np.any((train != 0) & (train != 1)):
+        raise ValueError("'train' expected to be a spike train of zeros and ones to be packed")
+
+    return PackedTrain.from_train(train)
@@ -39,10 +39,42 @@ def convert_idxs_to_train(idxs:np.ndarray, duration:float = None, sampling_time:
 
     return train
 
+def get_spikes_idxs(spikes:np.ndarray):
+    spikes = np.asarray(spikes).squeeze()
+
+    if spikes.dtype == 'bool':
+        spikes_idxs = convert_train_to_idxs(spikes)
+    else:
+        spikes_idxs = spikes
+
+    return np.atleast_1d(spikes_idxs.squeeze()).astype(np.int64)
+
 def get_in_samples(value, sampling_time:float = None):
     if sampling_time is not None:
         value = math.floor(value/sampling_time)
     else:
         value = math.floor(value)
 
-    return value
\ No newline at end of file
+    return value
+
+def is_reader(data):
+    return hasattr(data, 'read') and hasattr(data, 'gather') and not isinstance(data, np.ndarray)
+
+def get_reader_channel(reader, channel:int = None):
+    if channel is None:
+        if reader.n_channels > 1:
+            raise ValueError("'channel' must be specified when reading a recording with " + str(reader.n_channels) + " channels")
+        channel = 0
+
+    return channel
+
+def read_data(data, channel:int = None):
+    # Recording readers are duck-typed, so that utils does not depend on io
+    if is_reader(data):
+        return data.read(channels=get_reader_channel(data, channel))
+
+    # Only the requested channel is converted, so that memory maps are not loaded as a whole
+    if channel is not None and np.ndim(data) > 1:
+        data = data[channel]
+
+    return np.asarray(data, dtype=np.float64)
\ No newline at end of file
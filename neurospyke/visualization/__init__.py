@@ -5,10 +5,16 @@ from .ieih import plot_IEIH
 from .psth import plot_PSTH
 from .crosscorr import plot_cross_correlogram
 from .raster import plot_raster
+from .grid import plot_grid
+from .live import LivePSTH, LiveRaster
+from .report import render_figures
 import matplotlib.pyplot as pyplot
 
 __all__ = [
     'plot_raw_data', 'plot_spikes', 'plot_raster',
     'plot_butterfly',
     'plot_IEIH',
-    'plot_PSTH', 'plot_cross_correlogram', 'pyplot']
\ No newline at end of file
+    'plot_PSTH', 'plot_cross_correlogram',
+    'plot_grid',
+    'LivePSTH', 'LiveRaster',
+    'render_figures', 'pyplot']
\ No newline at end of file
@@ -1,17 +1,28 @@
 import matplotlib.pyplot as plt
 import numpy as np
 
+from matplotlib.colors import LogNorm
 from matplotlib.ticker import MaxNLocator
-from .. import utils
+from .. import parallel, utils
 from ..spikes.sorting import get_waveforms 
 
+MODES = ['auto', 'density', 'lines']
+
 def _parse_kwargs(**kwargs):
     kwargs_list = [
+        {'key': 'ax', 'default': None, 'type': None},
         {'key': 'boxoff', 'default': True, 'type': bool},
+        {'key': 'cmap', 'default': 'viridis', 'type': str},
         {'key': 'dpi', 'default': 100, 'type': float},
         {'key': 'figsize', 'default': (6, 3), 'type': tuple},
         {'key': 'linewidth', 'default': 0.5, 'type': float},
+        {'key': 'max_lines', 'default': 1000, 'type': int},
+        {'key': 'median', 'default': False, 'type': bool},
+        {'key': 'mode', 'default': 'auto', 'type': str},
+        {'key': 'n_bins', 'default': 200, 'type': int},
         {'key': 'num', 'default': None, 'type': str},
+        {'key': 'overlay_color', 'default': 'red', 'type': str},
+        {'key': 'percentiles', 'default': None, 'type': tuple},
         {'key': 'sampling_time', 'default': None, 'type': float},
         {'key': 'title', 'default': 'Butterfly Plot', 'type': str},
         {'key': 'window_length', 'default': 0.001 if kwargs.get('sampling_time', None) is not None else 20, 'type': float},
@@ -22,6 +33,9 @@ def _parse_kwargs(**kwargs):
     ]
     kwargs = utils.check_kwargs_list(kwargs_list, **kwargs)
 
+    if kwargs.get('mode') not in MODES:
+        raise ValueError("'mode' expected to be one of " + ", ".join(["'" + mode + "'" for mode in MODES]) + ", received '" + kwargs.get('mode') + "'")
+
     return kwargs
 
 def plot_butterfly(data:np.ndarray, spikes:np.ndarray = None, **kwargs):
@@ -34,10 +48,11 @@ def plot_butterfly(data:np.ndarray, spikes:np.ndarray = None, **kwargs):
 
     Parameters
     ----------
-    data : ndarray
+    data : ndarray or Reader
         A (w x s) matrix of waveforms, where w is the number of spikes waveforms and
         s represents the number the samples for each waveform. Otherwise, an array
-        containing the recorded data: in this case spikes must be specified as well.
+        containing the recorded data, or a reader of a recording: in this case
+        spikes must be specified as well, and waveforms are read in chunks.
     spikes : ndarray, optional
         An array containing the detected spikes. It can be express both
         as a spike train or as a list of the indices at which spikes occur.
@@ -48,37 +63,62 @@ def plot_butterfly(data:np.ndarray, spikes:np.ndarray = None, **kwargs):
         The sampling time for the recorded data. If specified, the algorithm
         will work in the time domain (the other parameters should then be
         specified in seconds). Otherwise, it will work with samples.
+    mode : {'auto', 'density', 'lines'}, default='auto'
+        How waveforms are drawn. 'lines' draws a line per waveform, while
+        'density' draws a log-scaled image of the number of waveforms
+        crossing each (time, amplitude) bin. 'auto' employs 'lines' up to
+        max_lines waveforms, and 'density' otherwise.
+    max_lines : int, default=1000
+        The maximum number of waveforms drawn as lines in 'auto' mode.
+    n_bins : int, default=200
+        The number of amplitude bins of the density image.
+    median : bool, default=False
+        If True, the median waveform is overlaid on the density image.
+    percentiles : tuple, optional
+        The percentiles, between 0 and 100, of the waveforms overlaid on
+        the density image.
     '''
     kwargs = _parse_kwargs(**kwargs)
 
-    # Cast data type to float
-    data = data.astype(np.float64).squeeze()
-
-    if len(data.shape) == 1:
-        spikes = spikes.squeeze()
+    if utils.is_reader(data) or len(np.shape(np.squeeze(data))) == 1:
+        spikes_idxs = utils.get_spikes_idxs(spikes)
+        waveforms = None
+        (n_waveforms, window_half_length) = (spikes_idxs.size, utils.get_in_samples(kwargs.get('window_length') / 2, kwargs.get('sampling_time')))
+    else:
+        waveforms = np.asarray(data)
+        (n_waveforms, window_half_length) = (waveforms.shape[0], utils.get_in_samples(waveforms.shape[1] / 2, None))
 
-        if spikes.dtype == 'bool':
-            spikes_idxs = utils.convert_train_to_idxs(spikes)
-        else:
-            spikes_idxs = spikes
+    mode = kwargs.get('mode')
+    if mode == 'auto':
+        mode = 'lines' if n_waveforms <= kwargs.get('max_lines') else 'density'
 
-        waveforms = get_waveforms(data, spikes_idxs, **kwargs)
+    if kwargs.get('ax') is None:
+        plt.figure(num=kwargs.get('num'), figsize=kwargs.get('figsize'), dpi=kwargs.get('dpi'))
+        ax = plt.gca()
     else:
-        waveforms = data    
+        ax = kwargs.get('ax')
 
-    plt.figure(num=kwargs.get('num'), figsize=kwargs.get('figsize'), dpi=kwargs.get('dpi'))
-    window_half_length = utils.get_in_samples(waveforms.shape[1] / 2, None)
     window_times = kwargs.get('sampling_time') * 1000 * np.arange(-window_half_length, window_half_length, 1) if kwargs.get('sampling_time') is not None else np.arange(-window_half_length, window_half_length, 1)
-    window_times = np.tile(window_times, (waveforms.shape[0], 1))
 
-    plt.plot(window_times.T, waveforms.T, linewidth=kwargs.get('linewidth'))
+    if mode == 'lines':
+        if waveforms is None:
+            waveforms = get_waveforms(data, spikes_idxs, window_length=kwargs.get('window_length'), sampling_time=kwargs.get('sampling_time'))
+
+        ax.plot(window_times, np.asarray(waveforms, dtype=np.float64).T, linewidth=kwargs.get('linewidth'))
+    else:
+        (counts, amplitude_edges) = _get_density(data, spikes_idxs if waveforms is None else None, waveforms, kwargs)
+        time_step = window_times[1] - window_times[0] if window_times.size > 1 else 1
+        ax.imshow(np.ma.masked_equal(counts, 0), origin='lower', aspect='auto', interpolation='nearest', cmap=kwargs.get('cmap'), norm=LogNorm(vmin=1, vmax=max(counts.max(), 1)), extent=(window_times[0] - time_step / 2, window_times[-1] + time_step / 2, amplitude_edges[0], amplitude_edges[-1]))
+
+        percentiles = ([50] if kwargs.get('median') is True else []) + list(kwargs.get('percentiles') if kwargs.get('percentiles') is not None else [])
+        for (percentile, values) in zip(percentiles, _get_percentiles(counts, amplitude_edges, percentiles)):
+            ax.plot(window_times, values, color=kwargs.get('overlay_color'), linewidth=2 * kwargs.get('linewidth') if percentile == 50 else kwargs.get('linewidth'), linestyle='-' if percentile == 50 else '--')
 
-    plt.title(kwargs.get('title'))
-    plt.xlabel(kwargs.get('xlabel'))
-    plt.ylabel(kwargs.get('ylabel'))
+    ax.set_title(kwargs.get('title'))
+    ax.set_xlabel(kwargs.get('xlabel'))
+    ax.set_ylabel(kwargs.get('ylabel'))
 
-    ax = plt.gca()
-    ax.set_xlim(window_times[0, 0], window_times[0, -1]) if kwargs.get('xlim') is None else ax.set_xlim(kwargs.get('xlim'))
+    ax.set_xlim(window_times[0], window_times[-1]) if kwargs.get('xlim') is None else ax.set_xlim(kwargs.get('xlim'))
     ax.set_ylim(None, None) if kwargs.get('ylim') is None else ax.set_ylim(kwargs.get('ylim'))
 
     if kwargs.get('sampling_time') is None:
@@ -88,4 +128,56 @@ def plot_butterfly(data:np.ndarray, spikes:np.ndarray = None, **kwargs):
         ax.spines['top'].set_visible(False)
         ax.spines['right'].set_visible(False)
 
-    return
\ No newline at end of file
+    return
+
+def _iter_waveforms(data, spikes_idxs, waveforms, kwargs):
+    # Waveforms are processed in chunks, so that they are never all in memory when taken from the data
+    if waveforms is not None:
+        chunk_size = max(parallel.get_config()['chunk_size'] // max(waveforms.shape[1], 1), 1)
+        for chunk_start in range(0, waveforms.shape[0], chunk_size):
+            yield np.asarray(waveforms[chunk_start:chunk_start + chunk_size], dtype=np.float64)
+    else:
+        window_samples = 2 * utils.get_in_samples(kwargs.get('window_length') / 2, kwargs.get('sampling_time'))
+        chunk_size = max(parallel.get_config()['chunk_size'] // max(window_samples, 1), 1)
+        for chunk_start in range(0, spikes_idxs.size, chunk_size):
+            yield np.asarray(get_waveforms(data, spikes_idxs[chunk_start:chunk_start + chunk_size], window_length=kwargs.get('window_length'), sampling_time=kwargs.get('sampling_time')), dtype=np.float64).reshape(-1, window_samples)
+
+def _get_density(data, spikes_idxs, waveforms, kwargs):
+    # The amplitude range is given by ylim, or by a first pass over the waveforms
+    if kwargs.get('ylim') is not None and None not in kwargs.get('ylim'):
+        (amplitude_min, amplitude_max) = kwargs.get('ylim')
+    else:
+        extrema = [(np.amin(chunk), np.amax(chunk)) for chunk in _iter_waveforms(data, spikes_idxs, waveforms, kwargs) if chunk.size > 0]
+        (amplitude_min, amplitude_max) = (min([extremum[0] for extremum in extrema]), max([extremum[1] for extremum in extrema])) if len(extrema) > 0 else (-1, 1)
+        if amplitude_max <= amplitude_min:
+            (amplitude_min, amplitude_max) = (amplitude_min - 1, amplitude_max + 1)
+
+    n_bins = kwargs.get('n_bins')
+    amplitude_edges = np.linspace(amplitude_min, amplitude_max, n_bins + 1)
+
+    # Without waveforms the density is empty, but still spans the window
+    window_samples = waveforms.shape[1] if waveforms is not None else 2 * utils.get_in_samples(kwargs.get('window_length') / 2, kwargs.get('sampling_time'))
+    counts = np.zeros((n_bins, window_samples), dtype=np.int64)
+    for chunk in _iter_waveforms(data, spikes_idxs, waveforms, kwargs):
+        # A single bincount over the flat (amplitude bin, time) indices of all the samples
+        is_inside = (chunk >= amplitude_min) & (chunk <= amplitude_max)
+        amplitude_bins = np.minimum(((chunk - amplitude_min) * (n_bins / (amplitude_max - amplitude_min))).astype(np.int64), n_bins - 1)
+        flat_idxs = (amplitude_bins * chunk.shape[1] + np.arange(chunk.shape[1]))[is_inside]
+        counts += np.bincount(flat_idxs, minlength=counts.size).reshape(counts.shape)
+
+    return counts, amplitude_edges
+
+def _get_percentiles(counts, amplitude_edges, percentiles):
+    # Percentiles are interpolated within bins, from the cumulative distribution of each time sample
+    cdf = np.cumsum(counts, axis=0)
+    totals = np.maximum(cdf[-1], 1)
+
+    values = []
+    for percentile in percentiles:
+        target = percentile / 100 * totals
+        bins = np.minimum(np.argmax(cdf >= target, axis=0), counts.shape[0] - 1)
+        previous = np.where(bins > 0, cdf[np.maximum(bins - 1, 0), np.arange(counts.shape[1])], 0)
+        fraction = (target - previous) / np.maximum(counts[bins, np.arange(counts.shape[1])], 1)
+        values.append(amplitude_edges[bins] + np.clip(fraction, 0, 1) * (amplitude_edges[1] - amplitude_edges[0]))
+
+    return values
\ No newline at end of file
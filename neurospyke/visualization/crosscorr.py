@@ -5,6 +5,7 @@ from .. import utils
 def _parse_kwargs(**kwargs):
     kwargs_list = [
         {'key': 'alpha', 'default': 0.25, 'type': float},
+        {'key': 'ax', 'default': None, 'type': None},
         {'key': 'color', 'default': '#1f77b4', 'type': str},
         {'key': 'dpi', 'default': 100, 'type': float},
         {'key': 'figsize', 'default': (6, 3), 'type': tuple},
@@ -20,24 +21,28 @@ def _parse_kwargs(**kwargs):
 def plot_cross_correlogram(cross_correlation, window_length, **kwargs):
     kwargs = _parse_kwargs(**kwargs)
 
-    plt.figure(figsize=kwargs.get('figsize'), dpi=kwargs.get('dpi'))
+    if kwargs.get('ax') is None:
+        plt.figure(figsize=kwargs.get('figsize'), dpi=kwargs.get('dpi'))
+        ax = plt.gca()
+    else:
+        ax = kwargs.get('ax')
+
     n_max = int((np.size(cross_correlation, 0) - 1) / 2)
     tau = window_length / n_max
     times = np.arange(-n_max*tau, (n_max+1)*tau, tau)
 
     if kwargs.get('is_barplot') is True:
-        plt.bar(times, cross_correlation, width=tau*0.75, color=kwargs.get('color'))
+        ax.bar(times, cross_correlation, width=tau*0.75, color=kwargs.get('color'))
     else:
         if kwargs.get('fill') is True:
-            plt.fill_between(times, cross_correlation, facecolor=kwargs.get('color'), alpha=kwargs.get('alpha'))
+            ax.fill_between(times, cross_correlation, facecolor=kwargs.get('color'), alpha=kwargs.get('alpha'))
         
-        plt.plot(times, cross_correlation, linewidth=kwargs.get('linewidth'), color=kwargs.get('color'))
+        ax.plot(times, cross_correlation, linewidth=kwargs.get('linewidth'), color=kwargs.get('color'))
 
-    plt.title(kwargs.get('title'))
-    plt.xlabel('Time (s)')
-    plt.ylabel('C(' + r'$\tau$' + ')')
+    ax.set_title(kwargs.get('title'))
+    ax.set_xlabel('Time (s)')
+    ax.set_ylabel('C(' + r'$\tau$' + ')')
 
-    ax = plt.gca()
     ax.set_ylim(0, None)
 
     ax.spines['top'].set_visible(False)
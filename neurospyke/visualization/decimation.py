@@ -0,0 +1,166 @@
+import math
+import numpy as np
+
+from .. import parallel, utils
+
+def get_minmax_envelope(data, start:int = 0, stop:int = None, n_bins:int = 1000, channel:int = None):
+    '''
+    Decimate a time window of a recording to the minimum and maximum of each
+    of n_bins bins, in their temporal order, so that a line drawn through
+    them covers the same pixels as a line drawn through all the samples.
+    Samples are read in chunks and only the decimated values are converted
+    to floating point.
+
+    Parameters
+    ----------
+    data : ndarray or Reader
+        The array of recorded data, or a reader of a recording.
+    start : int, default=0
+        The index of the first sample of the window.
+    stop : int, optional
+        The index following the last sample of the window. If not specified,
+        the window extends to the end of the recording.
+    n_bins : int, default=1000
+        The number of bins. If the window contains at most 2 * n_bins
+        samples, they are returned as they are.
+    channel : int, optional
+        The channel to read, when data is a multi-channel reader or matrix.
+
+    Returns
+    -------
+    samples_idxs : ndarray
+        The indices of the decimated samples.
+    values : ndarray
+        The values of the decimated samples.
+    '''
+    (data, n_samples) = _get_channel_data(data, channel)
+    (start, stop, _) = slice(start, stop).indices(n_samples)
+
+    if stop - start <= 2 * n_bins:
+        return np.arange(start, stop), _read(data, channel, start, stop)
+
+    bin_size = math.ceil((stop - start) / n_bins)
+    chunk_size = bin_size * max(parallel.get_config()['chunk_size'] // bin_size, 1)
+
+    samples_idxs = []
+    values = []
+    for chunk_start in range(start, stop, chunk_size):
+        chunk_stop = min(chunk_start + chunk_size, stop)
+        chunk = _read(data, channel, chunk_start, chunk_stop, dtype=None)
+
+        # The last bin of the window may be shorter
+        n_chunk_bins = math.ceil(chunk.size / bin_size)
+        chunk = np.concatenate([chunk, np.repeat(chunk[-1:], n_chunk_bins * bin_size - chunk.size)])
+        bins = chunk.reshape(n_chunk_bins, bin_size)
+
+        extrema = np.sort(np.stack([np.argmin(bins, axis=1), np.argmax(bins, axis=1)], axis=1), axis=1)
+        samples_idxs.append((extrema + chunk_start + bin_size * np.arange(n_chunk_bins)[:, np.newaxis]).ravel())
+        values.append(np.take_along_axis(bins, extrema, axis=1).ravel())
+
+    samples_idxs = np.minimum(np.concatenate(samples_idxs), stop - 1)
+    values = np.concatenate(values).astype(np.float64)
+
+    return samples_idxs, values
+
+class LODLine:
+    '''
+    A line showing a recording at a level of detail matching the axes: the
+    visible time window is decimated to the minimum and maximum of about one
+    bin per pixel, and decimated again whenever the limits of the x axis
+    change. The cost of drawing therefore depends on the size of the axes,
+    not on the length of the recording.
+
+    Parameters
+    ----------
+    ax : matplotlib.axes.Axes
+        The axes to draw on.
+    data : ndarray or Reader
+        The array of recorded data, or a reader of a recording.
+    channel : int, optional
+        The channel to read, when data is a multi-channel reader or matrix.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, the x axis
+        is in seconds. Otherwise, it is in samples.
+    n_bins : int, optional
+        The number of bins of the decimation. If not specified, it is the
+        width of the axes in pixels.
+    pyramid : MinMaxPyramid, optional
+        A min/max pyramid of the recording. If specified, windows longer than
+        its finest bins are decimated from the pyramid, without reading the
+        recording.
+    **kwargs
+        The properties of the line, passed to ax.plot.
+    '''
+    def __init__(self, ax, data, channel:int = None, sampling_time:float = None, n_bins:int = None, pyramid = None, **kwargs):
+        self.ax = ax
+        self.data = data
+        self.channel = channel
+        self.sampling_time = sampling_time
+        self.n_bins = n_bins
+        self.pyramid = pyramid
+        self.n_samples = _get_channel_data(data, channel)[1]
+
+        if pyramid is not None and pyramid.n_samples != self.n_samples:
+            raise ValueError("'pyramid' expected to contain " + str(self.n_samples) + " samples, received " + str(pyramid.n_samples))
+
+        n_bins = self.n_bins if self.n_bins is not None else max(int(ax.get_window_extent().width), 1)
+        (samples_idxs, values) = self.get_envelope(0, self.n_samples, n_bins)
+        (self.line,) = ax.plot(self.get_times(samples_idxs), values, **kwargs)
+
+        # The callback holds the only reference to this object, which lives as long as the axes
+        ax.callbacks.connect('xlim_changed', lambda ax: self.update())
+
+    def get_times(self, samples_idxs):
+        '''
+        Convert indices of samples to coordinates of the x axis.
+        '''
+        return samples_idxs * self.sampling_time if self.sampling_time is not None else samples_idxs
+
+    def get_samples(self, times):
+        '''
+        Convert coordinates of the x axis to indices of samples.
+        '''
+        return times / self.sampling_time if self.sampling_time is not None else times
+
+    def update(self):
+        '''
+        Decimate again the visible time window.
+        '''
+        (first, last) = np.sort(self.get_samples(np.array(self.ax.get_xlim(), dtype=np.float64)))
+        start = int(np.clip(math.floor(first) - 1, 0, self.n_samples))
+        stop = int(np.clip(math.ceil(last) + 2, 0, self.n_samples))
+
+        n_bins = self.n_bins if self.n_bins is not None else max(int(self.ax.get_window_extent().width), 1)
+        (samples_idxs, values) = self.get_envelope(start, stop, n_bins)
+
+        self.line.set_data(self.get_times(samples_idxs), values)
+
+    def get_envelope(self, start, stop, n_bins):
+        '''
+        Decimate a time window, from the pyramid if possible, otherwise as
+        get_minmax_envelope.
+        '''
+        if self.pyramid is not None:
+            (samples_idxs, values) = self.pyramid.get_envelope(start, stop, n_bins, self.channel)
+            if samples_idxs is not None:
+                return samples_idxs, values
+
+        return get_minmax_envelope(self.data, start, stop, n_bins, self.channel)
+
+def _get_channel_data(data, channel):
+    if utils.is_reader(data):
+        return data, data.n_samples
+
+    data = data if isinstance(data, np.ndarray) else np.asarray(data)
+    if channel is not None:
+        data = data[channel]
+    elif data.ndim > 1:
+        data = data.squeeze()
+
+    return data, data.shape[-1]
+
+def _read(data, channel, start, stop, dtype = np.float64):
+    if utils.is_reader(data):
+        return data.read(channels=utils.get_reader_channel(data, channel), start=start, stop=stop)
+
+    return np.asarray(data[start:stop], dtype=dtype)
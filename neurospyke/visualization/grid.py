@@ -0,0 +1,265 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+from .. import parallel, utils
+from ..io import MinMaxPyramid, SpikeStore
+from .decimation import get_minmax_envelope
+
+SUMMARIES = ['amplitude', 'none', 'rate']
+
+def _parse_kwargs(data, spikes, **kwargs):
+    kwargs_list = [
+        {'key': 'ax', 'default': None, 'type': None},
+        {'key': 'channels_labels', 'default': 'auto', 'type': None},
+        {'key': 'cmap', 'default': 'viridis', 'type': str},
+        {'key': 'color', 'default': 'black', 'type': str},
+        {'key': 'dpi', 'default': 100, 'type': float},
+        {'key': 'figsize', 'default': None, 'type': tuple},
+        {'key': 'fontsize', 'default': 5, 'type': float},
+        {'key': 'linewidth', 'default': 0.5, 'type': float},
+        {'key': 'n_bins', 'default': None, 'type': int},
+        {'key': 'n_jobs', 'default': None, 'type': int},
+        {'key': 'num', 'default': None, 'type': str},
+        {'key': 'pyramid', 'default': None, 'type': None},
+        {'key': 'sampling_time', 'default': None, 'type': float},
+        {'key': 'summary', 'default': 'rate' if spikes is not None else 'none', 'type': str},
+        {'key': 'title', 'default': 'MEA Overview', 'type': str},
+        {'key': 'window', 'default': None, 'type': tuple},
+        {'key': 'ylim', 'default': None, 'type': float}
+    ]
+    kwargs = utils.check_kwargs_list(kwargs_list, **kwargs)
+
+    if kwargs.get('summary') not in SUMMARIES:
+        raise ValueError("'summary' expected to be one of " + ", ".join(["'" + summary + "'" for summary in SUMMARIES]) + ", received '" + kwargs.get('summary') + "'")
+    if kwargs.get('summary') != 'none' and spikes is None:
+        raise ValueError("'spikes' must be specified for the '" + kwargs.get('summary') + "' summary")
+    if kwargs.get('summary') == 'amplitude' and data is None and not isinstance(spikes, SpikeStore):
+        raise ValueError("'data' must be specified for the 'amplitude' summary, unless spikes are read from a store with amplitudes")
+
+    return kwargs
+
+def plot_grid(layout, data = None, spikes = None, **kwargs):
+    '''
+    Plot an overview of a multi-electrode array, drawing each electrode at its
+    position in the array as a small multiple: a mini-trace of the recorded
+    data and a background colored by a summary of its spikes. All the
+    electrodes share a single axes, so that layout, limits and ticks are
+    computed once, and the mini-traces are decimated to the minimum and
+    maximum of about one bin per pixel of each cell, in parallel across
+    channels or from a min/max pyramid.
+
+    Parameters
+    ----------
+    layout : array_like or dict
+        The position of the electrodes. It can be expressed both as a
+        (n_rows x n_columns) matrix of channel indices, where negative values
+        or None mark positions without an electrode, or as a dict mapping
+        each channel to its (row, column) position.
+    data : ndarray or Reader, optional
+        A (n_channels x n_samples) matrix of recorded data, or a reader. If
+        not specified, mini-traces are not drawn.
+    spikes : list of ndarray or SpikeStore, optional
+        The detected spikes of each channel, expressed both as spike trains or
+        the indices at which spikes occur, or a store of detected spikes.
+    summary : {'rate', 'amplitude', 'none'}, default='rate' if spikes are specified, otherwise 'none'
+        The summary coloring the background of each electrode: the firing rate,
+        or the median absolute amplitude of the spikes, read from the store
+        if it contains amplitudes, otherwise from the data.
+    window : tuple, optional
+        The time window of the mini-traces and of the summaries. If not
+        specified, the whole recording is employed.
+    ylim : float, optional
+        The half-range of the mini-traces, shared by all the electrodes. If not
+        specified, it is the 99.5th percentile of the absolute decimated values.
+    n_bins : int, optional
+        The number of bins of the decimation of each mini-trace. If not
+        specified, it is the width of each cell in pixels.
+    pyramid : MinMaxPyramid or str, optional
+        A min/max pyramid of the recording, or its path. If specified, long
+        windows are decimated from the pyramid, without reading the recording.
+    channels_labels : list or dict, optional
+        The label of each channel, drawn in the corner of its cell. By default
+        channel indices are drawn. If None, no label is drawn.
+    n_jobs : int, optional
+        The number of processes decimating the channels. If not specified, the
+        value set by parallel.config is employed.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, the window
+        and the rates are in seconds. Otherwise, they are in samples.
+    '''
+    kwargs = _parse_kwargs(data, spikes, **kwargs)
+
+    (channels, rows, columns, n_rows, n_columns) = _get_positions(layout)
+
+    if utils.is_reader(data) and kwargs.get('sampling_time') is None:
+        kwargs['sampling_time'] = data.sampling_time
+    sampling_time = kwargs.get('sampling_time') if kwargs.get('sampling_time') is not None else 1
+
+    n_samples = _get_n_samples(data, spikes)
+    if kwargs.get('window') is None:
+        (start, stop) = (0, n_samples)
+    else:
+        (start, stop) = (utils.get_in_samples(kwargs.get('window')[0], kwargs.get('sampling_time')), utils.get_in_samples(kwargs.get('window')[1], kwargs.get('sampling_time')))
+        (start, stop, _) = slice(start, stop).indices(n_samples)
+
+    if kwargs.get('ax') is None:
+        figsize = kwargs.get('figsize') if kwargs.get('figsize') is not None else (0.6 * n_columns + 1.5, 0.45 * n_rows + 1)
+        plt.figure(num=kwargs.get('num'), figsize=figsize, dpi=kwargs.get('dpi'))
+        ax = plt.gca()
+    else:
+        ax = kwargs.get('ax')
+
+    # Summaries, computed at once for all the channels from the columns of the spikes
+    if kwargs.get('summary') != 'none':
+        (spikes_channels, spikes_times, spikes_amplitudes) = _get_spikes_columns(spikes, channels, start, stop, load_amplitudes=kwargs.get('summary') == 'amplitude')
+
+        if kwargs.get('summary') == 'rate':
+            values = np.bincount(spikes_channels, minlength=np.max(channels) + 1)[channels] / max((stop - start) * sampling_time, np.finfo(np.float64).tiny)
+            label = 'Rate (spikes/s)' if kwargs.get('sampling_time') is not None else 'Rate (spikes/sample)'
+        else:
+            if spikes_amplitudes is None or np.all(np.isnan(spikes_amplitudes)):
+                spikes_amplitudes = _gather_amplitudes(data, spikes_channels, spikes_times)
+            values = _get_medians(spikes_channels, np.abs(spikes_amplitudes), np.max(channels) + 1)[channels]
+            label = 'Median amplitude (µV)'
+
+        image = np.full((n_rows, n_columns), np.nan)
+        image[rows, columns] = values
+        summary_image = ax.imshow(np.ma.masked_invalid(image), cmap=kwargs.get('cmap'), extent=(0, n_columns, n_rows, 0), aspect='auto', interpolation='nearest')
+        ax.figure.colorbar(summary_image, ax=ax, label=label)
+
+    # Mini-traces, drawn as a single path through all the cells
+    if data is not None and stop > start:
+        n_bins = kwargs.get('n_bins') if kwargs.get('n_bins') is not None else max(int(ax.get_window_extent().width / n_columns), 8)
+        envelopes = _get_envelopes(data, channels, start, stop, n_bins, kwargs.get('pyramid'), kwargs.get('n_jobs'))
+
+        ylim = kwargs.get('ylim')
+        if ylim is None:
+            ylim = np.percentile(np.abs(np.concatenate([values for (_, values) in envelopes])), 99.5)
+        ylim = ylim if ylim > 0 else 1
+
+        (x, y) = ([], [])
+        for (channel_idx, (samples_idxs, values)) in enumerate(envelopes):
+            x.extend([columns[channel_idx] + 0.05 + 0.9 * (samples_idxs - start) / max(stop - start - 1, 1), [np.nan]])
+            y.extend([rows[channel_idx] + 0.5 - 0.45 * np.clip(values / ylim, -1, 1), [np.nan]])
+        ax.plot(np.concatenate(x), np.concatenate(y), color=kwargs.get('color'), linewidth=kwargs.get('linewidth'))
+
+        ax.set_xlabel('Traces: ' + str(np.round((stop - start) * sampling_time, 5)) + (' s' if kwargs.get('sampling_time') is not None else ' samples') + ', ±' + str(np.round(ylim, 2)) + ' µV')
+
+    if kwargs.get('channels_labels') is not None:
+        labels = kwargs.get('channels_labels')
+        for (channel, row, column) in zip(channels, rows, columns):
+            ax.text(column + 0.05, row + 0.05, str(channel) if isinstance(labels, str) and labels == 'auto' else str(labels[channel]), fontsize=kwargs.get('fontsize'), verticalalignment='top', horizontalalignment='left')
+
+    # Ticks at the centers of the cells, and a grid at their borders
+    ax.set_xlim(0, n_columns)
+    ax.set_ylim(n_rows, 0)
+    ax.set_xticks(np.arange(n_columns) + 0.5)
+    ax.set_xticklabels([str(column + 1) for column in range(n_columns)])
+    ax.set_yticks(np.arange(n_rows) + 0.5)
+    ax.set_yticklabels([str(row + 1) for row in range(n_rows)])
+    ax.set_xticks(np.arange(n_columns + 1), minor=True)
+    ax.set_yticks(np.arange(n_rows + 1), minor=True)
+    ax.grid(which='minor', color='lightgray', linewidth=0.5)
+    ax.tick_params(which='both', length=0, labelsize=kwargs.get('fontsize') + 1)
+
+    ax.set_title(kwargs.get('title'))
+
+    return
+
+def _get_positions(layout):
+    if isinstance(layout, dict):
+        channels = np.array([int(channel) for channel in layout.keys()], dtype=np.int64)
+        positions = np.array([tuple(position) for position in layout.values()], dtype=np.int64).reshape(-1, 2)
+        (rows, columns) = (positions[:, 0], positions[:, 1])
+        if np.any(positions < 0):
+            raise ValueError("'layout' expected to contain non-negative positions")
+        (n_rows, n_columns) = (int(np.max(rows)) + 1, int(np.max(columns)) + 1) if channels.size > 0 else (0, 0)
+    else:
+        grid = np.array(layout, dtype=np.float64)
+        if grid.ndim != 2:
+            raise ValueError("'layout' expected to be a 2-dimensional matrix, received " + str(grid.ndim) + " dimensions")
+        (n_rows, n_columns) = grid.shape
+        (rows, columns) = np.nonzero(np.nan_to_num(grid, nan=-1) >= 0)
+        channels = grid[rows, columns].astype(np.int64)
+
+    if channels.size == 0:
+        raise ValueError("'layout' expected to contain at least a channel")
+    if np.unique(channels).size != channels.size:
+        raise ValueError("'layout' expected to contain each channel once")
+
+    return channels, rows, columns, n_rows, n_columns
+
+def _get_n_samples(data, spikes):
+    if utils.is_reader(data):
+        return data.n_samples
+    if data is not None:
+        return np.shape(data)[-1]
+
+    # Without data, the recording is assumed to end with the last spike
+    if isinstance(spikes, SpikeStore):
+        times = spikes.read(columns=['time'])['time']
+        return int(np.max(times)) + 1 if times.size > 0 else 1
+
+    return max([int(utils.get_spikes_idxs(channel_spikes)[-1]) + 1 if np.size(utils.get_spikes_idxs(channel_spikes)) > 0 else 1 for channel_spikes in spikes])
+
+def _get_spikes_columns(spikes, channels, start, stop, load_amplitudes):
+    if isinstance(spikes, SpikeStore):
+        columns = ['channel', 'time', 'amplitude'] if load_amplitudes else ['channel', 'time']
+        out = spikes.read(channels=channels, start=start, stop=stop, columns=columns)
+        return out['channel'].astype(np.int64), out['time'].astype(np.int64), out.get('amplitude')
+
+    spikes_idxs = [utils.get_spikes_idxs(spikes[channel]) if np.size(spikes[channel]) > 0 else np.zeros(0, dtype=np.int64) for channel in channels]
+    spikes_idxs = [channel_idxs[(channel_idxs >= start) & (channel_idxs < stop)] for channel_idxs in spikes_idxs]
+    spikes_channels = np.repeat(channels, [channel_idxs.size for channel_idxs in spikes_idxs])
+
+    return spikes_channels, np.concatenate(spikes_idxs), None
+
+def _gather_amplitudes(data, spikes_channels, spikes_times):
+    if not utils.is_reader(data):
+        return np.asarray(data)[spikes_channels, spikes_times].astype(np.float64)
+
+    # Rows are grouped by channel, in any order of the channels, so that each channel is gathered once
+    order = np.argsort(spikes_channels, kind='stable')
+    sorted_channels = spikes_channels[order]
+
+    amplitudes = np.empty(spikes_times.size, dtype=np.float64)
+    for channel in np.unique(sorted_channels):
+        (first, last) = (np.searchsorted(sorted_channels, channel, side='left'), np.searchsorted(sorted_channels, channel, side='right'))
+        amplitudes[order[first:last]] = data.gather(spikes_times[order[first:last]], channels=int(channel))
+
+    return amplitudes
+
+def _get_medians(groups, values, n_groups):
+    # The median of each group, sorting all the values once by group and value
+    order = np.lexsort((values, groups))
+    (groups, values) = (groups[order], values[order])
+
+    counts = np.bincount(groups, minlength=n_groups)
+    firsts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    medians = np.full(n_groups, np.nan)
+    is_valid = counts > 0
+    medians[is_valid] = (values[firsts[is_valid] + (counts[is_valid] - 1) // 2] + values[firsts[is_valid] + counts[is_valid] // 2]) / 2
+
+    return medians
+
+def _get_envelopes(data, channels, start, stop, n_bins, pyramid, n_jobs):
+    if isinstance(pyramid, str):
+        pyramid = MinMaxPyramid(pyramid)
+
+    envelopes = [(None, None)] * channels.size
+    if pyramid is not None:
+        envelopes = [pyramid.get_envelope(start, stop, n_bins, int(channel)) for channel in channels]
+
+    # Channels not covered by the pyramid are read from the recording, in parallel
+    missing = [channel_idx for (channel_idx, (samples_idxs, _)) in enumerate(envelopes) if samples_idxs is None]
+    if len(missing) > 0:
+        data = data if utils.is_reader(data) else np.atleast_2d(data)
+        out = parallel.map_channels(_get_channel_envelope, data, channels=channels[missing], n_jobs=n_jobs, read=False, start=start, stop=stop, n_bins=n_bins)
+        for (channel_idx, envelope) in zip(missing, out):
+            envelopes[channel_idx] = envelope
+
+    return envelopes
+
+def _get_channel_envelope(data, start, stop, n_bins, channel = None):
+    return get_minmax_envelope(data, start, stop, n_bins, channel)
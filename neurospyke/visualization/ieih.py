@@ -7,12 +7,14 @@ from .. import utils
 def _parse_kwargs(**kwargs):
     kwargs_list = [
         {'key': 'alpha', 'default': 0.25, 'type': float},
+        {'key': 'ax', 'default': None, 'type': None},
         {'key': 'barplot', 'default': False, 'type': bool},
         {'key': 'boxoff', 'default': True, 'type': bool},
         {'key': 'color', 'default': '#1f77b4', 'type': str},
         {'key': 'dpi', 'default': 100, 'type': float},
         {'key': 'figsize', 'default': (6, 3), 'type': tuple},
         {'key': 'linewidth', 'default': 2, 'type': float},
+        {'key': 'log', 'default': False, 'type': bool},
         {'key': 'normalize', 'default': False, 'type': bool},
         {'key': 'num', 'default': None, 'type': str},
         {'key': 'range', 'default': None, 'type': tuple},
@@ -27,16 +29,24 @@ def _parse_kwargs(**kwargs):
 
     return kwargs
 
-def plot_IEIH(IEI:np.ndarray, bins:int = None, **kwargs):
+def plot_IEIH(IEI, bins:int = None, **kwargs):
     '''
     Plot an Inter-Event-Interval histogram, such as the Inter-Spike-Interval histogram.
 
     Parameters
     ----------
-    IEI : ndarray
-        The input Inter-Event-Interval to plot either in samples or in seconds.
-    bins : int, default=None
-        The number of equal-width bins for the histogram.
+    IEI : ndarray, tuple or IEIHistogramAccumulator
+        The input Inter-Event-Interval to plot either in samples or in seconds,
+        or a precomputed histogram, expressed both as a tuple of counts and
+        edges, as returned by np.histogram, or as an accumulator, whose
+        result is plotted. Precomputed histograms, such as the merged counts
+        of several channels, are plotted without processing any interval.
+    bins : int or ndarray, default=None
+        The number of bins for the histogram, or their edges. If not
+        specified, 10 bins are employed.
+    log : bool, default=False
+        If True, the bins are spaced evenly on a log scale, and the x axis
+        is logarithmic. Intervals are assigned to the bins in chunks.
     sampling_time : float, optional
         The sampling time for the recorded data. If specified, the algorithm
         will work in the time domain (the other parameters should then be
@@ -44,34 +54,45 @@ def plot_IEIH(IEI:np.ndarray, bins:int = None, **kwargs):
     '''
     kwargs = _parse_kwargs(**kwargs)
 
-    plt.figure(num=kwargs.get('num'), figsize=kwargs.get('figsize'), dpi=kwargs.get('dpi'))
+    if kwargs.get('ax') is None:
+        plt.figure(num=kwargs.get('num'), figsize=kwargs.get('figsize'), dpi=kwargs.get('dpi'))
+        ax = plt.gca()
+    else:
+        ax = kwargs.get('ax')
 
-    if bins is not None:
-        hist = np.histogram(IEI, bins=bins, range=kwargs.get('range'))
+    if hasattr(IEI, 'result'):
+        (events_count, edges) = IEI.result()
+    elif isinstance(IEI, tuple):
+        (events_count, edges) = (np.asarray(IEI[0]), np.asarray(IEI[1], dtype=np.float64))
     else:
-        hist = np.histogram(IEI, range=kwargs.get('range'))
-    
-    bins = [(hist[1][i] + hist[1][i+1]) / 2 for i in range(np.size(hist[1]) - 1)]
-    events_count = hist[0]
+        (events_count, edges) = utils.get_IEI_histogram(IEI, bins=bins if bins is not None else 10, range=kwargs.get('range'), log=kwargs.get('log'))
+
+    # Centers of the bins, geometric for log-spaced bins
+    is_log = kwargs.get('log') is True and edges[0] > 0
+    bins = np.sqrt(edges[:-1] * edges[1:]) if is_log else (edges[:-1] + edges[1:]) / 2
 
     if kwargs.get('normalize') is True:
-        events_count = events_count/np.sum(events_count)
+        events_count = events_count / max(np.sum(events_count), 1)
 
     if kwargs.get('barplot') is True:
-        plt.bar(bins, events_count, width=(bins[1] - bins[0]), align='edge', color=kwargs.get('color'))
+        ax.bar(edges[:-1], events_count, width=np.diff(edges), align='edge', color=kwargs.get('color'))
     else:
-        plt.fill_between(bins, events_count, facecolor=kwargs.get('color'), alpha=kwargs.get('alpha'))
-        plt.plot(bins, events_count, linewidth=kwargs.get('linewidth'), color=kwargs.get('color'))
+        ax.fill_between(bins, events_count, facecolor=kwargs.get('color'), alpha=kwargs.get('alpha'))
+        ax.plot(bins, events_count, linewidth=kwargs.get('linewidth'), color=kwargs.get('color'))
 
-    plt.title(kwargs.get('title'))
-    plt.xlabel(kwargs.get('xlabel'))
-    plt.ylabel(kwargs.get('ylabel'))
+    ax.set_title(kwargs.get('title'))
+    ax.set_xlabel(kwargs.get('xlabel'))
+    ax.set_ylabel(kwargs.get('ylabel'))
 
-    ax = plt.gca()
-    ax.set_xlim(kwargs.get('xlim'))
+    if is_log:
+        ax.set_xscale('log')
+        # A log axis cannot start at zero
+        ax.set_xlim((edges[0] if kwargs.get('xlim')[0] is None or kwargs.get('xlim')[0] <= 0 else kwargs.get('xlim')[0], kwargs.get('xlim')[1]))
+    else:
+        ax.set_xlim(kwargs.get('xlim'))
     ax.set_ylim(kwargs.get('ylim'))
 
-    if kwargs.get('sampling_time') is None:
+    if kwargs.get('sampling_time') is None and not is_log:
         ax.xaxis.set_major_locator(MaxNLocator(integer=True))
 
     if kwargs.get('boxoff') is True:
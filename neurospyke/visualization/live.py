@@ -0,0 +1,199 @@
+import matplotlib.pyplot as plt
+import numpy as np
+
+from .. import utils
+from .psth import plot_PSTH
+from .raster import _get_paths, plot_raster
+
+class _BlitView:
+    '''
+    Redraw a set of persistent artists with blitting: the axes without them
+    are saved once after each full draw of the figure, and each update
+    restores the saved background and draws only the artists on top of it,
+    then copies the region of the axes to the screen. Backends not
+    supporting blitting redraw the whole figure.
+    '''
+    def _init_view(self, ax, artists):
+        self.ax = ax
+        self.artists = artists
+        self._background = None
+
+        # Animated artists are skipped by full draws, and drawn on top of the saved background
+        for artist in self.artists:
+            artist.set_animated(True)
+        ax.figure.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        if event.canvas.supports_blit:
+            self._background = event.canvas.copy_from_bbox(self.ax.bbox)
+        for artist in self.artists:
+            artist.draw(event.renderer)
+
+    def redraw(self, full:bool = False):
+        '''
+        Draw the artists, blitting the region of the axes.
+
+        Parameters
+        ----------
+        full : bool, default=False
+            If True, the whole figure is drawn again, e.g. after changing
+            the limits of the axes.
+        '''
+        canvas = self.ax.figure.canvas
+
+        if full or self._background is None or not canvas.supports_blit:
+            canvas.draw()
+        else:
+            canvas.restore_region(self._background)
+            for artist in self.artists:
+                self.ax.draw_artist(artist)
+            canvas.blit(self.ax.bbox)
+
+        canvas.flush_events()
+
+class LiveRaster(_BlitView):
+    '''
+    A raster plot updated as new spikes arrive, e.g. from the events of a
+    LivePipeline, showing the spikes of the last window of time before the
+    latest sample. The spikes of each channel are a single path of a
+    persistent line collection, and older spikes are dropped as the window
+    slides, so that the cost of an update does not depend on the length of
+    the session. The x axis shows the time relative to the latest sample, so
+    that its ticks do not change and only the artists are redrawn.
+
+    Parameters
+    ----------
+    n_channels : int
+        The number of channels.
+    window : float
+        The length of the window shown, in seconds if sampling_time is
+        specified, otherwise in samples.
+    **kwargs
+        The styling parameters of plot_raster, e.g. ax, color, linewidth,
+        channels_height, channels_labels, title or sampling_time.
+    '''
+    def __init__(self, n_channels:int, window:float, **kwargs):
+        if kwargs.get('ax') is None:
+            plt.figure(num=kwargs.get('num'), figsize=kwargs.get('figsize', (6, np.min([0.1 * n_channels, 3]))), dpi=kwargs.get('dpi', 300))
+            kwargs['ax'] = plt.gca()
+
+        self.n_channels = n_channels
+        self.sampling_time = kwargs.get('sampling_time') if kwargs.get('sampling_time') is not None else 1
+        self.window = utils.get_in_samples(window, kwargs.get('sampling_time'))
+        self.channels_height = kwargs.get('channels_height', 0.9)
+        self.spikes_idxs = [np.zeros(0, dtype=np.int64) for _ in range(n_channels)]
+        self.stop = 0
+
+        plot_raster(list(self.spikes_idxs), **dict(kwargs, mode='lines', xlim=(-self.window * self.sampling_time, 0)))
+        self._init_view(kwargs['ax'], [kwargs['ax'].collections[-1]])
+
+    def update(self, spikes:list, stop:int):
+        '''
+        Add new spikes and slide the window to the latest sample.
+
+        Parameters
+        ----------
+        spikes : list of ndarray
+            The indices of the new spikes of each channel, in increasing
+            order, such as the 'spikes_idxs' of a LivePipeline event.
+        stop : int
+            The index following the latest sample, such as the 'stop' of a
+            LivePipeline event.
+        '''
+        if len(spikes) != self.n_channels:
+            raise ValueError("'spikes' expected to contain " + str(self.n_channels) + " elements, received " + str(len(spikes)))
+
+        self.stop = max(self.stop, int(stop))
+
+        for channel_idx in range(self.n_channels):
+            channel_idxs = np.atleast_1d(np.asarray(spikes[channel_idx], dtype=np.int64))
+            if channel_idxs.size > 0:
+                self.spikes_idxs[channel_idx] = np.concatenate([self.spikes_idxs[channel_idx], channel_idxs])
+
+            first = np.searchsorted(self.spikes_idxs[channel_idx], self.stop - self.window, side='left')
+            self.spikes_idxs[channel_idx] = self.spikes_idxs[channel_idx][first:]
+
+        self.artists[0].set_segments(_get_paths([channel_idxs - self.stop for channel_idxs in self.spikes_idxs], self.sampling_time, self.channels_height))
+        self.redraw()
+
+class LivePSTH(_BlitView):
+    '''
+    A PSTH updated as new trials arrive, accumulating the spike counts of
+    all the trials in persistent bars, or in a persistent line and filled
+    area. The cost of an update depends only on the number of bins. The y
+    axis grows geometrically when the histogram exceeds it, which is the only
+    case in which the whole figure is drawn again.
+
+    Parameters
+    ----------
+    n_bins : int
+        The number of bins of the histogram.
+    duration : float
+        The duration of the trials, as in plot_PSTH.
+    **kwargs
+        The styling parameters of plot_PSTH, e.g. ax, barplot, color, alpha,
+        linewidth, normalize, title or ylim.
+    '''
+    def __init__(self, n_bins:int, duration:float, **kwargs):
+        if kwargs.get('ax') is None:
+            plt.figure(num=kwargs.get('num'), figsize=kwargs.get('figsize', (6, 3)), dpi=kwargs.get('dpi', 100))
+            kwargs['ax'] = plt.gca()
+        ax = kwargs['ax']
+
+        self.n_bins = n_bins
+        self.normalize = kwargs.get('normalize', True)
+        self.barplot = kwargs.get('barplot', False)
+        self.counts = np.zeros(n_bins, dtype=np.int64)
+        self.n_trials = 0
+
+        # The artists added by plot_PSTH are kept and updated
+        (n_patches, n_collections, n_lines) = (len(ax.patches), len(ax.collections), len(ax.lines))
+        plot_PSTH(np.zeros((1, n_bins)), duration, **kwargs)
+        if self.barplot is True:
+            artists = list(ax.patches[n_patches:])
+        else:
+            artists = list(ax.collections[n_collections:]) + list(ax.lines[n_lines:])
+
+        self.is_fixed_ylim = kwargs.get('ylim') is not None and kwargs.get('ylim')[1] is not None
+        if not self.is_fixed_ylim:
+            ax.set_ylim(ax.get_ylim()[0], 1)
+
+        self._init_view(ax, artists)
+
+    def add_trials(self, spikes_count:np.ndarray):
+        '''
+        Add the spike counts of new trials.
+
+        Parameters
+        ----------
+        spikes_count : ndarray
+            A (n_trials x n_bins) matrix, or a single trial, of spike counts,
+            as computed by the PSTH analysis.
+        '''
+        spikes_count = np.atleast_2d(spikes_count)
+        if spikes_count.shape[1] != self.n_bins:
+            raise ValueError("'spikes_count' expected to contain " + str(self.n_bins) + " bins, received " + str(spikes_count.shape[1]))
+
+        self.counts += np.sum(spikes_count, axis=0, dtype=np.int64)
+        self.n_trials += spikes_count.shape[0]
+
+        values = self.counts / self.n_trials if self.normalize is True else self.counts
+        if self.barplot is True:
+            for (patch, value) in zip(self.artists, values):
+                patch.set_height(value)
+        else:
+            heights = np.insert(values, 0, 0)
+            x = np.arange(self.n_bins + 1)
+            # Recent versions of matplotlib compute the vertices of the area from its data at each draw
+            if hasattr(self.artists[0], 'set_data'):
+                self.artists[0].set_data(x, heights, 0)
+            else:
+                self.artists[0].set_verts([np.concatenate([[(0, 0)], np.stack([x, heights], axis=1), [(self.n_bins, 0)]])])
+            self.artists[1].set_ydata(heights)
+
+        (bottom, top) = self.ax.get_ylim()
+        if not self.is_fixed_ylim and np.max(values) > top:
+            self.ax.set_ylim(bottom, 1.5 * np.max(values))
+            self.redraw(full=True)
+        else:
+            self.redraw()
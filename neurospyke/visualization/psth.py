@@ -51,16 +51,15 @@ def plot_PSTH(spikes_count, duration, **kwargs):
         spikes_count = spikes_count / n_trials
     
     if kwargs.get('barplot') is True:
-        plt.bar(np.arange(n_bins), spikes_count, width=1, align='edge', color=kwargs.get('color'))
+        ax.bar(np.arange(n_bins), spikes_count, width=1, align='edge', color=kwargs.get('color'))
     else:
-        plt.fill_between(np.arange(n_bins+1), np.insert(spikes_count, 0, 0), facecolor=to_rgba(kwargs.get('color'), kwargs.get('alpha')))
-        plt.plot(np.insert(spikes_count, 0, 0), linewidth=kwargs.get('linewidth'), color=kwargs.get('color'))
+        ax.fill_between(np.arange(n_bins+1), np.insert(spikes_count, 0, 0), facecolor=to_rgba(kwargs.get('color'), kwargs.get('alpha')))
+        ax.plot(np.insert(spikes_count, 0, 0), linewidth=kwargs.get('linewidth'), color=kwargs.get('color'))
 
-    plt.title(kwargs.get('title'))
-    plt.xlabel(kwargs.get('xlabel'))
-    plt.ylabel(kwargs.get('ylabel'))
+    ax.set_title(kwargs.get('title'))
+    ax.set_xlabel(kwargs.get('xlabel'))
+    ax.set_ylabel(kwargs.get('ylabel'))
 
-    ax = plt.gca()
     ax.set_xlim(_parse_xlim(kwargs.get('xlim'), duration, n_bins))
     ax.set_ylim(kwargs.get('ylim'))
 
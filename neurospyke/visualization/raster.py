@@ -1,18 +1,25 @@
 import matplotlib.pyplot as plt
 import numpy as np
 
-from matplotlib.colors import to_rgba
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba, to_rgba_array
 from matplotlib.ticker import MaxNLocator
 from .. import utils
 
-def _compute_default_xlim(spikes_idxs, n_channels, margin = 1.01):
+MODES = ['auto', 'events', 'image', 'lines']
+
+def _compute_default_xlim(spikes_idxs, n_channels, sampling_time = None, margin = 1.01):
     xlim = [0, 0]
     
+    # Spikes are sorted by plot_raster, so the last one of each channel is the latest
     for channel_idx in range(n_channels):
         if np.size(spikes_idxs[channel_idx]) > 0:
-            channel_max = np.amax(spikes_idxs[channel_idx]) * margin
+            channel_max = spikes_idxs[channel_idx][-1] * margin
             if channel_max > xlim[1]:
                 xlim[1] = channel_max
+
+    if sampling_time is not None:
+        xlim[1] = xlim[1] * sampling_time
     
     xlim = tuple(xlim)
     return xlim
@@ -28,22 +35,27 @@ def _parse_kwargs(spikes_idxs, n_channels, **kwargs):
         {'key': 'dpi', 'default': 300, 'type': float},
         {'key': 'figsize', 'default': (6, np.min([0.1 * n_channels, 3])), 'type': tuple},
         {'key': 'linewidth', 'default': 0.25, 'type': float},
+        {'key': 'max_events', 'default': 100000, 'type': int},
+        {'key': 'mode', 'default': 'auto', 'type': str},
+        {'key': 'n_pixels', 'default': None, 'type': int},
         {'key': 'num', 'default': None, 'type': str},
         {'key': 'sampling_time', 'default': None, 'type': float},
         {'key': 'title', 'default': 'Raster Plot', 'type': str},
         {'key': 'reverse', 'default': False, 'type': bool},
         {'key': 'xlabel', 'default': 'Time (s)' if kwargs.get('sampling_time', None) is not None else 'Samples', 'type': str},
-        {'key': 'xlim', 'default': _compute_default_xlim(spikes_idxs, n_channels), 'type': tuple},
+        {'key': 'xlim', 'default': _compute_default_xlim(spikes_idxs, n_channels, kwargs.get('sampling_time', None)), 'type': tuple},
         {'key': 'ylabel', 'default': 'Trials', 'type': str}
     ]
     kwargs = utils.check_kwargs_list(kwargs_list, **kwargs)
 
     # Additional checks
+    if kwargs.get('mode') not in MODES:
+        raise ValueError("'mode' expected to be one of " + ", ".join(["'" + mode + "'" for mode in MODES]) + ", received '" + kwargs.get('mode') + "'")
     if (kwargs.get('channels_labels') is not None) and (len(kwargs.get('channels_labels')) != n_channels):
         raise ValueError("'channels_labels' expected to contain " + str(n_channels) + " elements, received " + str(len(kwargs.get('channels_labels'))))
     if len(kwargs.get('color')) != n_channels:
         if isinstance(kwargs.get('color')[0], str) and (len(kwargs.get('color')) == 1):
-            kwargs['color'] = [kwargs.get('color') for _ in range(n_channels)]
+            kwargs['color'] = [kwargs.get('color')[0] for _ in range(n_channels)]
         elif isinstance(kwargs.get('color'), (tuple, list)) and (len(kwargs.get('color')) in [3, 4]):
             if len(kwargs.get('color')) == 3:
                 kwargs['color'] = to_rgba(kwargs.get('color'))
@@ -61,23 +73,43 @@ def plot_raster(spikes, **kwargs):
     ----------
     spikes : ndarray or list of ndarray
         An array containing the detected spikes. It can be expressed both
-        as a spike train or the indices at which spikes occur. Multiple
-        channels or trials may be passed as a list of ndarray.
+        as a spike train or the indices at which spikes occur, in increasing
+        order. Multiple channels or trials may be passed as a list of ndarray.
+    mode : {'auto', 'events', 'image', 'lines'}, default='auto'
+        How spikes are drawn. 'events' draws each spike as an event line,
+        'lines' draws the spikes of each channel as a single path and
+        'image' draws an image of the channels, with a pixel lit where at
+        least a spike occurs, which is binned again when the axes are zoomed
+        or panned. 'auto' employs 'events' up to max_events spikes, and
+        'image' otherwise.
+    max_events : int, default=100000
+        The maximum number of spikes drawn as events in 'auto' mode.
+    n_pixels : int, optional
+        The number of time bins of the image. If not specified, it is the
+        width of the axes in pixels.
+    xlim : tuple, optional
+        The time window to plot. Only the spikes inside it are processed.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, the x axis
+        is in seconds. Otherwise, it is in samples.
     '''
     if isinstance(spikes, np.ndarray) and (len(spikes.squeeze().shape)) == 1:
         spikes = [spikes]
 
     n_channels = len(spikes)
 
+    # Spikes are kept in samples, and only those inside the time window are converted
+    spikes_idxs = []
     for channel_idx in range(n_channels):
-        if spikes[channel_idx].dtype == 'bool':
-            spikes[channel_idx] = utils.convert_train_to_idxs(spikes[channel_idx])
-        
-        spikes[channel_idx] = spikes[channel_idx].squeeze()
-        spikes[channel_idx] = np.array([spikes[channel_idx]]) if spikes[channel_idx].size == 1 else spikes[channel_idx]
-        spikes[channel_idx] = kwargs.get('sampling_time') * spikes[channel_idx] if kwargs.get('sampling_time') is not None else spikes[channel_idx]
+        channel_idxs = np.asarray(spikes[channel_idx])
+        if channel_idxs.dtype == 'bool':
+            channel_idxs = utils.convert_train_to_idxs(channel_idxs)
+        channel_idxs = np.atleast_1d(channel_idxs.squeeze())
 
-    spikes_idxs = spikes
+        # The time window is searched by bisection, so spikes given in any order are sorted
+        if np.any(np.diff(channel_idxs) < 0):
+            channel_idxs = np.sort(channel_idxs)
+        spikes_idxs.append(channel_idxs)
 
     kwargs = _parse_kwargs(spikes_idxs, n_channels, **kwargs)
 
@@ -87,7 +119,21 @@ def plot_raster(spikes, **kwargs):
     else:
         ax = kwargs.get('ax')
 
-    ax.eventplot(spikes_idxs, orientation='horizontal', linelengths=kwargs.get('channels_height'), linewidth=kwargs.get('linewidth'), color=kwargs.get('color'))
+    sampling_time = kwargs.get('sampling_time') if kwargs.get('sampling_time') is not None else 1
+    window = _get_window_spikes(spikes_idxs, np.array(kwargs.get('xlim'), dtype=np.float64) / sampling_time)
+    n_events = sum([channel_idxs.size for channel_idxs in window])
+
+    mode = kwargs.get('mode')
+    if mode == 'auto':
+        mode = 'events' if n_events <= kwargs.get('max_events') else 'image'
+
+    if mode == 'events':
+        ax.eventplot([channel_idxs * sampling_time for channel_idxs in window], orientation='horizontal', linelengths=kwargs.get('channels_height'), linewidth=kwargs.get('linewidth'), color=kwargs.get('color'))
+    elif mode == 'lines':
+        ax.add_collection(_get_lines(window, sampling_time, kwargs.get('channels_height'), kwargs.get('color'), kwargs.get('linewidth')))
+        ax.set_ylim(-0.5 - kwargs.get('channels_height') / 2, n_channels - 0.5 + kwargs.get('channels_height') / 2)
+    else:
+        _RasterImage(ax, spikes_idxs, kwargs.get('xlim'), sampling_time, kwargs.get('color'), kwargs.get('n_pixels'))
 
     ax.set_title(kwargs.get('title'))
     ax.set_xlabel(kwargs.get('xlabel'))
@@ -105,8 +151,7 @@ def plot_raster(spikes, **kwargs):
         ax.set_yticks([])
         ax.set_yticklabels([])
 
-    xticklabels = np.array(ax.get_xticklabels())
-    xticklabels = [np.round(float(xticklabel.get_text()), 5) for xticklabel in xticklabels]
+    xticklabels = [np.round(xtick, 5) for xtick in ax.get_xticks()]
     ax.set_xticks(ax.get_xticks())
     ax.set_xticklabels(xticklabels)
 
@@ -119,7 +164,61 @@ def plot_raster(spikes, **kwargs):
         ax.spines['left'].set_visible(False)
         ax.tick_params(left=False) 
 
-    if kwargs.get('reversed') is True:
+    if kwargs.get('reverse') is True:
         ax.invert_yaxis()
 
-    return
\ No newline at end of file
+    return
+
+class _RasterImage:
+    def __init__(self, ax, spikes_idxs, xlim, sampling_time, colors, n_pixels):
+        self.ax = ax
+        self.spikes_idxs = spikes_idxs
+        self.sampling_time = sampling_time
+        self.colors = to_rgba_array([to_rgba(color) for color in colors])
+        self.n_pixels = n_pixels
+
+        self.image = ax.imshow(self.get_image(xlim), extent=(xlim[0], xlim[1], -0.5, len(spikes_idxs) - 0.5), origin='lower', aspect='auto', interpolation='nearest')
+
+        # The callback holds the only reference to this object, which lives as long as the axes
+        ax.callbacks.connect('xlim_changed', lambda ax: self.update())
+
+    def get_image(self, xlim):
+        n_pixels = self.n_pixels if self.n_pixels is not None else max(int(self.ax.get_window_extent().width), 1)
+        (start, stop) = np.array(xlim, dtype=np.float64) / self.sampling_time
+
+        # Occupancy of each pixel, counting only the spikes inside the window
+        occupancy = np.zeros((len(self.spikes_idxs), n_pixels), dtype=bool)
+        for (channel_idx, channel_idxs) in enumerate(_get_window_spikes(self.spikes_idxs, (start, stop))):
+            pixels = np.minimum(((channel_idxs - start) * (n_pixels / (stop - start))).astype(np.int64), n_pixels - 1)
+            occupancy[channel_idx] = np.bincount(pixels, minlength=n_pixels) > 0
+
+        image = np.zeros(occupancy.shape + (4,))
+        image[...] = self.colors[:, np.newaxis, :]
+        image[..., 3] *= occupancy
+
+        return image
+
+    def update(self):
+        xlim = tuple(sorted(self.ax.get_xlim()))
+        self.image.set_data(self.get_image(xlim))
+        self.image.set_extent((xlim[0], xlim[1], -0.5, len(self.spikes_idxs) - 0.5))
+
+def _get_window_spikes(spikes_idxs, window):
+    (start, stop) = window
+
+    return [channel_idxs[np.searchsorted(channel_idxs, start, side='left'):np.searchsorted(channel_idxs, stop, side='right')] for channel_idxs in spikes_idxs]
+
+def _get_lines(spikes_idxs, sampling_time, channels_height, colors, linewidth):
+    return LineCollection(_get_paths(spikes_idxs, sampling_time, channels_height), colors=[to_rgba(color) for color in colors], linewidths=linewidth)
+
+def _get_paths(spikes_idxs, sampling_time, channels_height):
+    # A single path per channel, whose lines are separated by NaN vertices, is drawn much faster than a path per spike
+    paths = []
+    for (channel_idx, channel_idxs) in enumerate(spikes_idxs):
+        vertices = np.full((channel_idxs.size, 3, 2), np.nan)
+        vertices[:, :2, 0] = (channel_idxs * sampling_time)[:, np.newaxis]
+        vertices[:, 0, 1] = channel_idx - channels_height / 2
+        vertices[:, 1, 1] = channel_idx + channels_height / 2
+        paths.append(vertices.reshape(-1, 2))
+
+    return paths
\ No newline at end of file
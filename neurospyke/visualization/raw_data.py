@@ -3,16 +3,22 @@ import numpy as np
 
 from matplotlib.ticker import MaxNLocator
 from .. import utils
+from ..io import MinMaxPyramid
+from .decimation import LODLine
 
 def _parse_kwargs(**kwargs):
     kwargs_list = [
         {'key': 'ax', 'default': None, 'type': None},
         {'key': 'boxoff', 'default': True, 'type': bool},
+        {'key': 'channel', 'default': None, 'type': int},
         {'key': 'color', 'default': '#1f77b4', 'type': str},
+        {'key': 'decimate', 'default': True, 'type': bool},
         {'key': 'dpi', 'default': 100, 'type': float},
         {'key': 'figsize', 'default': (6, 3), 'type': tuple},
         {'key': 'linewidth', 'default': 0.25, 'type': float},
+        {'key': 'n_bins', 'default': None, 'type': int},
         {'key': 'num', 'default': None, 'type': str},
+        {'key': 'pyramid', 'default': None, 'type': None},
         {'key': 'sampling_time', 'default': None, 'type': float},
         {'key': 'title', 'default': 'Raw Data Plot', 'type': str},
         {'key': 'xlabel', 'default': 'Time (s)' if kwargs.get('sampling_time', None) is not None else 'Samples', 'type': str},
@@ -25,10 +31,34 @@ def _parse_kwargs(**kwargs):
     return kwargs
 
 def plot_raw_data(data:np.ndarray, **kwargs):
-    kwargs = _parse_kwargs(**kwargs)
+    '''
+    Plot the recorded data of a channel. By default, the visible time window
+    is decimated to the minimum and maximum of each pixel, and decimated again
+    when the axes are zoomed or panned, so that long recordings are drawn as
+    fast as short ones.
 
-    # Cast data type to float
-    data = data.astype(np.float64).squeeze()
+    Parameters
+    ----------
+    data : ndarray or Reader
+        The array of recorded data, or a reader of a recording. Samples are
+        not copied, so memory-mapped recordings are only read where needed.
+    channel : int, optional
+        The channel to plot, when data is a multi-channel reader or matrix.
+    decimate : bool, default=True
+        If True, the data are decimated to the resolution of the axes.
+        Otherwise, all the samples are plotted.
+    n_bins : int, optional
+        The number of bins of the decimation, each giving a minimum and a
+        maximum. If not specified, it is the width of the axes in pixels.
+    pyramid : MinMaxPyramid or str, optional
+        A min/max pyramid of the recording, or its path, built by
+        io.build_pyramid. Long windows are then decimated by reading only
+        the level of the pyramid fitting the resolution of the axes.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, the x axis
+        is in seconds. Otherwise, it is in samples.
+    '''
+    kwargs = _parse_kwargs(**kwargs)
 
     if kwargs.get('ax') is None:
         plt.figure(num=kwargs.get('num'), figsize=kwargs.get('figsize'), dpi=kwargs.get('dpi'))
@@ -36,15 +66,24 @@ def plot_raw_data(data:np.ndarray, **kwargs):
     else:
         ax = kwargs.get('ax')
 
-    times = kwargs.get('sampling_time') * np.arange(0, np.size(data), 1) if kwargs.get('sampling_time') is not None else np.arange(0, np.size(data), 1)
-    
-    ax.plot(times, data, linewidth=kwargs.get('linewidth'), color=kwargs.get('color'))
+    if isinstance(kwargs.get('pyramid'), str):
+        kwargs['pyramid'] = MinMaxPyramid(kwargs.get('pyramid'))
+
+    if kwargs.get('decimate') is True:
+        line = LODLine(ax, data, channel=kwargs.get('channel'), sampling_time=kwargs.get('sampling_time'), n_bins=kwargs.get('n_bins'), pyramid=kwargs.get('pyramid'), linewidth=kwargs.get('linewidth'), color=kwargs.get('color'))
+        duration = line.get_times(line.n_samples - 1)
+    else:
+        # Read data from a recording reader if needed, and cast data type to float
+        data = utils.read_data(data, kwargs.get('channel')).squeeze()
+        times = kwargs.get('sampling_time') * np.arange(0, np.size(data), 1) if kwargs.get('sampling_time') is not None else np.arange(0, np.size(data), 1)
+        ax.plot(times, data, linewidth=kwargs.get('linewidth'), color=kwargs.get('color'))
+        duration = times[-1]
 
     ax.set_title(kwargs.get('title'))
     ax.set_xlabel(kwargs.get('xlabel'))
     ax.set_ylabel(kwargs.get('ylabel'))
     
-    ax.set_xlim(0, times[-1]) if kwargs.get('xlim') is None else ax.set_xlim(kwargs.get('xlim'))
+    ax.set_xlim(0, duration) if kwargs.get('xlim') is None else ax.set_xlim(kwargs.get('xlim'))
     ax.set_ylim(None, None) if kwargs.get('ylim') is None else ax.set_ylim(kwargs.get('ylim'))
 
     if kwargs.get('sampling_time') is None:
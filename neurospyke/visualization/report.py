@@ -0,0 +1,137 @@
+import io
+import os
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from .. import parallel
+from .butterfly import plot_butterfly
+from .crosscorr import plot_cross_correlogram
+from .ieih import plot_IEIH
+from .psth import plot_PSTH
+from .raster import plot_raster
+from .raw_data import plot_raw_data
+from .spikes import plot_spikes
+
+PLOTS = {
+    'butterfly': plot_butterfly,
+    'cross_correlogram': plot_cross_correlogram,
+    'IEIH': plot_IEIH,
+    'PSTH': plot_PSTH,
+    'raster': plot_raster,
+    'raw_data': plot_raw_data,
+    'spikes': plot_spikes
+}
+
+# Figures of each worker, reused by all the figures with the same plot, size and resolution
+_templates = {}
+
+def render_figures(figures:list, n_jobs:int = None, dpi:float = 100, format:str = None):
+    '''
+    Render a batch of figures to files, such as the per-channel plots of a
+    set of recordings, in the persistent pool of worker processes. Figures
+    are drawn with the Agg backend on explicit Figure objects, without the
+    global state of pyplot, and each worker reuses a figure per plot type,
+    clearing its axes instead of building new ones. Files are written by a
+    thread of each worker while the next figure is drawn.
+
+    Parameters
+    ----------
+    figures : list of dict
+        The figures to render. Each of them is described by a dict with keys
+        'plot', i.e. the name of a plot function without the 'plot_' prefix
+        (e.g. 'raster' or 'butterfly') or a function defined at module level
+        drawing on the ax kwarg, 'filename', and optionally 'args' and
+        'kwargs', the parameters of the plot function. The figsize kwarg,
+        if specified, gives the size of the figure.
+    n_jobs : int, optional
+        The number of processes. If not specified, the value set by
+        parallel.config is employed.
+    dpi : float, default=100
+        The resolution of the figures.
+    format : str, optional
+        The file format. If not specified, it is inferred from each filename.
+
+    Returns
+    -------
+    stats : dict
+        The number of figures ('n_figures'), the elapsed time ('time'), the
+        throughput ('figures_per_second'), and the time spent drawing
+        ('render_time') and writing ('write_time'), summed over the workers.
+    '''
+    for figure in figures:
+        if isinstance(figure['plot'], str) and figure['plot'] not in PLOTS:
+            raise ValueError("'plot' expected to be one of " + ", ".join(["'" + name + "'" for name in PLOTS]) + ", received '" + figure['plot'] + "'")
+
+    start_time = time.perf_counter()
+
+    # Batches of figures, so that each worker overlaps drawing and writing
+    n_batches = min(4 * parallel.get_n_jobs(n_jobs), len(figures)) if parallel.get_n_jobs(n_jobs) > 1 else min(len(figures), 1)
+    batches = [list(batch) for batch in np.array_split(np.arange(len(figures)), n_batches)] if n_batches > 0 else []
+    out = parallel.map_tasks(_render_batch, None, [[figures[idx] for idx in batch] for batch in batches], n_jobs, dpi=dpi, format=format)
+
+    elapsed_time = time.perf_counter() - start_time
+
+    return {
+        'n_figures': len(figures),
+        'time': elapsed_time,
+        'figures_per_second': len(figures) / elapsed_time if elapsed_time > 0 else 0,
+        'render_time': sum([batch_out[0] for batch_out in out]),
+        'write_time': sum([batch_out[1] for batch_out in out])
+    }
+
+def _render_batch(shared, figures, dpi, format):
+    render_time = 0
+    writes = []
+
+    with ThreadPoolExecutor(max_workers=1) as writer:
+        for figure in figures:
+            start_time = time.perf_counter()
+
+            kwargs = dict(figure.get('kwargs', {}))
+            plot = PLOTS[figure['plot']] if isinstance(figure['plot'], str) else figure['plot']
+            (fig, ax) = _get_template(plot, tuple(kwargs.get('figsize', (6, 3))), kwargs.get('dpi', dpi))
+
+            plot(*figure.get('args', ()), **dict(kwargs, ax=ax))
+
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format=format if format is not None else os.path.splitext(figure['filename'])[1][1:] or 'png')
+            render_time += time.perf_counter() - start_time
+
+            writes.append(writer.submit(_write_file, figure['filename'], buffer.getvalue()))
+
+        write_time = sum([write.result() for write in writes])
+
+    return render_time, write_time
+
+def _get_template(plot, figsize, dpi):
+    key = (plot, figsize, dpi)
+
+    if key not in _templates:
+        fig = Figure(figsize=figsize, dpi=dpi)
+        FigureCanvasAgg(fig)
+        _templates[key] = (fig, fig.add_subplot())
+
+    (fig, ax) = _templates[key]
+
+    # Clearing keeps the axes, but not the visibility of spines hidden by the previous figure
+    ax.clear()
+    for spine in ax.spines.values():
+        spine.set_visible(True)
+
+    return fig, ax
+
+def _write_file(filename, data):
+    start_time = time.perf_counter()
+
+    if os.path.dirname(filename) != '':
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+    # Files are replaced atomically, so that they are never found half-written
+    with open(filename + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(filename + '.tmp', filename)
+
+    return time.perf_counter() - start_time
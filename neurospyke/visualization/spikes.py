@@ -8,13 +8,16 @@ def _parse_kwargs(**kwargs):
     kwargs_list = [
         {'key': 'ax', 'default': None, 'type': None},
         {'key': 'boxoff', 'default': True, 'type': bool},
+        {'key': 'channel', 'default': None, 'type': int},
         {'key': 'color', 'default': '#1f77b4', 'type': str},
+        {'key': 'decimate', 'default': True, 'type': bool},
         {'key': 'dpi', 'default': 100, 'type': float},
         {'key': 'figsize', 'default': (6, 3), 'type': tuple},
         {'key': 'linewidth', 'default': 0.25, 'type': float},
         {'key': 'marker', 'default': '*', 'type': str},
         {'key': 'markercolor', 'default': 'red', 'type': str},
         {'key': 'markersize', 'default': 2, 'type': float},
+        {'key': 'n_bins', 'default': None, 'type': int},
         {'key': 'num', 'default': None, 'type': str},
         {'key': 'sampling_time', 'default': None, 'type': float},
         {'key': 'title', 'default': 'Spike Plot', 'type': str},
@@ -28,16 +31,38 @@ def _parse_kwargs(**kwargs):
     return kwargs
 
 def plot_spikes(data:np.ndarray, spikes:np.ndarray, **kwargs):
+    '''
+    Plot the recorded data of a channel, as plot_raw_data, with a marker on
+    each detected spike. Markers are placed at the actual values of the
+    spikes, which are read without copying the rest of the data.
+
+    Parameters
+    ----------
+    data : ndarray or Reader
+        The array of recorded data, or a reader of a recording.
+    spikes : ndarray
+        An array containing the detected spikes. It can be expressed both
+        as a spike train or the indices at which spikes occur.
+    channel : int, optional
+        The channel to plot, when data is a multi-channel reader or matrix.
+    decimate : bool, default=True
+        If True, the data are decimated to the resolution of the axes.
+        Otherwise, all the samples are plotted.
+    sampling_time : float, optional
+        The sampling time for the recorded data. If specified, the x axis
+        is in seconds. Otherwise, it is in samples.
+    '''
     kwargs = _parse_kwargs(**kwargs)
 
-    # Cast data type to float
-    data = data.astype(np.float64).squeeze()
-    spikes = spikes.squeeze()
+    spikes_idxs = utils.get_spikes_idxs(spikes)
 
-    if spikes.dtype == 'bool':
-        spikes_idxs = utils.convert_train_to_idxs(spikes)
+    if utils.is_reader(data):
+        spikes_values = data.gather(spikes_idxs, channels=utils.get_reader_channel(data, kwargs.get('channel')))
     else:
-        spikes_idxs = spikes
+        data = np.asarray(data)
+        data = data[kwargs.get('channel')] if kwargs.get('channel') is not None else data.squeeze()
+        kwargs['channel'] = None
+        spikes_values = data[spikes_idxs].astype(np.float64)
 
     if kwargs.get('ax') is None:
         plt.figure(num=kwargs.get('num'), figsize=kwargs.get('figsize'), dpi=kwargs.get('dpi'))
@@ -48,6 +73,6 @@ def plot_spikes(data:np.ndarray, spikes:np.ndarray, **kwargs):
     plot_raw_data(data, **kwargs)
 
     spikes_times = kwargs.get('sampling_time') * spikes_idxs if kwargs.get('sampling_time') is not None else spikes_idxs
-    ax.plot(spikes_times, data[spikes_idxs], color=kwargs.get('markercolor'), marker=kwargs.get('marker'), markersize=kwargs.get('markersize'), linestyle='None')
+    ax.plot(spikes_times, spikes_values, color=kwargs.get('markercolor'), marker=kwargs.get('marker'), markersize=kwargs.get('markersize'), linestyle='None')
 
     return
\ No newline at end of file
@@ -22,6 +22,14 @@ INSTALL_REQUIRES = [
       'distinctipy'
 ]
 
+EXTRAS_REQUIRE = {
+      'hdf5': ['h5py']
+}
+
+ENTRY_POINTS = {
+      'console_scripts': ['neurospyke = neurospyke.cli:main']
+}
+
 setup(name=PACKAGE_NAME,
       version=VERSION,
       description=DESCRIPTION,
@@ -32,5 +40,7 @@ setup(name=PACKAGE_NAME,
       author_email=AUTHOR_EMAIL,
       url=URL,
       install_requires=INSTALL_REQUIRES,
+      extras_require=EXTRAS_REQUIRE,
+      entry_points=ENTRY_POINTS,
       packages=find_packages()
       )
\ No newline at end of file
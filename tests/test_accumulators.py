@@ -0,0 +1,16 @@
+import numpy as np
+
+from neurospyke.spikes.analysis import PSTH, PSTHAccumulator
+
+def test_psth_accumulator_with_empty_first_segment():
+    rng = np.random.default_rng(0)
+    spikes = np.sort(rng.choice(np.arange(3000, 10000), 400, replace=False))
+    stimuli = np.arange(3500, 9000, 500)
+
+    accumulator = PSTHAccumulator(100, 10)
+    accumulator.update(np.zeros(0, np.int64), np.zeros(0, np.int64))
+    for start in range(0, 10000, 2500):
+        is_inside = lambda idxs: (idxs >= start) & (idxs < start + 2500)
+        accumulator.update(spikes[is_inside(spikes)] - start, stimuli[is_inside(stimuli)] - start, offset=start)
+
+    np.testing.assert_array_equal(accumulator.result(), PSTH(spikes, 100, stimuli=stimuli, bin_size=10))
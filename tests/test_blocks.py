@@ -0,0 +1,60 @@
+import os
+
+import numpy as np
+import pytest
+
+from neurospyke import parallel
+from neurospyke.io import BinaryReader
+from neurospyke.spikes.detection import differential_threshold, hard_threshold, SWTTEO, detect_spikes_blocks
+
+DETECTORS = [
+    ('hard_threshold', hard_threshold, (-30, 20), {'polarity': -1}),
+    ('hard_threshold', hard_threshold, (30, 7.5), {'polarity': 0}),
+    ('differential_threshold', differential_threshold, (60, 16, 20), {'polarity': -1}),
+    ('SWTTEO', SWTTEO, (1 / 10000,), {'threshold': 3, 'refractory_period': 0.002})
+]
+
+def _get_recording(seed, n_channels=3, n_samples=60000):
+    rng = np.random.default_rng(seed)
+    data = rng.normal(0, 10, (n_channels, n_samples))
+    for channel in range(n_channels):
+        data[channel, rng.integers(0, n_samples, 300)] -= rng.uniform(40, 120, 300)
+
+    # Integer samples produce plateaus and ties between peaks
+    return np.round(data).astype(np.int16)
+
+# Lengths which are not a multiple of the wavelet decimation are padded by SWTTEO
+@pytest.mark.parametrize(('seed', 'n_samples'), [(0, 60000), (1, 50001), (2, 40003)])
+@pytest.mark.parametrize('detector', DETECTORS, ids=lambda detector: detector[0])
+def test_blocks_match_serial_detector(tmp_path, seed, n_samples, detector):
+    (method, serial_detector, args, kwargs) = detector
+    data = _get_recording(seed, n_samples=n_samples)
+    filename = os.path.join(tmp_path, 'recording.bin')
+    data.T.tofile(filename)
+    mapped = np.memmap(filename, dtype=np.int16, mode='r', shape=data.T.shape).T
+
+    for channel in range(data.shape[0]):
+        (serial_idxs, serial_values) = serial_detector(data, *args, channel=channel, **kwargs)
+
+        for (source, n_jobs) in [(data, 1), (mapped, 1), (mapped, 2), (data.astype(np.float32), 2)]:
+            for (block_size, chunk_size) in [(997, 4096), (8192, 2**20)]:
+                with parallel.config(chunk_size=chunk_size):
+                    (spikes_idxs, spikes_values) = detect_spikes_blocks(source, method, *args, block_size=block_size, n_jobs=n_jobs, channel=channel, **kwargs)
+                np.testing.assert_array_equal(spikes_idxs, serial_idxs)
+                np.testing.assert_array_equal(spikes_values, serial_values)
+    parallel.shutdown()
+
+@pytest.mark.parametrize('detector', DETECTORS, ids=lambda detector: detector[0])
+def test_blocks_match_serial_detector_from_reader(tmp_path, detector):
+    (method, serial_detector, args, kwargs) = detector
+    data = _get_recording(2, n_samples=20000)
+    filename = os.path.join(tmp_path, 'recording.bin')
+    data.T.tofile(filename)
+
+    reader = BinaryReader(filename, data.shape[0], dtype='int16')
+
+    (serial_idxs, serial_values) = serial_detector(data, *args, channel=1, **kwargs)
+    (spikes_idxs, spikes_values) = detect_spikes_blocks(reader, method, *args, block_size=1500, n_jobs=1, channel=1, **kwargs)
+
+    np.testing.assert_array_equal(spikes_idxs, serial_idxs)
+    np.testing.assert_array_equal(spikes_values, serial_values)
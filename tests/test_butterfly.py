@@ -0,0 +1,16 @@
+import matplotlib
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from neurospyke.visualization import plot_butterfly
+
+def test_density_without_spikes():
+    data = np.random.default_rng(0).normal(0, 10, 10000)
+
+    plot_butterfly(data, np.zeros(0, dtype=np.int64), mode='density', median=True)
+    image = plt.gca().images[0]
+    assert image.get_array().shape == (200, 20)
+    assert image.get_array().mask.all()
+    plt.close('all')
@@ -0,0 +1,64 @@
+import numpy as np
+
+from neurospyke import utils
+from neurospyke.io import BinaryReader
+from neurospyke.preprocessing import FilteredReader, get_bandpass_sos
+from neurospyke.spikes.detection import hard_threshold
+
+def _define(source, namespace=None):
+    namespace = {'__name__': 'cached'} if namespace is None else namespace
+    exec(source, namespace)
+
+    return namespace['f']
+
+def test_key_ignores_n_jobs_in_kwargs(tmp_path):
+    cache = utils.Cache(tmp_path)
+    f = _define('def f(x, **kwargs):\n    return x\n')
+
+    assert cache.get_key(f, (np.arange(10),), {'n_jobs': 1}) == cache.get_key(f, (np.arange(10),), {'n_jobs': 4})
+    assert cache.get_key(f, (np.arange(10),), {'n_jobs': 1}) == cache.get_key(f, (np.arange(10),), {})
+    assert cache.get_key(f, (np.arange(10),), {'bin_size': 1}) != cache.get_key(f, (np.arange(10),), {'bin_size': 2})
+
+def test_key_depends_on_constants_and_defaults(tmp_path):
+    cache = utils.Cache(tmp_path)
+    args = (np.arange(10),)
+
+    # Same name and bytecode, different constants
+    (f1, f2) = (_define('def f(x):\n    return x + 1\n'), _define('def f(x):\n    return x + 2\n'))
+    assert f1.__code__.co_code == f2.__code__.co_code
+    assert cache.get_key(f1, args, {}) != cache.get_key(f2, args, {})
+
+    # Defaults filled in by the kwargs parser
+    (p1, p2) = (_define('def f(**kwargs):\n    return dict({"bin_size": 20}, **kwargs)\n'), _define('def f(**kwargs):\n    return dict({"bin_size": 50}, **kwargs)\n'))
+    g = _define('def f(x, **kwargs):\n    return x\n')
+    assert cache.get_key(g, args, {}, parse_kwargs=lambda **kwargs: kwargs) == cache.get_key(g, args, {}, parse_kwargs=lambda **kwargs: kwargs)
+    assert cache.get_key(g, args, {}, parse_kwargs=p1) != cache.get_key(g, args, {}, parse_kwargs=p2)
+
+    assert cache.get_key(_define('def f(x, y=1):\n    return x\n'), args, {}) != cache.get_key(_define('def f(x, y=2):\n    return x\n'), args, {})
+
+def test_version_invalidates_results(tmp_path):
+    calls = []
+    def f(x):
+        calls.append(x)
+        return x * 2
+
+    assert utils.Cache(tmp_path)(f)(3) == 6
+    assert utils.Cache(tmp_path)(f)(3) == 6
+    assert utils.Cache(tmp_path, version='2')(f)(3) == 6
+    assert len(calls) == 2
+
+def test_filtered_readers_with_different_filters(tmp_path):
+    data = np.round(np.random.default_rng(0).normal(0, 20, (20000, 2))).astype(np.int16)
+    filename = str(tmp_path / 'recording.bin')
+    data.tofile(filename)
+    reader = BinaryReader(filename, 2, dtype='int16', sampling_time=1 / 10000)
+
+    readers = [FilteredReader(reader, get_bandpass_sos(300, 3000, 1 / 10000)), FilteredReader(reader, get_bandpass_sos(1000, 2000, 1 / 10000)), FilteredReader(reader, get_bandpass_sos(300, 3000, 1 / 10000), zero_phase=True)]
+    expected = [hard_threshold(filtered, -20, 10, channel=0)[0] for filtered in readers]
+
+    with utils.Cache(tmp_path / 'cache') as cache:
+        for _ in range(2):
+            for (filtered, filtered_expected) in zip(readers, expected):
+                np.testing.assert_array_equal(hard_threshold(filtered, -20, 10, channel=0)[0], filtered_expected)
+
+    assert (cache.misses, cache.hits) == (3, 3)
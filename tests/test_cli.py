@@ -0,0 +1,31 @@
+import json
+
+import numpy as np
+import pytest
+
+from neurospyke import cli
+
+def test_block_size_rejected_by_oswtteo(tmp_path, capsys):
+    with pytest.raises(SystemExit) as error:
+        cli.main(['detect', str(tmp_path), str(tmp_path / 'out'), '--method', 'oswtteo', '--block-size', '100000'])
+
+    assert error.value.code == 2
+    assert "'--block-size' is not supported by the 'oswtteo' method" in capsys.readouterr().err
+    assert not (tmp_path / 'out').exists()
+
+def test_rerun_keeps_report_of_processed_recordings(tmp_path):
+    in_dir = tmp_path / 'in'
+    in_dir.mkdir()
+    rng = np.random.default_rng(0)
+    for name in ['a', 'b']:
+        np.round(rng.normal(0, 20, (20000, 2))).astype(np.int16).tofile(str(in_dir / (name + '.bin')))
+
+    argv = ['detect', str(in_dir), str(tmp_path / 'out'), '--method', 'hard', '--threshold', '-60', '--n-channels', '2', '--sampling-time', '0.0001', '--quiet']
+    assert cli.main(argv) == 0
+    with open(tmp_path / 'out' / 'report.json') as f:
+        report = json.load(f)
+    assert report['n_processed'] == 2 and 'detection' in report['timing']
+
+    assert cli.main(argv) == 0
+    with open(tmp_path / 'out' / 'report.json') as f:
+        assert json.load(f) == report
@@ -0,0 +1,25 @@
+import os
+
+import matplotlib
+matplotlib.use('Agg')
+import numpy as np
+
+from neurospyke.io import BinaryReader
+from neurospyke.visualization.grid import _gather_amplitudes, _get_medians, _get_spikes_columns
+
+def test_gather_amplitudes_reader_matches_array(tmp_path):
+    rng = np.random.default_rng(0)
+    data = rng.normal(0, 10, (4, 5000)).astype(np.int16)
+    filename = os.path.join(tmp_path, 'recording.bin')
+    data.T.tofile(filename)
+    reader = BinaryReader(filename, 4, dtype='int16')
+
+    spikes = [np.sort(rng.choice(5000, 50, replace=False)) for _ in range(4)]
+    channels = np.array([3, 1, 0, 2])
+
+    (spikes_channels, spikes_times, _) = _get_spikes_columns(spikes, channels, 0, 5000, load_amplitudes=True)
+    from_reader = _gather_amplitudes(reader, spikes_channels, spikes_times)
+    from_array = _gather_amplitudes(data, spikes_channels, spikes_times)
+
+    np.testing.assert_array_equal(from_reader, from_array)
+    np.testing.assert_array_equal(_get_medians(spikes_channels, np.abs(from_reader), 4), _get_medians(spikes_channels, np.abs(from_array), 4))
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from neurospyke import utils
+from neurospyke.spikes.analysis import cross_correlation
+from neurospyke.spikes.analysis.crosscorr import _packed_cross_correlation
+
+def _get_train(rng, n_samples, rate=0.05):
+    return rng.random(n_samples) < rate
+
+@pytest.mark.parametrize('seed', range(5))
+def test_packed_train_matches_boolean_train(seed):
+    rng = np.random.default_rng(seed)
+    (n_samples, other_samples) = rng.integers(1, 2000, 2)
+    (train, other) = (_get_train(rng, n_samples), _get_train(rng, other_samples))
+    (packed, other_packed) = (utils.PackedTrain.from_train(train), utils.PackedTrain.from_train(other))
+
+    np.testing.assert_array_equal(packed.to_train(), train)
+    np.testing.assert_array_equal(packed.to_idxs(), np.flatnonzero(train))
+    assert packed == utils.PackedTrain.from_idxs(np.flatnonzero(train), duration=n_samples)
+    assert packed.count() == np.sum(train)
+
+    for n in rng.integers(-n_samples - 10, n_samples + 10, 10):
+        shifted = np.zeros(n_samples, dtype=bool)
+        idxs = np.flatnonzero(train) + n
+        shifted[idxs[(idxs >= 0) & (idxs < n_samples)]] = True
+        np.testing.assert_array_equal(packed.shift(n).to_train(), shifted)
+
+    padded = np.zeros((2, max(n_samples, other_samples)), dtype=bool)
+    (padded[0, :n_samples], padded[1, :other_samples]) = (train, other)
+    np.testing.assert_array_equal((packed & other_packed).to_train(), padded[0] & padded[1])
+    np.testing.assert_array_equal((packed | other_packed).to_train(), padded[0] | padded[1])
+
+    for bin_size in [1, 3, 8, 17, 64]:
+        n_bins = n_samples // bin_size
+        np.testing.assert_array_equal(packed.bin(bin_size), train[:n_bins * bin_size].reshape(n_bins, bin_size).sum(axis=1))
+
+    shifts = rng.integers(-200, 200, 10)
+    expected = [np.sum(padded[0] & np.roll(np.pad(padded[1], 200), shift)[200:-200]) for shift in shifts]
+    np.testing.assert_array_equal(packed.coincidences(other_packed, shifts), expected)
+
+@pytest.mark.parametrize('seed', range(5))
+def test_packed_cross_correlation_matches_unpacked(seed):
+    rng = np.random.default_rng(seed)
+    (reference, target) = (_get_train(rng, rng.integers(100, 3000)), _get_train(rng, rng.integers(100, 3000)))
+    (tau, window_length) = (int(rng.integers(1, 5)), int(rng.integers(10, 60)))
+
+    expected = cross_correlation(reference.astype(np.float64), target.astype(np.float64), tau, window_length, None)
+    packed = _packed_cross_correlation(utils.PackedTrain.from_train(reference), utils.PackedTrain.from_train(target), tau, window_length, None)
+    np.testing.assert_array_equal(packed, expected)
+
+    # A packed train mixed with a boolean one is packed as well
+    np.testing.assert_array_equal(cross_correlation(utils.PackedTrain.from_train(reference), target, tau, window_length, None), expected)
+    np.testing.assert_array_equal(cross_correlation(reference, utils.PackedTrain.from_train(target), tau, window_length, None), expected)
+
+def test_packed_train_mixed_with_arrays():
+    rng = np.random.default_rng(0)
+    (train, other) = (_get_train(rng, 500), _get_train(rng, 500))
+    packed = utils.PackedTrain.from_train(train)
+
+    np.testing.assert_array_equal((packed & other).to_train(), train & other)
+    np.testing.assert_array_equal((other | packed).to_train(), train | other)
+    np.testing.assert_array_equal(packed.coincidences(other.astype(np.int64), [0, 3]), packed.coincidences(utils.PackedTrain.from_train(other), [0, 3]))
+
+    with pytest.raises(ValueError):
+        packed & np.full(500, 2)
+    with pytest.raises(TypeError):
+        packed.coincidences(3, [0])
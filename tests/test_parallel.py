@@ -0,0 +1,56 @@
+import os
+import pickle
+
+import numpy as np
+
+from neurospyke import parallel
+from neurospyke.parallel import shared as shared_module
+from neurospyke.io import build_pyramid
+
+def test_mapped_array_pickles_views(tmp_path):
+    filename = os.path.join(tmp_path, 'recording.bin')
+    data = np.arange(6 * 1000, dtype=np.int16).reshape(1000, 6)
+    data.tofile(filename)
+    mapped = np.memmap(filename, dtype=np.int16, mode='r', offset=12, shape=(999, 6))
+
+    for view in [mapped, mapped.T, mapped.T[3], mapped[10:20, 2:5]]:
+        unpickled = pickle.loads(pickle.dumps(parallel.MappedArray(view)))
+        np.testing.assert_array_equal(unpickled.array, view)
+
+def test_build_pyramid_from_memmap_in_parallel(tmp_path):
+    filename = os.path.join(tmp_path, 'recording.bin')
+    np.random.default_rng(0).normal(0, 10, (3, 100000)).astype(np.float32).tofile(filename)
+    mapped = np.memmap(filename, dtype=np.float32, mode='r', shape=(3, 100000))
+
+    serial = build_pyramid(mapped, os.path.join(tmp_path, 'serial'), n_jobs=1)
+    with parallel.config(chunk_size=2**14):
+        pyramid = build_pyramid(mapped, os.path.join(tmp_path, 'parallel'), n_jobs=2)
+    parallel.shutdown()
+
+    for (level, serial_level) in zip(pyramid.levels, serial.levels):
+        np.testing.assert_array_equal(level, serial_level)
+
+def _sum_block(shared, task):
+    return float(np.sum(shared[task[0]:task[1]]))
+
+def _get_attached(name):
+    maps = open('/proc/self/maps').read() if os.path.exists('/proc/self/maps') else ''
+
+    return len(shared_module._attached), name in maps
+
+def test_workers_release_shared_memory():
+    parallel.shutdown()
+
+    # Workers are started by the first call and inherit the block, then they are running and attach it
+    for _ in range(2):
+        with parallel.SharedArray(np.arange(100000, dtype=np.float64)) as shared:
+            name = shared.name.lstrip('/')
+            out = parallel.map_tasks(_sum_block, shared, [(start, start + 1000) for start in range(0, 100000, 1000)], n_jobs=2)
+            assert sum(out) == np.sum(np.arange(100000, dtype=np.float64))
+
+        # Every worker has closed the block once the call returned
+        executor = parallel.get_executor(2)
+        attached = [future.result() for future in [executor.submit(_get_attached, name) for _ in range(8)]]
+        assert len(executor._processes) == 2
+        assert attached == [(0, False)] * 8
+    parallel.shutdown()
@@ -0,0 +1,73 @@
+import pickle
+
+import numpy as np
+import pytest
+from scipy import signal
+
+from neurospyke import parallel
+from neurospyke.preprocessing import filter_data, FilteredReader, get_bandpass_sos, get_initial_state, get_notch_sos
+from neurospyke.spikes.detection import detect_spikes
+
+SAMPLING_TIME = 1 / 10000
+
+def _get_recording(seed, n_channels=3, n_samples=80000):
+    rng = np.random.default_rng(seed)
+
+    return rng.normal(0, 10, (n_channels, n_samples)) + rng.normal(0, 100, (n_channels, 1))
+
+def _get_sos():
+    return np.concatenate([get_bandpass_sos(300, 3000, SAMPLING_TIME), get_notch_sos(50, SAMPLING_TIME)])
+
+@pytest.mark.parametrize('seed', range(3))
+def test_causal_filtering_matches_sosfilt(seed):
+    (data, sos) = (_get_recording(seed), _get_sos())
+    expected = signal.sosfilt(sos, data, axis=-1, zi=get_initial_state(sos, data[:, 0]))[0]
+    reader = FilteredReader(data, sos)
+
+    np.testing.assert_allclose(reader.read(), expected, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(reader.read(channels=1), expected[1], rtol=0, atol=1e-9)
+
+    with parallel.config(chunk_size=1234):
+        np.testing.assert_allclose(filter_data(data, sos), expected, rtol=0, atol=1e-9)
+
+    rng = np.random.default_rng(seed)
+    for (chunk_start, chunk_stop, block_start, block) in reader.iter_chunks(int(rng.integers(100, 5000)), halo=50, channels=[2, 0]):
+        np.testing.assert_allclose(block, expected[[2, 0], block_start:block_start + block.shape[1]], rtol=0, atol=1e-9)
+
+    # Windows far from the start only see the padding, so they match within the tolerance of get_padding
+    for start in rng.integers(reader.padding, data.shape[1] - 500, 5):
+        np.testing.assert_allclose(reader.read(start=start, stop=start + 500), expected[:, start:start + 500], rtol=0, atol=1e-4 * np.amax(np.abs(expected)))
+
+    samples_idxs = rng.integers(0, data.shape[1], (20, 7))
+    np.testing.assert_allclose(reader.gather(samples_idxs, channels=0), expected[0][samples_idxs], rtol=0, atol=1e-4 * np.amax(np.abs(expected)))
+
+@pytest.mark.parametrize('seed', range(3))
+def test_zero_phase_filtering_matches_sosfiltfilt(seed):
+    (data, sos) = (_get_recording(seed), _get_sos())
+    expected = signal.sosfiltfilt(sos, data, axis=-1)
+    reader = FilteredReader(data, sos, zero_phase=True)
+
+    np.testing.assert_allclose(reader.read(), expected, rtol=0, atol=1e-9)
+
+    # Windows are padded on both sides, so away from the boundaries they match within the tolerance of get_padding
+    rng = np.random.default_rng(seed)
+    for start in rng.integers(reader.padding, data.shape[1] - reader.padding - 500, 5):
+        np.testing.assert_allclose(reader.read(start=start, stop=start + 500), expected[:, start:start + 500], rtol=0, atol=1e-4 * np.amax(np.abs(expected)))
+
+def test_filtered_memmap_is_pickled_by_file(tmp_path):
+    data = _get_recording(0, n_samples=100000)
+    filename = str(tmp_path / 'recording.npy')
+    np.save(filename, data)
+    mapped = np.load(filename, mmap_mode='r')
+
+    for (source, channel) in [(mapped, 1), (mapped[1:], 0), (mapped[2], None)]:
+        reader = FilteredReader(source, _get_sos())
+        pickled = pickle.dumps(reader)
+        assert len(pickled) < 10000
+
+        unpickled = pickle.loads(pickled)
+        np.testing.assert_array_equal(unpickled.read(channels=channel, start=5000, stop=6000), reader.read(channels=channel, start=5000, stop=6000))
+
+    with parallel.config(n_jobs=2):
+        np.testing.assert_array_equal(detect_spikes(FilteredReader(mapped, _get_sos()), 'hard_threshold', -30, 20)[0][2], detect_spikes(FilteredReader(mapped, _get_sos()), 'hard_threshold', -30, 20, n_jobs=1)[0][2])
+    parallel.shutdown()
@@ -0,0 +1,18 @@
+import matplotlib
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from neurospyke.visualization import plot_raster
+
+def test_unsorted_spikes():
+    rng = np.random.default_rng(0)
+    spikes = [rng.permutation(rng.choice(10000, 100, replace=False)) for _ in range(3)]
+
+    plot_raster(spikes, mode='events')
+    ax = plt.gca()
+    assert ax.get_xlim()[1] >= max([np.amax(channel_idxs) for channel_idxs in spikes])
+    for (collection, channel_idxs) in zip(ax.collections, spikes):
+        np.testing.assert_array_equal(np.sort(collection.get_positions()), np.sort(channel_idxs))
+    plt.close('all')